@@ -0,0 +1,115 @@
+import base64
+import os
+import sys
+import time
+
+import numpy as np
+from socketio import packet
+from wsproto.frame_protocol import FrameProtocol, Opcode
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.api.audio_ws_routes import parse_header, to_mono_pcm16
+
+FRAMES = 5000
+
+# 每帧的音频：浏览器发送的 32ms 16kHz 数据包，以及典型的 SIP 网关 20ms 8kHz 数据包
+FRAME_CONFIGS = (
+    ("16kHz 单声道 32ms", 16000, 512),
+    ("8kHz 单声道 20ms", 8000, 160),
+)
+
+
+def ws_frame(sender, payload):
+    """编码一条 WebSocket 消息（str 为文本消息，bytes 为二进制消息）"""
+    return sender.send_data(payload, fin=True)
+
+
+def ws_receive(receiver, data):
+    """解码 WebSocket 字节流，返回消息内容列表"""
+    receiver.receive_bytes(data)
+    return [frame.payload for frame in receiver.received_frames()
+            if frame.opcode in (Opcode.TEXT, Opcode.BINARY)]
+
+
+def socketio_binary(audio, sample_rate, seq):
+    """Socket.IO 二进制附件：一条文本消息（事件 JSON）加一条二进制消息（附件）"""
+    pkt = packet.Packet(packet.EVENT, namespace='/', data=[
+        'audio_data', {'audio': audio, 'sampleRate': sample_rate, 'seq': seq, 'ts': 12345.678}])
+    encoded = pkt.encode()
+    # Engine.IO v4 在 WebSocket 上：文本消息加 "4"（MESSAGE）前缀，二进制附件原样发送
+    return ['4' + encoded[0]] + encoded[1:]
+
+
+def socketio_binary_decode(messages):
+    pkt = packet.Packet(encoded_packet=messages[0][1:])
+    for attachment in messages[1:]:
+        pkt.add_attachment(attachment)
+    data = pkt.data[1]
+    return memoryview(data['audio']), data['sampleRate']
+
+
+def socketio_base64(audio, sample_rate, seq):
+    """旧版 Socket.IO 路径：base64 文本"""
+    pkt = packet.Packet(packet.EVENT, namespace='/', data=[
+        'audio_data', {'audio': base64.b64encode(audio).decode(), 'sampleRate': sample_rate,
+                       'seq': seq, 'ts': 12345.678}])
+    return ['4' + pkt.encode()]
+
+
+def socketio_base64_decode(messages):
+    pkt = packet.Packet(encoded_packet=messages[0][1:])
+    data = pkt.data[1]
+    return memoryview(base64.b64decode(data['audio'])), data['sampleRate']
+
+
+def raw_websocket(audio, sample_rate, seq):
+    """原始 WebSocket：一条只含 PCM 的二进制消息（格式头在连接时发送一次）"""
+    return [audio]
+
+
+def raw_websocket_decode(messages, header):
+    return to_mono_pcm16(messages[0], header), header['sample_rate']
+
+
+def bench(name, sample_rate, samples):
+    audio = (np.random.default_rng(0).standard_normal(samples) * 3000).astype(np.int16).tobytes()
+    header = parse_header({'sample_rate': sample_rate, 'channels': 1, 'format': 's16le'})
+
+    transports = (
+        ("Socket.IO 二进制附件", socketio_binary, socketio_binary_decode),
+        ("Socket.IO base64", socketio_base64, socketio_base64_decode),
+        ("原始 WebSocket", raw_websocket, lambda messages: raw_websocket_decode(messages, header)),
+    )
+
+    print(f"\n{name}（音频 {len(audio)} 字节/帧，{FRAMES} 帧）:")
+    for label, encode, decode in transports:
+        sender = FrameProtocol(client=True, extensions=[])
+        receiver = FrameProtocol(client=False, extensions=[])
+
+        # 客户端编码（生产者一侧的开销）
+        start = time.perf_counter()
+        wire = []
+        for seq in range(FRAMES):
+            wire.append(b''.join(ws_frame(sender, message) for message in encode(audio, sample_rate, seq)))
+        encode_time = time.perf_counter() - start
+
+        # 服务器端解码（共享服务器上的开销）
+        start = time.perf_counter()
+        for data in wire:
+            messages = ws_receive(receiver, data)
+            pcm, rate = decode(messages)
+            assert bytes(pcm) == audio and rate == sample_rate
+        decode_time = time.perf_counter() - start
+
+        wire_bytes = len(wire[0])
+        messages_per_frame = len(encode(audio, sample_rate, 0))
+        print(f"  {label:<18} 每帧 {messages_per_frame} 条消息  "
+              f"线上 {wire_bytes:5d} 字节（额外 {wire_bytes - len(audio):5d}）  "
+              f"编码 {encode_time / FRAMES * 1e6:6.1f} us  "
+              f"服务器解码 {decode_time / FRAMES * 1e6:6.1f} us")
+
+
+if __name__ == "__main__":
+    for config in FRAME_CONFIGS:
+        bench(*config)
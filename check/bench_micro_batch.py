@@ -0,0 +1,104 @@
+import os
+import random
+import statistics
+import sys
+import time
+
+import ctranslate2
+import faster_whisper
+import soundfile as sf
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.stt.micro_batch import MicroBatchPipeline
+
+# 用法: python check/bench_micro_batch.py [模型] [批量等待窗口（秒）]
+MODEL = sys.argv[1] if len(sys.argv) > 1 else "tiny"
+WINDOW = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+MAX_BATCH = 8
+BATCH_SIZE = 16
+BEAM_SIZE = 5
+# 同时说完一句话的说话人数，每个请求在 10 毫秒内先后到达
+SPEAKERS = (1, 2, 4, 8)
+ARRIVAL_SPREAD = 0.01
+ROUNDS = 5
+
+AUDIO_PATH = os.path.join(os.path.dirname(__file__), '..', 'src', 'utils', 'stt', 'warmup_audio.wav')
+
+
+def make_requests(audio, count, rng):
+    """生成 count 个请求：(到达时间, 音频)，音频截取不同的长度模拟不同的句子"""
+    requests = []
+    for _ in range(count):
+        length = int(len(audio) * rng.uniform(0.6, 1.0))
+        requests.append((rng.uniform(0, ARRIVAL_SPREAD), audio[:length]))
+    return sorted(requests, key=lambda request: request[0])
+
+
+def run_sequential(pipeline, requests):
+    """旧实现：每个请求单独解码，后到的请求排队等待"""
+    latencies = []
+    clock = 0.0
+    for arrival, audio in requests:
+        clock = max(clock, arrival)
+        start = time.perf_counter()
+        prepared, _ = pipeline.prepare(audio, language="en", beam_size=BEAM_SIZE)
+        pipeline.decode([prepared], batch_size=BATCH_SIZE)
+        clock += time.perf_counter() - start
+        latencies.append(clock - arrival)
+    return latencies, clock - requests[0][0]
+
+
+def run_batched(pipeline, requests):
+    """新实现：第一个请求到达后等待窗口内的其他请求，一次解码所有请求"""
+    latencies = []
+    clock = requests[0][0]
+    for index in range(0, len(requests), MAX_BATCH):
+        batch = requests[index:index + MAX_BATCH]
+        # 批次满时立即开始，否则等到窗口结束
+        if len(batch) == MAX_BATCH:
+            clock = max(clock, batch[-1][0])
+        else:
+            clock = max(clock, batch[0][0] + WINDOW)
+        start = time.perf_counter()
+        prepared = [pipeline.prepare(audio, language="en", beam_size=BEAM_SIZE)[0]
+                    for _, audio in batch]
+        pipeline.decode(prepared, batch_size=BATCH_SIZE)
+        clock += time.perf_counter() - start
+        latencies.extend(clock - arrival for arrival, _ in batch)
+    return latencies, clock - requests[0][0]
+
+
+def bench(pipeline, audio, speakers):
+    rng = random.Random(speakers)
+    results = {}
+    for label, run in (("逐个解码", run_sequential), ("跨请求批量解码", run_batched)):
+        latencies = []
+        total = 0.0
+        for _ in range(ROUNDS):
+            round_latencies, elapsed = run(pipeline, make_requests(audio, speakers, rng))
+            latencies.extend(round_latencies)
+            total += elapsed
+        results[label] = (speakers * ROUNDS / total, statistics.mean(latencies), max(latencies))
+
+    print(f"\n{speakers} 个说话人同时说完:")
+    for label, (throughput, mean_latency, max_latency) in results.items():
+        print(f"  {label:<8} 吞吐 {throughput:6.2f} 句/秒  平均延迟 {mean_latency * 1000:7.1f} 毫秒  "
+              f"最大延迟 {max_latency * 1000:7.1f} 毫秒")
+    sequential, batched = results["逐个解码"], results["跨请求批量解码"]
+    print(f"  吞吐提升 {batched[0] / sequential[0]:.2f} 倍，平均延迟变化 "
+          f"{(batched[1] - sequential[1]) * 1000:+.1f} 毫秒（包含最多 {WINDOW * 1000:.0f} 毫秒的等待窗口）")
+
+
+if __name__ == "__main__":
+    device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    print(f"faster-whisper {faster_whisper.__version__}，模型 {MODEL}，设备 {device}，"
+          f"批量等待窗口 {WINDOW * 1000:.0f} 毫秒，每批最多 {MAX_BATCH} 个请求")
+    model = faster_whisper.WhisperModel(MODEL, device=device)
+    pipeline = MicroBatchPipeline(model=model)
+    audio, _ = sf.read(AUDIO_PATH, dtype="float32")
+
+    # 预热
+    pipeline.decode([pipeline.prepare(audio, language="en", beam_size=1)[0]])
+    for speakers in SPEAKERS:
+        bench(pipeline, audio, speakers)
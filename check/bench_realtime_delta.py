@@ -0,0 +1,85 @@
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.stt.transcript_delta import TranscriptDeltaEncoder
+
+# 实时转写每 0.3 秒更新一次，语速每秒 2.5 个词
+PASS_INTERVAL = 0.3
+WORDS_PER_SECOND = 2.5
+# 结尾几个词仍可能变化，每次更新有一半的概率被改写
+VOLATILE_WORDS = 3
+UTTERANCE_SECONDS = (5, 15, 30)
+
+ENGLISH_WORDS = ("the quick brown fox jumps over a lazy dog while we keep talking about "
+                 "realtime translation latency and bandwidth on every connected client").split()
+CHINESE_WORDS = ["我们", "正在", "测试", "实时", "翻译", "系统", "的", "延迟", "和", "带宽",
+                 "每个", "客户端", "都会", "收到", "更新", "句子", "越来越", "长"]
+
+
+def socketio_size(event, data):
+    """Socket.IO 文本帧的字节数（python-socketio 默认 json.dumps 会转义非 ASCII 字符）"""
+    return len(('42' + json.dumps([event, data])).encode('utf-8'))
+
+
+def apply_patch(text, patch):
+    """客户端应用补丁：keep 按 UTF-16 编码单元计算，与 JavaScript 一致"""
+    prefix = text.encode('utf-16-le')[:2 * patch['keep']].decode('utf-16-le')
+    return prefix + patch['text']
+
+
+def simulate(words, separator, seconds, rng):
+    """生成一个语句的实时更新序列：(文本, 已确认文本)"""
+    updates = []
+    passes = int(seconds / PASS_INTERVAL)
+    for index in range(1, passes + 1):
+        count = max(int(index * PASS_INTERVAL * WORDS_PER_SECOND), 1)
+        spoken = [words[i % len(words)] for i in range(count)]
+        stable_count = max(count - VOLATILE_WORDS, 0)
+        # 尾部的词可能被改写，结尾的标点也会变化
+        for i in range(stable_count, count):
+            if rng.random() < 0.5:
+                spoken[i] = rng.choice(words)
+        text = separator.join(spoken) + rng.choice(("", ".", "..."))
+        stable = separator.join(spoken[:stable_count])
+        if stable and separator:
+            stable += separator
+        updates.append((text, stable))
+    return updates
+
+
+def bench(label, words, separator, seconds):
+    rng = random.Random(0)
+    updates = simulate(words, separator, seconds, rng)
+    encoder = TranscriptDeltaEncoder()
+
+    full_bytes = 0
+    delta_bytes = 0
+    client_text = ''
+    for text, stable in updates:
+        # 完整文本：realtime 和 realtime_words 两个事件
+        full_bytes += socketio_size('realtime', {'type': 'realtime', 'text': text})
+        full_bytes += socketio_size('realtime_words', {'type': 'realtime_words', 'committed': stable,
+                                                       'tail': text[len(stable):]})
+        patch = encoder.encode(text, stable)
+        if patch is None:
+            continue
+        delta_bytes += socketio_size('realtime_delta', {'type': 'realtime_delta', **patch})
+        client_text = apply_patch(client_text, patch)
+        assert client_text == text
+
+    stats = encoder.get_stats()
+    print(f"  {label} {seconds:>2} 秒（{len(updates)} 次更新，最终 {len(updates[-1][0])} 个字符）: "
+          f"完整文本 {full_bytes / seconds:8.0f} 字节/秒  增量补丁 {delta_bytes / seconds:6.0f} 字节/秒  "
+          f"节省 {1 - delta_bytes / full_bytes:6.1%}  （文本字符节省 {stats['saved_ratio']:.1%}）")
+
+
+if __name__ == "__main__":
+    print("每个客户端接收的实时文本数据量:")
+    for seconds in UTTERANCE_SECONDS:
+        bench("英文", ENGLISH_WORDS, " ", seconds)
+    for seconds in UTTERANCE_SECONDS:
+        bench("中文", CHINESE_WORDS, "", seconds)
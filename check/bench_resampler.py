@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import signal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.stt.resampler import StreamingResampler
+
+TARGET_RATE = 16000
+DURATION_SECONDS = 10
+
+
+def make_test_signal(sample_rate, duration=DURATION_SECONDS):
+    """生成测试信号：多个正弦波叠加少量噪声（int16）"""
+    t = np.arange(int(sample_rate * duration)) / sample_rate
+    audio = (0.3 * np.sin(2 * np.pi * 220 * t)
+             + 0.2 * np.sin(2 * np.pi * 1250 * t)
+             + 0.1 * np.sin(2 * np.pi * 3400 * t))
+    audio += 0.01 * np.random.default_rng(0).standard_normal(len(t))
+    return (audio * 32767).astype(np.int16)
+
+
+def resample_fft_per_chunk(audio, sample_rate, chunk_size):
+    """旧实现：每个数据块单独用 FFT 重采样"""
+    output = []
+    for start in range(0, len(audio), chunk_size):
+        chunk = audio[start:start + chunk_size]
+        num_samples = int(len(chunk) * TARGET_RATE / sample_rate)
+        output.append(signal.resample(chunk, num_samples).astype(np.int16))
+    return np.concatenate(output)
+
+
+def resample_streaming(audio, sample_rate, chunk_size):
+    """新实现：流式多相重采样，保留块间滤波器状态"""
+    resampler = StreamingResampler(sample_rate, TARGET_RATE)
+    output = []
+    for start in range(0, len(audio), chunk_size):
+        output.append(resampler.process(audio[start:start + chunk_size]))
+    return np.concatenate(output)
+
+
+def reference(audio, sample_rate):
+    """参考结果：整段信号一次性用多相滤波重采样"""
+    return signal.resample_poly(audio.astype(np.float64), TARGET_RATE, sample_rate)
+
+
+def error_db(result, expected, delay):
+    """计算与参考结果的误差（相对信号能量，dB），delay 为滤波器群延迟"""
+    result = result.astype(np.float64)
+    n = min(len(result) - delay, len(expected))
+    # 去掉首尾各 0.1 秒，排除整段参考信号本身的边缘效应
+    margin = TARGET_RATE // 10
+    diff = result[delay + margin:delay + n - margin] - expected[margin:n - margin]
+    ref = expected[margin:n - margin]
+    return 10 * np.log10(np.sum(diff ** 2) / np.sum(ref ** 2) + 1e-20)
+
+
+def bench(sample_rate, chunk_size, repeat=3):
+    audio = make_test_signal(sample_rate)
+    expected = reference(audio, sample_rate)
+
+    results = {}
+    for name, func in (("scipy.signal.resample", resample_fft_per_chunk),
+                       ("StreamingResampler", resample_streaming)):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = func(audio, sample_rate, chunk_size)
+            best = min(best, time.perf_counter() - start)
+        results[name] = (best, output)
+
+    # 流式重采样是因果的，相对零相位参考有固定的群延迟（滤波器半长，换算为输出采样数）
+    divisor = np.gcd(sample_rate, TARGET_RATE)
+    up, down = TARGET_RATE // divisor, sample_rate // divisor
+    delay = 10 * max(up, down) // down
+
+    print(f"\n{sample_rate} Hz -> {TARGET_RATE} Hz, 每块 {chunk_size} 个采样:")
+    for name, (elapsed, output) in results.items():
+        chunk_ms = elapsed / (len(audio) / chunk_size) * 1e6
+        shift = delay if name == "StreamingResampler" else 0
+        print(f"  {name:<22} 总耗时 {elapsed * 1000:8.1f} ms  "
+              f"每块 {chunk_ms:7.1f} us  "
+              f"误差 {error_db(output, expected, shift):7.1f} dB")
+
+
+if __name__ == "__main__":
+    print(f"测试信号时长: {DURATION_SECONDS} 秒")
+    for rate in (44100, 48000):
+        for chunk in (128, 1024):
+            bench(rate, chunk)
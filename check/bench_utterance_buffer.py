@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.stt.utterance_buffer import UtteranceBuffer, INT16_MAX_ABS_VALUE
+
+SAMPLE_RATE = 16000
+CHUNK_SAMPLES = 512
+# 实时转写每 0.2 秒取一次完整的语音
+PASS_INTERVAL = 0.2
+UTTERANCE_SECONDS = (5, 15, 30)
+
+
+def make_chunks(seconds):
+    """生成 32ms 的 16 位 PCM 数据块"""
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 3000).astype(np.int16)
+    return [audio[i:i + CHUNK_SAMPLES].tobytes()
+            for i in range(0, len(audio), CHUNK_SAMPLES)]
+
+
+def run_join(chunks, chunks_per_pass):
+    """旧实现：帧列表，每次取音频都用 b''.join 拼接再转换为 float32"""
+    frames = []
+    copied = 0
+    snapshot = None
+    for index, chunk in enumerate(chunks, 1):
+        frames.append(chunk)
+        if index % chunks_per_pass == 0:
+            joined = b''.join(frames)
+            pcm = np.frombuffer(joined, dtype=np.int16)
+            snapshot = pcm.astype(np.float32) / INT16_MAX_ABS_VALUE
+            # 拼接 2 字节 + astype 4 字节 + 除法 4 字节
+            copied += len(pcm) * 10
+    return copied, snapshot
+
+
+def run_buffer(chunks, chunks_per_pass):
+    """新实现：预分配的语音缓冲，追加时转换一次，取音频为 O(1) 视图"""
+    buffer = UtteranceBuffer()
+    snapshot = None
+    for index, chunk in enumerate(chunks, 1):
+        buffer.append(chunk)
+        if index % chunks_per_pass == 0:
+            snapshot = buffer.float32()
+    return buffer.bytes_copied, snapshot
+
+
+def bench(seconds):
+    chunks = make_chunks(seconds)
+    chunks_per_pass = round(PASS_INTERVAL * SAMPLE_RATE / CHUNK_SAMPLES)
+
+    print(f"\n语音时长 {seconds} 秒（{len(chunks)} 个数据块，每 {chunks_per_pass} 块取一次音频）:")
+    results = {}
+    for label, run in (("b''.join + astype", run_join), ("UtteranceBuffer", run_buffer)):
+        start = time.perf_counter()
+        copied, snapshot = run(chunks, chunks_per_pass)
+        elapsed = time.perf_counter() - start
+        results[label] = snapshot
+        print(f"  {label:<18} 复制 {copied / 1e6:8.2f} MB（每秒语音 {copied / seconds / 1e6:6.2f} MB）  "
+              f"耗时 {elapsed * 1000:7.2f} ms")
+
+    join_audio, buffer_audio = results.values()
+    assert np.array_equal(join_audio, buffer_audio[:len(join_audio)])
+
+
+if __name__ == "__main__":
+    for seconds in UTTERANCE_SECONDS:
+        bench(seconds)
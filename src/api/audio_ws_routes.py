@@ -0,0 +1,283 @@
+"""
+原始音频 WebSocket 接口模块。
+为硬件编码器、SIP 网关等非浏览器音频源提供二进制 WebSocket 接口（/ws/audio），
+客户端发送一个简短的音频格式头后直接发送原始 PCM 帧，
+转写结果以紧凑的 JSON 文本消息返回。
+音频与浏览器一样进入每个连接的音频接收线程，再送入 STT 服务。
+"""
+
+import json
+import logging
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from flask import Blueprint, Response, request
+from simple_websocket import Server, ConnectionClosed
+
+from src.utils.stt.resampler import COMMON_SAMPLE_RATES
+
+# 创建蓝图
+audio_ws_bp = Blueprint('audio_ws', __name__)
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+# 全局的音频接收管理器实例
+audio_ingest_manager = None
+# 返回当前 STT 服务实例的函数（服务可能被健康检查重新创建，用于获取实时文本的完整状态）
+get_stt_service = None
+
+# 已连接的 WebSocket 客户端
+ws_clients: List['_AudioSocket'] = []
+ws_clients_lock = threading.Lock()
+
+# 支持的 PCM 格式：格式名 -> numpy 采样类型
+PCM_FORMATS = {
+    's16le': np.dtype('<i2'),
+    'f32le': np.dtype('<f4'),
+}
+
+# 实时文本的接收方式：full 为完整文本事件（realtime、realtime_words），delta 为增量补丁（realtime_delta）
+TRANSCRIPT_MODES = ('full', 'delta')
+
+# 只发送给对应接收方式客户端的事件
+FULL_TEXT_EVENTS = ('realtime', 'realtime_words')
+DELTA_EVENTS = ('realtime_delta',)
+
+# 默认音频格式（未发送格式头时使用）
+DEFAULT_HEADER = {'sample_rate': 16000, 'channels': 1, 'format': 's16le', 'transcript': 'full'}
+
+# 允许的声道数范围（采样率只允许 COMMON_SAMPLE_RATES 中的常见值）
+MAX_CHANNELS = 8
+
+# 单个消息大小上限（与 Socket.IO 音频数据包相同，1MB）
+MAX_MESSAGE_SIZE = 1 << 20
+
+
+class _AudioSocket:
+    """一个 WebSocket 连接：接收线程读取音频，结果由 STT 回调线程发送"""
+
+    def __init__(self, ws: Server, session_id: str):
+        self.ws = ws
+        self.session_id = session_id
+        self.transcript = DEFAULT_HEADER['transcript']
+        self._send_lock = threading.Lock()
+
+    def send_json(self, data: Dict[str, Any]) -> bool:
+        """发送一条紧凑的 JSON 消息，连接已关闭时返回 False"""
+        message = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        try:
+            with self._send_lock:
+                self.ws.send(message)
+            return True
+        except (ConnectionClosed, OSError):
+            return False
+
+
+def init_routes(app, _audio_ingest_manager, _get_stt_service=None):
+    """
+    初始化路由
+
+    Args:
+        app: Flask应用实例
+        _audio_ingest_manager: 音频接收管理器实例（与浏览器连接共用）
+        _get_stt_service: 返回当前 STT 服务实例的函数，客户端选择增量补丁时从中获取当前语句的完整状态
+    """
+    global audio_ingest_manager, get_stt_service
+    audio_ingest_manager = _audio_ingest_manager
+    get_stt_service = _get_stt_service
+
+    # 注册蓝图
+    app.register_blueprint(audio_ws_bp, url_prefix='/ws')
+    logger.info("已初始化原始音频 WebSocket 路由: /ws/audio")
+
+
+def parse_header(values: Dict[str, Any], current: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    解析并校验音频格式头
+
+    Args:
+        values: 格式头字段（sample_rate、channels、format、transcript），缺少的字段沿用当前值
+        current: 当前格式，为 None 时使用默认格式
+
+    Returns:
+        完整的格式头
+
+    Raises:
+        ValueError: 字段无效
+    """
+    header = dict(current or DEFAULT_HEADER)
+    if 'sample_rate' in values:
+        header['sample_rate'] = int(values['sample_rate'])
+    if 'channels' in values:
+        header['channels'] = int(values['channels'])
+    if 'format' in values:
+        header['format'] = str(values['format']).lower()
+    if 'transcript' in values:
+        header['transcript'] = str(values['transcript']).lower()
+
+    if header['sample_rate'] not in COMMON_SAMPLE_RATES:
+        raise ValueError(f"不支持的采样率: {header['sample_rate']}"
+                         f"（支持 {', '.join(map(str, COMMON_SAMPLE_RATES))}）")
+    if not 1 <= header['channels'] <= MAX_CHANNELS:
+        raise ValueError(f"不支持的声道数: {header['channels']}")
+    if header['format'] not in PCM_FORMATS:
+        raise ValueError(f"不支持的音频格式: {header['format']}（支持 {', '.join(PCM_FORMATS)}）")
+    if header['transcript'] not in TRANSCRIPT_MODES:
+        raise ValueError(f"不支持的实时文本接收方式: {header['transcript']}（支持 {', '.join(TRANSCRIPT_MODES)}）")
+    return header
+
+
+def to_mono_pcm16(data: bytes, header: Dict[str, Any]):
+    """
+    将一帧原始 PCM 转换为单声道 16 位 PCM
+
+    单声道 s16le 直接包装为 memoryview 不做复制；多声道取平均值混为单声道，
+    32 位浮点数转换为 16 位整数。不完整的末尾采样帧会被丢弃。
+    """
+    dtype = PCM_FORMATS[header['format']]
+    channels = header['channels']
+    frame_bytes = dtype.itemsize * channels
+    usable = len(data) - len(data) % frame_bytes
+
+    if header['format'] == 's16le' and channels == 1:
+        return memoryview(data)[:usable]
+
+    samples = np.frombuffer(data, dtype=dtype, count=usable // dtype.itemsize)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if dtype.kind == 'f':
+        samples = samples * 32768.0
+    return memoryview(np.clip(samples, -32768, 32767).astype(np.int16)).cast('B')
+
+
+def broadcast_result(event_type: str, text: Optional[str] = None, **fields: Any):
+    """
+    向所有 WebSocket 客户端发送转写结果
+
+    Args:
+        event_type: 'realtime'（实时文本）、'fullSentence'（完整句子）、
+                    'realtime_words'（已确认文本和尾部）、'realtime_delta'（增量补丁）或
+                    'fullSentenceCorrection'（完整句子修正），与 Socket.IO 事件名一致
+        text: 文本
+        fields: 其他字段（如 committed、tail，补丁的 utterance、rev、keep 或修正的 original）
+    """
+    message = {'type': event_type, **fields}
+    if text is not None:
+        message['text'] = text
+    with ws_clients_lock:
+        clients = list(ws_clients)
+    for client in clients:
+        if event_type in FULL_TEXT_EVENTS and client.transcript != 'full':
+            continue
+        if event_type in DELTA_EVENTS and client.transcript != 'delta':
+            continue
+        client.send_json(message)
+
+
+def _set_transcript_mode(client: _AudioSocket, mode: str):
+    """
+    设置客户端的实时文本接收方式，使用增量补丁时发送当前语句的完整状态
+
+    先切换再取状态：切换前已生成的补丁修订号不大于完整状态的修订号，客户端会忽略它们
+    """
+    client.transcript = mode
+    stt_service = get_stt_service() if get_stt_service else None
+    if mode == 'delta' and stt_service is not None:
+        client.send_json({'type': 'realtime_delta', **stt_service.get_realtime_snapshot()})
+
+
+def _websocket_response(ws: Server) -> Response:
+    """WebSocket 会话结束后返回给 WSGI 服务器的响应（握手已由 simple_websocket 完成）"""
+
+    class WebSocketResponse(Response):
+        def __call__(self, *args, **kwargs):
+            if ws.mode == 'werkzeug':
+                return super().__call__(*args, **kwargs)
+            if ws.mode == 'gunicorn':
+                raise StopIteration()
+            return []
+
+    return WebSocketResponse()
+
+
+@audio_ws_bp.route('/audio', websocket=True)
+def audio_socket():
+    """
+    原始 PCM 音频 WebSocket 接口
+
+    协议：
+        1. 格式头：连接 URL 的查询参数（?sample_rate=48000&channels=2&format=s16le），
+           或任意时刻发送的 JSON 文本消息 {"sample_rate": 48000, "channels": 2, "format": "f32le"}；
+           都未提供时按 16kHz 单声道 s16le 处理
+        2. 音频：二进制消息，内容为交错排列的原始 PCM 帧，大小不限（最大 1MB）
+        3. 结果：服务器发送 JSON 文本消息
+           {"type":"ready","sample_rate":...}、{"type":"realtime","text":...}、
+           {"type":"fullSentence","text":...,"utterance":...}、{"type":"realtime_words","committed":...,"tail":...}、
+           {"type":"fullSentenceCorrection","text":...,"original":...}（快速定稿的句子被主模型修正）、
+           {"type":"error","message":...}
+        4. 增量补丁：格式头中 transcript=delta 时不再发送 realtime 和 realtime_words，改为发送
+           {"type":"realtime_delta","utterance":...,"rev":...,"keep":...,"text":...[,"stable":...]}，
+           新文本为上一版本的前 keep 个 UTF-16 编码单元加上 text；
+           带 "full":true 的补丁为当前语句的完整状态，选择 delta 时首先发送，
+           发现修订号不连续时可以再次发送 {"transcript":"delta"} 请求完整状态；
+           多个语句可能同时在转写，fullSentence 的 utterance 指明它结束的是哪个语句
+    """
+    try:
+        header = parse_header(request.args)
+    except ValueError as e:
+        return Response(str(e), status=400)
+
+    ws = Server(request.environ, max_message_size=MAX_MESSAGE_SIZE)
+    session_id = f"ws-{uuid.uuid4().hex[:12]}"
+    client = _AudioSocket(ws, session_id)
+    logger.info(f"原始音频 WebSocket 客户端已连接: {session_id} ({request.remote_addr})")
+
+    with ws_clients_lock:
+        ws_clients.append(client)
+    audio_ingest_manager.open_session(session_id)
+    client.send_json({'type': 'ready', 'session': session_id, **header})
+    if header['transcript'] != 'full':
+        _set_transcript_mode(client, header['transcript'])
+
+    try:
+        while True:
+            message = ws.receive()
+            if message is None:
+                continue
+
+            if isinstance(message, str):
+                # 文本消息为新的格式头
+                try:
+                    values = json.loads(message)
+                    header = parse_header(values, header)
+                    client.send_json({'type': 'ready', 'session': session_id, **header})
+                    if 'transcript' in values:
+                        _set_transcript_mode(client, header['transcript'])
+                except (ValueError, TypeError, AttributeError) as e:
+                    client.send_json({'type': 'error', 'message': f"无效的格式头: {e}"})
+                continue
+
+            audio_data = to_mono_pcm16(message, header)
+            if len(audio_data):
+                # TCP 保证顺序，不需要序列号和抖动缓冲
+                audio_ingest_manager.submit(session_id, audio_data, header['sample_rate'])
+    except ConnectionClosed:
+        pass
+    except Exception as e:
+        logger.error(f"处理原始音频 WebSocket 数据错误: {e}", exc_info=True)
+        client.send_json({'type': 'error', 'message': str(e)})
+    finally:
+        with ws_clients_lock:
+            if client in ws_clients:
+                ws_clients.remove(client)
+        audio_ingest_manager.close_session(session_id)
+        try:
+            ws.close()
+        except Exception:
+            pass
+        logger.info(f"原始音频 WebSocket 客户端已断开: {session_id}")
+
+    return _websocket_response(ws)
@@ -49,6 +49,13 @@ def init_routes(app, _realtime_handler, _socketio=None):
         realtime_handler.register_callback('on_realtime_translation', _handle_realtime_translation)
         realtime_handler.register_callback('on_final_translation', _handle_final_translation)
         realtime_handler.register_callback('on_error', _handle_error)
+
+        # 转写结果只发送给通过 transcript 参数订阅的SSE客户端
+        # 通过处理器注册，STT服务被重新创建后回调随处理器转到新实例
+        realtime_handler.register_stt_callback('on_interim_result', _handle_interim_result)
+        realtime_handler.register_stt_callback('on_realtime_delta', _handle_realtime_delta)
+        realtime_handler.register_stt_callback('on_final_result', _handle_final_result)
+        realtime_handler.register_stt_callback('on_final_correction', _handle_final_correction)
         
         logger.info("已初始化翻译API路由")
     else:
@@ -66,6 +73,41 @@ def _handle_error(data: Dict[str, Any]):
     """处理错误，发送到所有SSE客户端"""
     _broadcast_event('error_event', data)
 
+def _handle_interim_result(data: Dict[str, Any]):
+    """处理实时转写文本，发送完整文本给订阅 full 的SSE客户端"""
+    _broadcast_transcript_event('realtime', {'text': data['text']}, 'full')
+
+def _handle_realtime_delta(data: Dict[str, Any]):
+    """处理实时转写增量补丁，发送给订阅 delta 的SSE客户端"""
+    _broadcast_transcript_event('realtime_delta', data, 'delta')
+
+def _handle_final_result(data: Dict[str, Any]):
+    """处理完整句子，发送给所有订阅转写结果的SSE客户端"""
+    _broadcast_transcript_event('fullSentence', {'text': data['text'], 'utterance': data.get('utterance')})
+
+def _handle_final_correction(data: Dict[str, Any]):
+    """处理完整句子修正，发送给所有订阅转写结果的SSE客户端"""
+    _broadcast_transcript_event('fullSentenceCorrection', {'text': data['text'], 'original': data['original']})
+
+def _format_sse(event_type: str, data: Dict[str, Any]) -> str:
+    """生成SSE格式的消息"""
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+def _broadcast_transcript_event(event_type: str, data: Dict[str, Any], mode: Optional[str] = None):
+    """
+    向订阅转写结果的SSE客户端广播事件
+
+    Args:
+        event_type: 事件类型
+        data: 事件数据
+        mode: 只发送给该接收方式（full 或 delta）的客户端，为 None 时发送给所有订阅的客户端
+    """
+    message = _format_sse(event_type, data)
+    for client in list(sse_clients):
+        transcript = client.get('transcript')
+        if transcript and (mode is None or transcript == mode):
+            client['queue'].put(message)
+
 def _broadcast_event(event_type: str, data: Dict[str, Any]):
     """
     向所有SSE客户端广播事件
@@ -297,8 +339,21 @@ def get_translation_languages():
 # 路由：获取SSE事件流
 @translation_bp.route('/stream', methods=['GET'])
 def stream():
-    """提供SSE实时事件流接口"""
+    """
+    提供SSE实时事件流接口
+
+    查询参数 transcript 订阅转写结果：full 接收完整的实时文本（realtime），
+    delta 接收增量补丁（realtime_delta，首先发送带 full 标记的当前语句完整状态），
+    两者都会接收完整句子（fullSentence）和完整句子修正（fullSentenceCorrection）；未提供时只接收翻译事件
+    """
     import queue
+
+    transcript = request.args.get('transcript')
+    if transcript not in (None, 'full', 'delta'):
+        return jsonify({
+            'success': False,
+            'error': f"不支持的转写结果接收方式: {transcript}"
+        }), 400
     
     def event_stream():
         """SSE事件流生成器"""
@@ -308,7 +363,8 @@ def stream():
         # 创建客户端对象
         client = {
             'id': time.time(),
-            'queue': client_queue
+            'queue': client_queue,
+            'transcript': transcript
         }
         
         # 添加到客户端列表
@@ -317,6 +373,10 @@ def stream():
         
         # 发送连接成功消息
         client_queue.put(f"event: connected\ndata: {json.dumps({'success': True})}\n\n")
+
+        # 增量补丁的起点：先加入客户端列表再取状态，之前生成的补丁修订号不会大于该状态
+        if transcript == 'delta' and realtime_handler:
+            client_queue.put(_format_sse('realtime_delta', realtime_handler.stt_service.get_realtime_snapshot()))
         
         try:
             # 循环发送事件
@@ -10,7 +10,7 @@ import psutil
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 import threading
 import base64
 import random
@@ -110,34 +110,77 @@ socketio = SocketIO(
 
 # 导入STT服务和翻译服务
 from src.services.stt.stt_service import STTService
+from src.services.stt.audio_ingest import AudioIngestManager
+from src.services.stt.audio_decoder import CODEC_PCM, negotiate_codec
 from src.services.translation.translation_manager import TranslationManager
 from src.services.realtime_handler import RealtimeHandler  # 导入实时处理器
 from src.api.translation_routes import init_routes as init_translation_routes  # 导入翻译API路由初始化函数
+from src.api.audio_ws_routes import init_routes as init_audio_ws_routes, broadcast_result as broadcast_ws_result  # 原始音频 WebSocket 接口
 
 # 全局变量
 stt_service = None
 translation_manager = None
 realtime_handler = None  # 添加实时处理器实例
+audio_ingest_manager = None  # 每个连接的音频接收线程管理器
+
+# 实时文本的接收方式：未声明支持增量补丁的客户端接收完整文本事件（兼容旧客户端），
+# 声明支持的客户端只接收 realtime_delta 补丁
+REALTIME_FULL_ROOM = 'realtime_full'
+REALTIME_DELTA_ROOM = 'realtime_delta'
 
 # STT 服务回调函数
 def realtime_text_callback(text):
     """实时文本回调"""
     try:
-        socketio.emit('realtime', {'type': 'realtime', 'text': text})
+        socketio.emit('realtime', {'type': 'realtime', 'text': text}, to=REALTIME_FULL_ROOM)
+        broadcast_ws_result('realtime', text)
         app_logger.debug(f"实时文本: {text}")  # 使用 debug 级别避免日志过多
     except Exception as e:
         app_logger.error(f"发送实时文本时出错: {e}")
 
 
+def realtime_words_callback(result):
+    """按词稳定的实时文本回调：已确认的文本和仍可能变化的尾部分开发送"""
+    try:
+        socketio.emit('realtime_words', {'type': 'realtime_words',
+                                         'committed': result['committed'], 'tail': result['tail']},
+                      to=REALTIME_FULL_ROOM)
+        broadcast_ws_result('realtime_words', committed=result['committed'], tail=result['tail'])
+    except Exception as e:
+        app_logger.error(f"发送按词稳定的实时文本时出错: {e}")
+
+
+def realtime_delta_callback(patch):
+    """实时文本增量回调：只发送与上一版本不同的后缀，已确认文本的长度通过 stable 字段发送"""
+    try:
+        socketio.emit('realtime_delta', {'type': 'realtime_delta', **patch}, to=REALTIME_DELTA_ROOM)
+        broadcast_ws_result('realtime_delta', **patch)
+    except Exception as e:
+        app_logger.error(f"发送实时文本增量时出错: {e}")
+
+
 def full_sentence_callback(text):
-    """完整句子回调"""
+    """完整句子回调，utterance 为句子所属的语句编号（与 realtime_delta 补丁一致）"""
     try:
-        socketio.emit('fullSentence', {'type': 'fullSentence', 'text': text})
+        utterance = stt_service.finished_utterance if stt_service else None
+        socketio.emit('fullSentence', {'type': 'fullSentence', 'text': text, 'utterance': utterance})
+        broadcast_ws_result('fullSentence', text, utterance=utterance)
         app_logger.info(f"完整句子: {text}")  # 使用 info 级别记录完整句子
     except Exception as e:
         app_logger.error(f"发送完整句子时出错: {e}")
 
 
+def full_sentence_correction_callback(result):
+    """完整句子修正回调：快速定稿的句子经主模型复核后文本不同，original 为之前发送的句子"""
+    try:
+        socketio.emit('fullSentenceCorrection', {'type': 'fullSentenceCorrection',
+                                                 'text': result['text'], 'original': result['original']})
+        broadcast_ws_result('fullSentenceCorrection', result['text'], original=result['original'])
+        app_logger.info(f"完整句子修正: {result['original']} -> {result['text']}")
+    except Exception as e:
+        app_logger.error(f"发送完整句子修正时出错: {e}")
+
+
 def create_stt_service():
     """创建并初始化STT服务"""
     global stt_service
@@ -145,6 +188,13 @@ def create_stt_service():
         app_logger.info("初始化STT服务...")
         stt_service = STTService(full_sentence_callback=full_sentence_callback, 
                                 realtime_callback=realtime_text_callback)
+        stt_service.register_callback('on_realtime_words', realtime_words_callback)
+        stt_service.register_callback('on_realtime_delta', realtime_delta_callback)
+        stt_service.register_callback('on_final_correction', full_sentence_correction_callback)
+    return stt_service
+
+def get_stt_service():
+    """返回当前的STT服务（健康检查可能重新创建服务，模块不能只保存创建时的实例）"""
     return stt_service
 
 def create_translation_manager():
@@ -194,6 +244,30 @@ def create_realtime_handler():
     
     return realtime_handler
 
+def create_audio_ingest_manager():
+    """创建每个连接的音频接收线程管理器"""
+    global audio_ingest_manager
+    if audio_ingest_manager is None:
+        queue_size = 200
+        jitter_window_ms = 60
+        jitter_max_conceal_ms = 100
+        if stt_service:
+            queue_size = stt_service.current_config.get('audio_ingest_queue_size', queue_size)
+            jitter_window_ms = stt_service.current_config.get('jitter_buffer_window_ms', jitter_window_ms)
+            jitter_max_conceal_ms = stt_service.current_config.get('jitter_buffer_max_conceal_ms',
+                                                                   jitter_max_conceal_ms)
+        app_logger.info(f"初始化音频接收管理器，队列长度: {queue_size}，"
+                        f"抖动缓冲窗口: {jitter_window_ms}ms，静音填补上限: {jitter_max_conceal_ms}ms")
+        audio_ingest_manager = AudioIngestManager(
+            feed_func=feed_stt_audio,
+            max_queue_size=queue_size,
+            on_feed_failure=handle_audio_feed_failure,
+            jitter_window_ms=jitter_window_ms,
+            jitter_max_conceal_ms=jitter_max_conceal_ms,
+            on_stream_error=handle_audio_stream_error
+        )
+    return audio_ingest_manager
+
 # 主页路由
 @app.route('/')
 def index():
@@ -207,16 +281,40 @@ def restart_page():
 
 # Socket.IO 事件：连接
 @socketio.on('connect')
-def handle_connect():
+def handle_connect(auth=None):
     app_logger.info('客户端已连接')
+    if audio_ingest_manager:
+        audio_ingest_manager.open_session(request.sid)
     emit('config', stt_service.get_serializable_config())
     emit('recorder_status', {'ready': stt_service.is_ready()})
 
+    # 协商音频上传编码：客户端在连接时通过 auth 声明支持的编码
+    client_codecs = auth.get('audioCodecs', []) if isinstance(auth, dict) else []
+    preferred_codec = stt_service.current_config.get('audio_uplink_codec', CODEC_PCM)
+    codec = negotiate_codec(preferred_codec, client_codecs)
+    app_logger.info(f"音频上传编码: {codec}（客户端支持: {client_codecs}）")
+    emit('audio_codec', {'codec': codec})
+
+    # 客户端在连接时通过 auth 声明是否支持实时文本增量补丁，支持时先发送当前语句的完整状态
+    if isinstance(auth, dict) and auth.get('transcriptDelta'):
+        join_room(REALTIME_DELTA_ROOM)
+        emit('realtime_delta', {'type': 'realtime_delta', **stt_service.get_realtime_snapshot()})
+    else:
+        join_room(REALTIME_FULL_ROOM)
+
+
+# Socket.IO 事件：客户端发现补丁的修订号不连续时请求当前语句的完整状态
+@socketio.on('realtime_resync')
+def handle_realtime_resync():
+    emit('realtime_delta', {'type': 'realtime_delta', **stt_service.get_realtime_snapshot()})
+
 
 # Socket.IO 事件：断开连接
 @socketio.on('disconnect')
 def handle_disconnect():
     app_logger.info('客户端已断开连接')
+    if audio_ingest_manager:
+        audio_ingest_manager.close_session(request.sid)
 
 
 # Socket.IO 事件：获取配置
@@ -357,50 +455,88 @@ def handle_reset_to_default():
 last_recorder_status_time = 0
 RECORDER_STATUS_DEBOUNCE_TIME = 3  # 3秒内不重复发送相同状态
 
+
+def decode_audio_payload(audio):
+    """
+    将客户端发送的音频负载转换为 memoryview
+
+    新版客户端以 Socket.IO 二进制附件发送 PCM 数据，直接包装为 memoryview 不做复制；
+    旧版客户端发送 base64 字符串，仍按原方式解码。
+    """
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        return memoryview(audio)
+    return memoryview(base64.b64decode(audio))
+
+
+def feed_stt_audio(audio_data, sample_rate, resampler=None):
+    """将音频送入当前的STT服务（服务可能被健康检查重新创建）"""
+    return stt_service.feed_audio(audio_data, sample_rate, resampler=resampler)
+
+
+def handle_audio_feed_failure(session_id, error):
+    """音频送入失败时通知客户端（防抖）"""
+    global last_recorder_status_time
+    current_time = time.time()
+    # 检查是否需要发送状态消息（防抖）
+    if current_time - last_recorder_status_time >= RECORDER_STATUS_DEBOUNCE_TIME:
+        if error:
+            app_logger.error(f"音频处理错误: {error}")
+        else:
+            app_logger.warning("录音机未就绪，忽略接收到的音频数据")
+        socketio.emit('recorder_status', {'ready': False})
+        last_recorder_status_time = current_time
+
+
+def handle_audio_stream_error(session_id, codec):
+    """压缩上传的字节流中断后无法恢复，通知该客户端改用 PCM 上传"""
+    app_logger.warning(f"客户端 {session_id} 的 {codec} 上传流已中断，改用 PCM 上传")
+    socketio.emit('audio_codec', {'codec': CODEC_PCM}, to=session_id)
+
+
 # Socket.IO 事件：接收音频数据
 @socketio.on('audio_data')
 def handle_audio_data(data):
-    global last_recorder_status_time
-    
     try:
         # 检查数据大小
         if len(data['audio']) > 1e6:  # 限制单个数据包大小为1MB
             app_logger.warning("音频数据包过大，已跳过")
             return
 
-        # 解析数据
-        audio_data = base64.b64decode(data['audio'])
+        # 解析数据（二进制附件或旧版 base64）
+        audio_data = decode_audio_payload(data['audio'])
         sample_rate = data['sampleRate']
 
-        # 使用线程处理音频数据
-        def process_audio():
-            global last_recorder_status_time
-            try:
-                success = stt_service.feed_audio(audio_data, sample_rate)
-                if not success:
-                    current_time = time.time()
-                    # 检查是否需要发送状态消息（防抖）
-                    if current_time - last_recorder_status_time >= RECORDER_STATUS_DEBOUNCE_TIME:
-                        app_logger.warning("录音机未就绪，忽略接收到的音频数据")
-                        socketio.emit('recorder_status', {'ready': False})
-                        last_recorder_status_time = current_time
-            except Exception as e:
-                current_time = time.time()
-                # 检查是否需要发送状态消息（防抖）
-                if current_time - last_recorder_status_time >= RECORDER_STATUS_DEBOUNCE_TIME:
-                    app_logger.error(f"音频处理错误: {e}")
-                    socketio.emit('recorder_status', {'ready': False})
-                    last_recorder_status_time = current_time
-
-        thread = threading.Thread(target=process_audio)
-        thread.daemon = True
-        thread.start()
+        # 放入该连接的接收队列，由长期运行的接收线程按序列号排序后送入录音机
+        # （旧版客户端没有序列号，按到达顺序送入）
+        # 压缩上传的数据包带有编码和时长，由接收线程按顺序解码
+        codec = data.get('codec')
+        create_audio_ingest_manager().submit(
+            request.sid, audio_data, sample_rate,
+            seq=data.get('seq'),
+            capture_ts=data.get('ts'),
+            codec=codec if codec != CODEC_PCM else None,
+            duration_ms=data.get('duration')
+        )
 
     except Exception as e:
         app_logger.error(f"处理音频数据错误: {e}", exc_info=True)
         emit('recorder_status', {'ready': False})
 
 
+# Socket.IO 事件：客户端静音门限跳过的静音时长
+@socketio.on('audio_silence')
+def handle_audio_silence(data):
+    try:
+        # 静音标记与音频数据包共用序列号，由接收线程排序后展开为静音送入录音机
+        create_audio_ingest_manager().submit_silence(
+            request.sid, data['duration'],
+            seq=data.get('seq'),
+            capture_ts=data.get('ts')
+        )
+    except Exception as e:
+        app_logger.error(f"处理静音标记错误: {e}", exc_info=True)
+
+
 def monitor_resources():
     """监控系统资源使用情况"""
     last_warning_time = 0  # 上次警告时间
@@ -480,6 +616,22 @@ def send_performance_metrics():
                 'timestamp': time.time()
             }
 
+            # 音频接收队列指标（队列深度、丢弃数、入队到送入的延迟）
+            if audio_ingest_manager:
+                metrics['audio_ingest'] = audio_ingest_manager.get_stats()
+
+            # Silero VAD 推理延迟（实时率大于 1 表示 VAD 跟不上实时音频）
+            if stt_service:
+                metrics['vad'] = stt_service.get_vad_stats()
+
+            # 实时转写每次解码的音频时长和实时率
+            if stt_service:
+                metrics['realtime'] = stt_service.get_realtime_stats()
+
+            # 主模型转写工作池的利用率和排队等待时间
+            if stt_service:
+                metrics['transcription'] = stt_service.get_transcription_stats()
+
             # 发送到客户端
             socketio.emit('performance_metrics', metrics)
 
@@ -519,8 +671,12 @@ def check_service_health():
                         if stt_service:
                             stt_service.shutdown()
 
-                        # 重新创建服务
+                        # 重新创建服务（create_stt_service 只在实例不存在时创建）
+                        stt_service = None
                         stt_service = create_stt_service()
+                        # 实时处理器（及通过它注册的SSE回调）转到新的服务实例
+                        if realtime_handler:
+                            realtime_handler.set_stt_service(stt_service)
                         app_logger.info("STT 服务已重新初始化")
 
                         # 重置失败计数
@@ -1141,12 +1297,14 @@ def main():
         stt_service = create_stt_service()
         translation_manager = create_translation_manager()
         realtime_handler = create_realtime_handler()  # 初始化实时处理器
+        create_audio_ingest_manager()  # 初始化音频接收管理器
         
         # 更新日志配置
         update_app_log_settings(stt_service)
         
         # 初始化API路由
         init_translation_routes(app, realtime_handler, socketio)  # 注册翻译API路由，传递socketio实例
+        init_audio_ws_routes(app, audio_ingest_manager, get_stt_service)  # 注册原始音频 WebSocket 接口
         
         # 启动资源监控
         resource_monitor_thread = threading.Thread(target=monitor_resources, daemon=True)
@@ -1156,6 +1314,10 @@ def main():
         health_check_thread = threading.Thread(target=check_service_health, daemon=True)
         health_check_thread.start()
         
+        # 启动性能指标推送
+        metrics_thread = threading.Thread(target=send_performance_metrics, daemon=True)
+        metrics_thread.start()
+        
         # 启动Web服务器
         port = 5000
         app_logger.info(f"启动Web服务器，端口: {port}")
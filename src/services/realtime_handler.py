@@ -35,6 +35,9 @@ class RealtimeHandler:
         
         # STT回调注册标志
         self._stt_callbacks_registered = False
+
+        # 其他模块通过处理器注册的STT回调 [(事件类型, 回调函数)]，更换STT服务时转到新实例
+        self._forwarded_stt_callbacks = []
         
         # 当前会话状态 - 始终为活跃状态
         self.session_active = True
@@ -81,6 +84,42 @@ class RealtimeHandler:
             logger.error(f"无法取消注册: 回调函数未找到")
             return False
             
+    def register_stt_callback(self, event_type: str, callback: Callable) -> bool:
+        """
+        注册STT服务的回调函数，STT服务被重新创建后回调仍然有效
+
+        Args:
+            event_type: STT服务的事件类型
+            callback: 回调函数
+
+        Returns:
+            是否成功注册
+        """
+        if not self.stt_service.register_callback(event_type, callback):
+            return False
+        self._forwarded_stt_callbacks.append((event_type, callback))
+        return True
+
+    def set_stt_service(self, stt_service):
+        """
+        更换STT服务实例（服务被重新创建后调用），处理器和通过它注册的回调都转到新实例
+
+        Args:
+            stt_service: 新的STT服务实例
+        """
+        registered = self._stt_callbacks_registered
+        self._unregister_stt_callbacks()
+        for event_type, callback in self._forwarded_stt_callbacks:
+            self.stt_service.unregister_callback(event_type, callback)
+
+        self.stt_service = stt_service
+
+        if registered:
+            self._register_stt_callbacks()
+        for event_type, callback in self._forwarded_stt_callbacks:
+            self.stt_service.register_callback(event_type, callback)
+        logger.info("实时处理器已切换到新的STT服务")
+
     def _register_stt_callbacks(self):
         """注册STT服务的回调函数"""
         if not self._stt_callbacks_registered:
@@ -2,4 +2,6 @@
 语音转文本服务模块
 """
 
-from .stt_service import STTService 
\ No newline at end of file
+from .stt_service import STTService
+from .audio_ingest import AudioIngestManager, AudioIngestWorker 
+from .transcript_delta import TranscriptDeltaEncoder
\ No newline at end of file
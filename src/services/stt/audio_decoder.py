@@ -0,0 +1,209 @@
+"""
+压缩音频解码模块。
+将客户端上传的 Opus 音频（WebCodecs 原始 Opus 数据包，或 MediaRecorder 生成的 WebM/Opus 流）
+增量解码为录音机所需的 16kHz 单声道 16 位 PCM。
+"""
+
+import logging
+import queue
+import threading
+from typing import List, Optional
+
+try:
+    import av
+except ImportError:  # PyAV 未安装时只支持未压缩的 PCM 上传
+    av = None
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+# 未压缩的 16 位 PCM（默认上传方式）
+CODEC_PCM = 'pcm'
+# WebCodecs AudioEncoder 输出的原始 Opus 数据包，每个数据包可独立送入解码器
+CODEC_OPUS = 'opus'
+# MediaRecorder 输出的 WebM 容器分片，必须按顺序拼接成连续的字节流
+CODEC_WEBM_OPUS = 'webm-opus'
+
+# 协商时按此顺序优先选择
+COMPRESSED_CODECS = (CODEC_OPUS, CODEC_WEBM_OPUS)
+
+# 容器字节流编码：丢失任何一个分片后都无法继续解码，不能丢弃或用静音填补
+STREAM_CODECS = (CODEC_WEBM_OPUS,)
+
+# Opus 的内部采样率
+OPUS_SAMPLE_RATE = 48000
+
+
+def get_supported_codecs() -> List[str]:
+    """获取服务器端可以解码的上传编码（PCM 始终可用）"""
+    if av is None:
+        return [CODEC_PCM]
+    return [CODEC_PCM, *COMPRESSED_CODECS]
+
+
+def negotiate_codec(preferred: str, client_codecs) -> str:
+    """
+    根据服务器配置和客户端能力选择上传编码
+
+    Args:
+        preferred: 服务器配置的编码（'pcm'、'opus'、'webm-opus' 或 'auto'）
+        client_codecs: 客户端在连接时声明支持的编码列表
+
+    Returns:
+        双方都支持的编码，无法满足时回退为 'pcm'
+    """
+    supported = get_supported_codecs()
+    client_codecs = [c for c in (client_codecs or []) if c in supported]
+
+    if preferred == 'auto':
+        for codec in COMPRESSED_CODECS:
+            if codec in client_codecs:
+                return codec
+        return CODEC_PCM
+
+    if preferred in client_codecs:
+        return preferred
+    return CODEC_PCM
+
+
+class _Pcm16Resampler:
+    """将 PyAV 音频帧转换为目标采样率的单声道 16 位 PCM"""
+
+    def __init__(self, output_rate: int):
+        self._resampler = av.AudioResampler(format='s16', layout='mono', rate=output_rate)
+
+    def convert(self, frames) -> bytes:
+        chunks = []
+        for frame in frames:
+            for resampled in self._resampler.resample(frame):
+                chunks.append(resampled.to_ndarray().tobytes())
+        return b''.join(chunks)
+
+
+class OpusPacketDecoder:
+    """
+    原始 Opus 数据包解码器（WebCodecs）
+    解码器状态在数据包之间保留，必须按序列号顺序送入
+    """
+
+    def __init__(self, output_rate: int = 16000):
+        if av is None:
+            raise RuntimeError("未安装 PyAV (av)，无法解码 Opus 音频")
+        self._codec = av.CodecContext.create('opus', 'r')
+        self._codec.sample_rate = OPUS_SAMPLE_RATE
+        self._codec.layout = 'mono'
+        self._pcm = _Pcm16Resampler(output_rate)
+
+    def decode(self, data) -> bytes:
+        """解码一个 Opus 数据包，返回 16 位 PCM"""
+        packet = av.Packet(bytes(data))
+        return self._pcm.convert(self._codec.decode(packet))
+
+    def close(self):
+        """释放解码器"""
+        self._codec = None
+
+
+class _StreamReader:
+    """
+    供 PyAV 读取的阻塞式字节流
+    接收线程写入 WebM 分片，解码线程在数据不足时等待
+    """
+
+    def __init__(self):
+        self._chunks = queue.Queue()
+        self._buffer = b''
+        self._closed = False
+
+    def write(self, data):
+        self._chunks.put(bytes(data))
+
+    def close(self):
+        self._chunks.put(None)
+
+    def read(self, size=-1) -> bytes:
+        while not self._closed and (size < 0 or len(self._buffer) < size):
+            if self._buffer and not self._chunks.qsize():
+                # 已有部分数据时不再等待，避免解码延迟
+                break
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._closed = True
+                break
+            self._buffer += chunk
+
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class WebmOpusStreamDecoder:
+    """
+    WebM/Opus 流解码器（MediaRecorder）
+    容器分片只能作为连续字节流解析，由独立的解码线程读取，解码结果通过队列取回
+    """
+
+    def __init__(self, output_rate: int = 16000):
+        if av is None:
+            raise RuntimeError("未安装 PyAV (av)，无法解码 WebM/Opus 音频")
+        self._reader = _StreamReader()
+        self._output = queue.Queue()
+        self._pcm = _Pcm16Resampler(output_rate)
+        self._error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._run, name="webm-opus-decoder")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        """解码线程：解析 WebM 容器并解码其中的音频"""
+        try:
+            with av.open(self._reader, mode='r', format='webm') as container:
+                for frame in container.decode(audio=0):
+                    pcm = self._pcm.convert([frame])
+                    if pcm:
+                        self._output.put(pcm)
+        except Exception as e:
+            self._error = e
+            logger.warning(f"WebM/Opus 流解码结束: {e}")
+
+    def decode(self, data) -> bytes:
+        """
+        写入一个 WebM 分片，返回目前已经解码出的 16 位 PCM
+
+        Raises:
+            RuntimeError: 解码线程已经退出（流已损坏），后续分片无法再解码
+        """
+        if not self._thread.is_alive():
+            raise RuntimeError(f"WebM/Opus 解码线程已退出: {self._error}")
+        self._reader.write(data)
+        chunks = []
+        while True:
+            try:
+                chunks.append(self._output.get_nowait())
+            except queue.Empty:
+                break
+        return b''.join(chunks)
+
+    def close(self):
+        """结束字节流并等待解码线程退出"""
+        self._reader.close()
+        self._thread.join(timeout=1.0)
+
+
+def create_audio_decoder(codec: str, output_rate: int = 16000):
+    """
+    创建指定编码的解码器
+
+    Args:
+        codec: 上传编码
+        output_rate: 输出采样率
+
+    Returns:
+        解码器对象，提供 decode(data) -> bytes 和 close()
+    """
+    if codec == CODEC_OPUS:
+        return OpusPacketDecoder(output_rate)
+    if codec == CODEC_WEBM_OPUS:
+        return WebmOpusStreamDecoder(output_rate)
+    raise ValueError(f"不支持的音频编码: {codec}")
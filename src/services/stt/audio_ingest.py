@@ -0,0 +1,437 @@
+"""
+音频接收模块。
+为每个客户端连接维护一个长期运行的接收线程和有界队列，
+按到达顺序将音频数据送入 STT 服务，避免每个数据包创建一个线程。
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from src.utils.stt.resampler import StreamingResampler, COMMON_SAMPLE_RATES
+from src.services.stt.jitter_buffer import JitterBuffer, DEFAULT_WINDOW_MS, DEFAULT_MAX_CONCEAL_MS
+from src.services.stt.audio_decoder import create_audio_decoder, STREAM_CODECS
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+# 默认队列长度（48kHz 客户端每秒约 375 个数据包，约合 0.5 秒音频）
+DEFAULT_MAX_QUEUE_SIZE = 200
+
+# 录音机所需的采样率
+TARGET_SAMPLE_RATE = 16000
+
+# 单个静音标记的最长时长（毫秒），客户端约每 100ms 发送一次，超出部分视为异常数据截断
+MAX_SILENCE_MARKER_MS = 2000
+
+
+class AudioIngestWorker:
+    """
+    单个连接的音频接收线程
+    数据包进入有界队列，由同一个线程按顺序调用送入函数，保证音频块不会乱序；
+    带序列号的数据包先经过抖动缓冲重新排序，没有序列号的数据包（旧版客户端）直接送入；
+    压缩上传（Opus）的数据包按顺序解码为 16kHz PCM 后再送入；
+    WebM/Opus 分片是连续的字节流，分片丢失（队列已满或丢包）或解码出错后该流无法恢复，
+    该会话的 WebM/Opus 上传被拒绝，由 on_stream_error 通知客户端改用其他编码；
+    客户端静音门限发送的静音标记展开为等长的全零 PCM，与音频数据包一起排序；
+    每个连接持有自己的流式重采样器，滤波器状态在数据块之间连续
+    """
+
+    def __init__(self, session_id: str, feed_func: Callable[[Any, int, Optional[StreamingResampler]], bool],
+                 max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+                 on_feed_failure: Optional[Callable[[str, Optional[Exception]], None]] = None,
+                 jitter_window_ms: float = DEFAULT_WINDOW_MS,
+                 jitter_max_conceal_ms: float = DEFAULT_MAX_CONCEAL_MS,
+                 on_stream_error: Optional[Callable[[str, str], None]] = None):
+        """
+        初始化接收线程
+
+        Args:
+            session_id: 会话标识（Socket.IO 的 sid 等）
+            feed_func: 送入函数，参数为 (audio_data, sample_rate, resampler)，返回是否成功
+            max_queue_size: 队列最大长度，队列满时丢弃最旧的数据包
+            on_feed_failure: 送入失败时的回调，参数为 (session_id, 异常或None)
+            jitter_window_ms: 抖动缓冲的重排窗口（毫秒）
+            jitter_max_conceal_ms: 用静音填补的最长丢包时长（毫秒）
+            on_stream_error: 容器字节流中断、该编码的上传被拒绝时的回调，参数为 (session_id, 编码)
+        """
+        self.session_id = session_id
+        self._feed_func = feed_func
+        self._on_feed_failure = on_feed_failure
+        self._on_stream_error = on_stream_error
+        # 已经中断、后续分片直接丢弃的容器字节流编码
+        self._rejected_codecs = set()
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue_size)))
+        self._stop_event = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._resamplers: Dict[int, StreamingResampler] = {}
+        self._decoder = None
+        self._decoder_codec: Optional[str] = None
+        self._jitter_buffer = JitterBuffer(window_ms=jitter_window_ms,
+                                           max_conceal_ms=jitter_max_conceal_ms)
+        # 空闲时检查抖动缓冲的间隔，不超过重排窗口
+        self._poll_interval = min(0.1, self._jitter_buffer.window) or 0.1
+
+        # 统计信息
+        self._enqueued = 0
+        self._fed = 0
+        self._dropped = 0
+        self._failed = 0
+        self._latency_sum = 0.0
+        self._latency_count = 0
+        self._latency_max = 0.0
+        self._compressed_bytes = 0
+        self._decoded_bytes = 0
+        self._silence_ms = 0.0
+        self._stream_errors = 0
+
+        self._thread = threading.Thread(target=self._run, name=f"audio-ingest-{session_id}")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, audio_data, sample_rate: int, seq: Optional[int] = None,
+               capture_ts: Optional[float] = None, codec: Optional[str] = None,
+               duration_ms: Optional[float] = None) -> bool:
+        """
+        将数据包放入队列（非阻塞）
+
+        Args:
+            audio_data: 音频数据（bytes 或 memoryview）
+            sample_rate: 采样率
+            seq: 客户端序列号（可选）
+            capture_ts: 客户端采集时间戳，毫秒（可选）
+            codec: 压缩编码（可选，None 表示 16 位 PCM）
+            duration_ms: 压缩数据包的音频时长，毫秒（可选）
+
+        Returns:
+            数据包是否被接收
+        """
+        if self._stop_event.is_set():
+            return False
+
+        if codec in STREAM_CODECS:
+            with self._stats_lock:
+                rejected = codec in self._rejected_codecs
+                if rejected:
+                    self._dropped += 1
+            if rejected:
+                return False
+
+        item = (time.perf_counter(), audio_data, sample_rate, seq, capture_ts, codec, duration_ms)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if codec in STREAM_CODECS:
+                # 字节流不能丢弃任何分片：丢弃后流已经中断，拒绝该编码的后续分片
+                with self._stats_lock:
+                    self._dropped += 1
+                self._reject_stream(codec, "接收队列已满")
+                return False
+            # 队列已满：丢弃最旧的数据包以限制延迟，保持剩余数据的顺序
+            try:
+                self._queue.get_nowait()
+                with self._stats_lock:
+                    self._dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                with self._stats_lock:
+                    self._dropped += 1
+                return False
+
+        with self._stats_lock:
+            self._enqueued += 1
+        return True
+
+    def submit_silence(self, duration_ms: float, seq: Optional[int] = None,
+                       capture_ts: Optional[float] = None) -> bool:
+        """
+        放入一个静音标记（客户端静音门限跳过的音频时长）
+
+        标记展开为 16kHz 全零 PCM，录音机的静音计时和语音结束检测照常进行，
+        录音机对全零数据块不运行 VAD 模型
+
+        Args:
+            duration_ms: 静音时长（毫秒）
+            seq: 客户端序列号（可选）
+            capture_ts: 客户端采集时间戳，毫秒（可选）
+
+        Returns:
+            标记是否被接收
+        """
+        duration_ms = min(max(0.0, float(duration_ms)), MAX_SILENCE_MARKER_MS)
+        samples = round(TARGET_SAMPLE_RATE * duration_ms / 1000)
+        with self._stats_lock:
+            self._silence_ms += duration_ms
+        return self.submit(bytes(2 * samples), TARGET_SAMPLE_RATE, seq=seq, capture_ts=capture_ts)
+
+    def _run(self):
+        """接收线程主循环"""
+        while not self._stop_event.is_set():
+            try:
+                (enqueue_time, audio_data, sample_rate, seq, capture_ts,
+                 codec, duration_ms) = self._queue.get(timeout=self._poll_interval)
+            except queue.Empty:
+                # 没有新数据包时释放抖动缓冲中超时的数据包
+                for packet in self._jitter_buffer.flush():
+                    self._feed(*packet)
+                continue
+
+            latency = time.perf_counter() - enqueue_time
+            with self._stats_lock:
+                self._latency_sum += latency
+                self._latency_count += 1
+                if latency > self._latency_max:
+                    self._latency_max = latency
+
+            if seq is None:
+                self._feed(audio_data, sample_rate, codec)
+                continue
+
+            for packet in self._jitter_buffer.push(seq, audio_data, sample_rate, capture_ts,
+                                                   codec=codec, duration_ms=duration_ms):
+                self._feed(*packet)
+
+        if self._decoder:
+            self._decoder.close()
+            self._decoder = None
+
+    def _feed(self, audio_data, sample_rate: int, codec: Optional[str] = None):
+        """将一个数据包（必要时先解码）送入 STT 服务并记录结果"""
+        if audio_data is None:
+            # 抖动缓冲报告的字节流缺口
+            self._reject_stream(codec, "分片丢失")
+        with self._stats_lock:
+            rejected = codec in self._rejected_codecs
+            if rejected and audio_data is not None:
+                self._dropped += 1
+        if rejected:
+            if self._decoder_codec == codec and self._decoder:
+                self._decoder.close()
+                self._decoder = None
+            return
+
+        try:
+            if codec:
+                audio_data = self._decode(audio_data, codec)
+                if not audio_data:
+                    # 解码器尚未输出音频（如 WebM 头部），不算失败
+                    return
+                sample_rate = TARGET_SAMPLE_RATE
+            success = self._feed_func(audio_data, sample_rate, self._get_resampler(sample_rate))
+            error = None
+        except Exception as e:
+            success = False
+            error = e
+            if codec in STREAM_CODECS:
+                self._reject_stream(codec, f"解码失败: {e}")
+
+        with self._stats_lock:
+            if success:
+                self._fed += 1
+            else:
+                self._failed += 1
+
+        if not success and self._on_feed_failure:
+            try:
+                self._on_feed_failure(self.session_id, error)
+            except Exception as e:
+                logger.error(f"执行音频送入失败回调时出错: {e}")
+
+    def _reject_stream(self, codec: str, reason: str):
+        """
+        拒绝该会话中断的容器字节流，后续分片直接丢弃（可由任意线程调用）
+        解码器只能从流的开头解析，由客户端改用其他编码或重新连接后从新的流开始
+        """
+        with self._stats_lock:
+            if codec in self._rejected_codecs:
+                return
+            self._rejected_codecs.add(codec)
+            self._stream_errors += 1
+        logger.warning(f"会话 {self.session_id} 的 {codec} 上传流已中断（{reason}），不再接收该编码的分片")
+        if self._on_stream_error:
+            try:
+                self._on_stream_error(self.session_id, codec)
+            except Exception as e:
+                logger.error(f"执行上传流中断回调时出错: {e}")
+
+    def _decode(self, data, codec: str) -> bytes:
+        """用该连接的解码器解码压缩数据包，编码变化时重新创建解码器"""
+        if self._decoder is None or self._decoder_codec != codec:
+            if self._decoder:
+                self._decoder.close()
+            self._decoder = create_audio_decoder(codec, TARGET_SAMPLE_RATE)
+            self._decoder_codec = codec
+            logger.info(f"会话 {self.session_id} 使用 {codec} 压缩音频上传")
+
+        pcm = self._decoder.decode(data)
+        with self._stats_lock:
+            self._compressed_bytes += len(data)
+            self._decoded_bytes += len(pcm)
+        return pcm
+
+    def _get_resampler(self, sample_rate: int) -> Optional[StreamingResampler]:
+        """
+        获取该连接在该采样率下的重采样器（解码输出和静音填补可能使用不同的采样率）
+        客户端已在 AudioWorklet 中降采样到 16kHz 时返回 None，音频原样送入录音机
+        """
+        if sample_rate == TARGET_SAMPLE_RATE:
+            return None
+        resampler = self._resamplers.get(sample_rate)
+        if resampler is None:
+            # 采样率来自客户端，罕见的采样率需要极长的滤波器，直接拒绝
+            if sample_rate not in COMMON_SAMPLE_RATES:
+                raise ValueError(f"不支持的采样率: {sample_rate}")
+            resampler = StreamingResampler(sample_rate, TARGET_SAMPLE_RATE)
+            self._resamplers[sample_rate] = resampler
+        return resampler
+
+    def get_stats(self, reset_window: bool = True) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Args:
+            reset_window: 是否重置延迟统计窗口（平均值和最大值）
+
+        Returns:
+            统计信息字典
+        """
+        with self._stats_lock:
+            stats = {
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self._queue.maxsize,
+                'enqueued': self._enqueued,
+                'fed': self._fed,
+                'dropped': self._dropped,
+                'failed': self._failed,
+                'latency_avg_ms': (self._latency_sum / self._latency_count * 1000
+                                   if self._latency_count else 0.0),
+                'latency_max_ms': self._latency_max * 1000,
+                'codec': self._decoder_codec or 'pcm',
+                'compressed_bytes': self._compressed_bytes,
+                'decoded_bytes': self._decoded_bytes,
+                'silence_ms': round(self._silence_ms, 1),
+                'stream_errors': self._stream_errors,
+                'jitter': self._jitter_buffer.get_stats()
+            }
+            if reset_window:
+                self._latency_sum = 0.0
+                self._latency_count = 0
+                self._latency_max = 0.0
+        return stats
+
+    def stop(self, timeout: float = 1.0):
+        """停止接收线程，丢弃未处理的数据"""
+        self._stop_event.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+
+class AudioIngestManager:
+    """
+    管理所有连接的音频接收线程
+    """
+
+    def __init__(self, feed_func: Callable[[Any, int, Optional[StreamingResampler]], bool],
+                 max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+                 on_feed_failure: Optional[Callable[[str, Optional[Exception]], None]] = None,
+                 jitter_window_ms: float = DEFAULT_WINDOW_MS,
+                 jitter_max_conceal_ms: float = DEFAULT_MAX_CONCEAL_MS,
+                 on_stream_error: Optional[Callable[[str, str], None]] = None):
+        """
+        初始化管理器
+
+        Args:
+            feed_func: 送入函数，参数为 (audio_data, sample_rate, resampler)，返回是否成功
+            max_queue_size: 每个会话的队列最大长度
+            on_feed_failure: 送入失败时的回调
+            jitter_window_ms: 抖动缓冲的重排窗口（毫秒）
+            jitter_max_conceal_ms: 用静音填补的最长丢包时长（毫秒）
+            on_stream_error: 容器字节流中断时的回调，参数为 (session_id, 编码)
+        """
+        self._feed_func = feed_func
+        self._max_queue_size = max_queue_size
+        self._on_feed_failure = on_feed_failure
+        self._jitter_window_ms = jitter_window_ms
+        self._jitter_max_conceal_ms = jitter_max_conceal_ms
+        self._on_stream_error = on_stream_error
+        self._workers: Dict[str, AudioIngestWorker] = {}
+        self._lock = threading.Lock()
+
+    def open_session(self, session_id: str) -> AudioIngestWorker:
+        """为会话创建接收线程（已存在则直接返回）"""
+        with self._lock:
+            worker = self._workers.get(session_id)
+            if worker is None:
+                worker = AudioIngestWorker(
+                    session_id,
+                    self._feed_func,
+                    max_queue_size=self._max_queue_size,
+                    on_feed_failure=self._on_feed_failure,
+                    jitter_window_ms=self._jitter_window_ms,
+                    jitter_max_conceal_ms=self._jitter_max_conceal_ms,
+                    on_stream_error=self._on_stream_error
+                )
+                self._workers[session_id] = worker
+                logger.debug(f"已创建音频接收线程: {session_id}")
+            return worker
+
+    def close_session(self, session_id: str):
+        """停止并移除会话的接收线程"""
+        with self._lock:
+            worker = self._workers.pop(session_id, None)
+        if worker:
+            worker.stop()
+            logger.debug(f"已关闭音频接收线程: {session_id}")
+
+    def submit(self, session_id: str, audio_data, sample_rate: int, seq: Optional[int] = None,
+               capture_ts: Optional[float] = None, codec: Optional[str] = None,
+               duration_ms: Optional[float] = None) -> bool:
+        """将数据包提交到会话的接收队列，会话不存在时自动创建"""
+        worker = self._workers.get(session_id)
+        if worker is None:
+            worker = self.open_session(session_id)
+        return worker.submit(audio_data, sample_rate, seq=seq, capture_ts=capture_ts,
+                             codec=codec, duration_ms=duration_ms)
+
+    def submit_silence(self, session_id: str, duration_ms: float, seq: Optional[int] = None,
+                       capture_ts: Optional[float] = None) -> bool:
+        """将静音标记提交到会话的接收队列，会话不存在时自动创建"""
+        worker = self._workers.get(session_id)
+        if worker is None:
+            worker = self.open_session(session_id)
+        return worker.submit_silence(duration_ms, seq=seq, capture_ts=capture_ts)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取所有会话的汇总统计信息"""
+        with self._lock:
+            workers = list(self._workers.values())
+
+        sessions = {worker.session_id: worker.get_stats() for worker in workers}
+        return {
+            'sessions': len(sessions),
+            'queue_depth': sum(s['queue_depth'] for s in sessions.values()),
+            'dropped': sum(s['dropped'] for s in sessions.values()),
+            'failed': sum(s['failed'] for s in sessions.values()),
+            'latency_max_ms': max((s['latency_max_ms'] for s in sessions.values()), default=0.0),
+            'compressed_bytes': sum(s['compressed_bytes'] for s in sessions.values()),
+            'silence_ms': sum(s['silence_ms'] for s in sessions.values()),
+            'stream_errors': sum(s['stream_errors'] for s in sessions.values()),
+            'jitter': {
+                key: sum(s['jitter'][key] for s in sessions.values())
+                for key in ('reordered', 'duplicates', 'late', 'lost', 'concealed')
+            },
+            'per_session': sessions
+        }
+
+    def shutdown(self):
+        """停止所有接收线程"""
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
@@ -0,0 +1,217 @@
+"""
+抖动缓冲模块。
+根据客户端为每个音频数据包标记的序列号，在送入 STT 服务之前
+对数据包进行重新排序，用静音填补短暂的丢包，并丢弃迟到和重复的数据包。
+"""
+
+import collections
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.services.stt.audio_decoder import STREAM_CODECS
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+# 默认重排窗口：乱序数据包最多等待的时间（毫秒）
+DEFAULT_WINDOW_MS = 60
+
+# 默认静音填补上限：不超过该时长的丢包用静音填补，更长的丢包直接跳过（毫秒）
+DEFAULT_MAX_CONCEAL_MS = 100
+
+# 最多缓存的乱序数据包数量，超过后立即按丢包处理
+MAX_PENDING_PACKETS = 256
+
+# 记录最近填补过的序列号数量，用于区分迟到和重复的数据包
+CONCEALED_HISTORY_SIZE = 512
+
+# 释放的数据包：(音频数据, 采样率, 编码)，编码为 None 表示未压缩的 16 位 PCM；
+# 容器字节流编码（WebM/Opus）出现缺口时释放音频数据为 None 的数据包，表示该流已中断
+Packet = Tuple[Any, int, Optional[str]]
+
+
+class JitterBuffer:
+    """
+    单个连接的抖动缓冲
+    仅由该连接的接收线程调用，不做线程同步；统计信息可由其他线程读取
+    """
+
+    def __init__(self, window_ms: float = DEFAULT_WINDOW_MS,
+                 max_conceal_ms: float = DEFAULT_MAX_CONCEAL_MS):
+        """
+        初始化抖动缓冲
+
+        Args:
+            window_ms: 重排窗口，缺失的数据包最多等待的时间（毫秒）
+            max_conceal_ms: 用静音填补的最长丢包时长（毫秒）
+        """
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_conceal = max(0.0, max_conceal_ms) / 1000.0
+
+        self._next_seq: Optional[int] = None
+        self._highest_seq: Optional[int] = None
+        self._pending: Dict[int, Tuple[float, Any, int, Optional[str], Optional[float]]] = {}
+        self._concealed = collections.deque(maxlen=CONCEALED_HISTORY_SIZE)
+        self._concealed_set = set()
+
+        # 用于估计丢失数据包时长的最近一个数据包（秒）
+        self._last_packet_seconds = 0.0
+        self._last_sample_rate = 0
+
+        # 到达抖动（RFC 3550 算法），基于客户端采集时间戳
+        self._last_transit: Optional[float] = None
+        self._jitter = 0.0
+
+        # 统计信息
+        self.received = 0
+        self.released = 0
+        self.reordered = 0
+        self.duplicates = 0
+        self.late = 0
+        self.lost = 0
+        self.concealed = 0
+        self.concealed_ms = 0.0
+
+    def push(self, seq: int, audio_data, sample_rate: int,
+             capture_ts: Optional[float] = None,
+             now: Optional[float] = None,
+             codec: Optional[str] = None,
+             duration_ms: Optional[float] = None) -> List[Packet]:
+        """
+        放入一个数据包，返回可以按顺序送出的数据包列表
+
+        Args:
+            seq: 客户端序列号（单调递增）
+            audio_data: 音频数据
+            sample_rate: 采样率
+            capture_ts: 客户端采集时间戳（毫秒，可选，用于计算到达抖动）
+            now: 当前时间（time.monotonic()，可选）
+            codec: 压缩编码（可选，None 表示 16 位 PCM）
+            duration_ms: 压缩数据包的音频时长（毫秒，可选）；未知时丢包不做静音填补
+
+        Returns:
+            按序列号排列的 (音频数据, 采样率, 编码) 列表，填补的静音（PCM）也包含在内
+        """
+        if now is None:
+            now = time.monotonic()
+        self.received += 1
+        self._update_jitter(capture_ts, now)
+
+        if self._next_seq is None:
+            self._next_seq = seq
+
+        if seq < self._next_seq:
+            # 该位置已经送出：要么已用静音填补（迟到），要么已收到过（重复）
+            if seq in self._concealed_set:
+                self.late += 1
+            else:
+                self.duplicates += 1
+            return []
+
+        if seq in self._pending:
+            self.duplicates += 1
+            return []
+
+        if self._highest_seq is not None and seq < self._highest_seq:
+            self.reordered += 1
+        if self._highest_seq is None or seq > self._highest_seq:
+            self._highest_seq = seq
+
+        self._pending[seq] = (now, audio_data, sample_rate, codec, duration_ms)
+        return self._release(now)
+
+    def flush(self, now: Optional[float] = None) -> List[Packet]:
+        """
+        按时间检查缓冲，等待超过重排窗口的缺失数据包按丢包处理
+
+        接收线程在没有新数据包时应定期调用，避免最后几个数据包一直滞留
+        """
+        if not self._pending:
+            return []
+        if now is None:
+            now = time.monotonic()
+        return self._release(now)
+
+    def _release(self, now: float) -> List[Packet]:
+        """送出所有连续的数据包，必要时跳过超时的缺口"""
+        released = []
+        while self._pending:
+            entry = self._pending.pop(self._next_seq, None)
+            if entry is not None:
+                _, audio_data, sample_rate, codec, duration_ms = entry
+                if codec is None:
+                    self._last_packet_seconds = len(audio_data) / 2 / sample_rate
+                else:
+                    self._last_packet_seconds = (duration_ms or 0) / 1000.0
+                self._last_sample_rate = sample_rate
+                released.append((audio_data, sample_rate, codec))
+                self.released += 1
+                self._next_seq += 1
+                continue
+
+            # 存在缺口：在重排窗口内继续等待
+            oldest_arrival = min(entry[0] for entry in self._pending.values())
+            if (now - oldest_arrival < self.window
+                    and len(self._pending) < MAX_PENDING_PACKETS):
+                break
+
+            next_available = min(self._pending)
+            released.extend(self._conceal_gap(self._next_seq, next_available))
+            self._next_seq = next_available
+
+        return released
+
+    def _conceal_gap(self, first_missing: int, next_available: int) -> List[Packet]:
+        """处理缺失的序列号区间，较短的缺口用静音填补，容器字节流的缺口报告为流中断"""
+        missing = next_available - first_missing
+        self.lost += missing
+        for seq in range(first_missing, next_available):
+            if len(self._concealed) == self._concealed.maxlen:
+                self._concealed_set.discard(self._concealed[0])
+            self._concealed.append(seq)
+            self._concealed_set.add(seq)
+
+        # 字节流缺少分片后无法继续解析，静音 PCM 也无法修复
+        _, _, sample_rate, codec, _ = self._pending[next_available]
+        if codec in STREAM_CODECS:
+            logger.debug(f"{codec} 流丢失 {missing} 个分片，无法填补")
+            return [(None, sample_rate, codec)]
+
+        packet_seconds = self._last_packet_seconds
+        if not packet_seconds or not self._last_sample_rate:
+            return []
+
+        if missing * packet_seconds > self.max_conceal:
+            logger.debug(f"丢失 {missing} 个数据包（约 {missing * packet_seconds * 1000:.0f}ms），超过填补上限，直接跳过")
+            return []
+
+        self.concealed += missing
+        self.concealed_ms += missing * packet_seconds * 1000
+        silence = bytes(2 * round(packet_seconds * self._last_sample_rate))
+        return [(silence, self._last_sample_rate, None)] * missing
+
+    def _update_jitter(self, capture_ts: Optional[float], now: float):
+        """根据客户端采集时间戳更新到达抖动估计"""
+        if capture_ts is None:
+            return
+        transit = now - capture_ts / 1000.0
+        if self._last_transit is not None:
+            self._jitter += (abs(transit - self._last_transit) - self._jitter) / 16
+        self._last_transit = transit
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        return {
+            'received': self.received,
+            'released': self.released,
+            'pending': len(self._pending),
+            'reordered': self.reordered,
+            'duplicates': self.duplicates,
+            'late': self.late,
+            'lost': self.lost,
+            'concealed': self.concealed,
+            'concealed_ms': round(self.concealed_ms, 1),
+            'loss_rate': self.lost / max(1, self.released + self.lost),
+            'jitter_ms': round(self._jitter * 1000, 2)
+        }
@@ -1,6 +1,5 @@
 import threading
 import numpy as np
-from scipy.signal import resample
 import logging
 import time
 import json
@@ -9,6 +8,8 @@ import sys
 import traceback
 from threading import Thread, Event, Lock
 from src.utils.stt.audio_recorder import AudioToTextRecorder
+from src.utils.stt.resampler import StreamingResampler
+from src.services.stt.transcript_delta import TranscriptDeltaEncoder
 import importlib
 import subprocess
 from typing import Dict, Any, Optional, List, Union
@@ -44,6 +45,9 @@ default_config = {
     'ensure_sentence_starting_uppercase': True,  # 确保句首大写
     'ensure_sentence_ends_with_period': True,  # 确保句尾有句号
     'batch_size': 16,  # 批处理大小
+    'transcription_workers': 1,  # 主模型转写工作进程数，多人同时说话时并行转写完整句子（每个进程加载一份模型）
+    'transcription_batch_window': 0.02,  # 转写工作进程收到请求后等待更多请求一起批量解码的时间（秒），需要 batch_size > 0
+    'transcription_max_batch': 8,  # 一次批量解码的最大请求数，1 表示不跨请求批量解码
     'level': logging.WARNING,  # 日志级别
     'log_level': 'WARNING',  # 用户友好的日志级别名称
 
@@ -54,12 +58,24 @@ default_config = {
     'realtime_processing_pause': 0,  # 实时处理暂停时间
     'init_realtime_after_seconds': 0.1,  # 实时处理初始延迟 (从0.2减少到0.1，减少初始延迟)
     'realtime_batch_size': 24,  # 实时转写批处理大小 (从16增加到24，提高吞吐量)
+    'realtime_word_stabilization': True,  # 按词时间戳稳定实时文本：前后两次一致且远离音频末尾的词被确认，已确认文本和尾部分开发送
+    'realtime_incremental': True,  # 增量实时转写：只转写最后一个确认词之后的音频，连续两次结果一致的词被确认并作为下一次的提示
+    'realtime_max_window_seconds': 15.0,  # 增量实时转写：未确认音频超过该时长时强制确认最新结果
+    'realtime_adaptive_cadence': True,  # 自适应实时转写节奏：根据推理耗时选择两次转写之间的暂停，realtime_processing_pause 作为最小暂停
+    'realtime_target_interval': 0.3,  # 自适应节奏：两次实时转写开始之间的目标间隔（秒）
+    'realtime_cpu_budget': 0.5,  # 自适应节奏：实时模型推理最多占用的时间比例，主模型有待处理请求时自动退避
+    'fast_finalization': False,  # 快速定稿：短句的最后一次实时转写覆盖全部语音且置信度足够时直接作为完整句子，主模型在后台复核（默认关闭：主模型更正后不会重新翻译；开启 realtime_incremental 时不生效，增量转写的置信度只覆盖未确认的尾部）
+    'fast_finalization_min_logprob': -0.5,  # 快速定稿：实时转写的最低平均对数概率
+    'fast_finalization_max_seconds': 3.0,  # 快速定稿：句子的最大时长（秒）
 
     # 语音活动检测设置
     'silero_sensitivity': 0.5,  # Silero VAD灵敏度 (从0.4增加到0.5，提高检测灵敏度)
     'silero_use_onnx': True,  # 是否使用ONNX版Silero (启用ONNX加速)
+    'silero_model_path': None,  # 本地 Silero VAD ONNX 模型路径（silero_vad.onnx），设置后直接用 onnxruntime 运行，不经过 torch.hub
     'silero_deactivity_detection': True,  # Silero去活动检测 (启用，减少句子中间被错误分段的情况)
     'webrtc_sensitivity': 1,  # WebRTC VAD灵敏度 (从2降低到1，提高灵敏度)
+    'use_energy_gate': True,  # 能量预门限：等待语音时明显低于背景噪声的数据块不再运行 WebRTC / Silero VAD（录音结束仍由 VAD 判断）
+    'energy_gate_margin_db': None,  # 能量预门限高于背景噪声的分贝数，None 时根据 webrtc_sensitivity 和 silero_sensitivity 计算
     'post_speech_silence_duration': 0.5,  # 语音后静音持续时间 (从0.7减少到0.5，加快句子结束检测)
     'min_length_of_recording': 0.3,  # 最小录音长度 (设置为0.3秒，过滤掉短暂噪音)
     'min_gap_between_recordings': 0.1,  # 录音间最小间隔 (设置为0.1秒，避免过于频繁的分段)
@@ -95,15 +111,40 @@ default_config = {
     'allowed_latency_limit': 3.0,  # 允许的延迟限制 (从5.0减少到3.0，减少延迟)
     'debug_mode': False,  # 调试模式
     'handle_buffer_overflow': True,  # 处理缓冲区溢出
+    'use_shared_memory_queue': False,  # 使用共享内存环形队列传递音频块（免去序列化，队列深度O(1)读取）
+    'use_shared_memory_transcription': True,  # 转写请求的音频写入共享内存，只向转写工作进程发送位置描述（免去序列化整句音频）
     'no_log_file': True,  # 不生成日志文件
     'use_extended_logging': False,  # 使用扩展日志记录
     'on_recording_start': None,  # 录音开始回调
     'on_recording_stop': None,  # 录音结束回调
     'on_transcription_start': None,  # 转写开始回调
     'on_recorded_chunk': None,  # 录制块回调
-    'on_realtime_transcription_update': None  # 实时转写更新回调
+    'on_realtime_transcription_update': None,  # 实时转写更新回调
+
+    # 音频接收设置（仅由服务层使用，不传递给录音机）
+    'audio_ingest_queue_size': 200,  # 每个连接的音频接收队列长度，队列满时丢弃最旧的数据包
+    'jitter_buffer_window_ms': 60,  # 抖动缓冲重排窗口（毫秒），乱序数据包最多等待的时间
+    'jitter_buffer_max_conceal_ms': 100,  # 不超过该时长的丢包用静音填补（毫秒），更长的丢包直接跳过
+    'audio_uplink_codec': 'pcm',  # 音频上传编码：pcm（未压缩）、opus（WebCodecs）、webm-opus（MediaRecorder）或 auto（客户端支持时使用压缩编码）
+    'client_vad_enabled': False,  # 客户端静音门限：静音期间浏览器只发送静音时长标记，不发送音频
+    'client_vad_threshold_db': 9.0,  # 客户端静音门限：能量高于背景噪声多少分贝视为语音
+    'client_vad_hangover_ms': 400,  # 客户端静音门限：语音结束后继续发送的时长（毫秒）
+    'client_vad_preroll_ms': 320,  # 客户端静音门限：语音开始时补发的之前音频时长（毫秒）
 }
 
+# 仅由服务层使用的配置项，创建录音机时需要移除
+SERVICE_CONFIG_KEYS = [
+    'log_level',
+    'audio_ingest_queue_size',
+    'jitter_buffer_window_ms',
+    'jitter_buffer_max_conceal_ms',
+    'audio_uplink_codec',
+    'client_vad_enabled',
+    'client_vad_threshold_db',
+    'client_vad_hangover_ms',
+    'client_vad_preroll_ms',
+]
+
 
 class STTService:
     def __init__(self, realtime_callback=None, full_sentence_callback=None, socketio=None):
@@ -113,6 +154,7 @@ class STTService:
         self.is_running = True
         self.config_lock = threading.Lock()  # 用于保护配置访问
         self.current_config = default_config.copy()
+        self.resamplers = {}  # 调用方未提供重采样器时使用的默认流式重采样器（按采样率）
         
         # 设置回调函数
         self.realtime_callback = realtime_callback
@@ -122,7 +164,15 @@ class STTService:
         self.callbacks = {
             'on_interim_result': [],  # 实时转录回调
             'on_final_result': [],    # 最终转录回调
+            'on_realtime_words': [],  # 按词稳定的实时转录回调（已确认文本和可能变化的尾部）
+            'on_realtime_delta': [],  # 实时转录增量回调（语句编号、修订号、相同前缀长度和替换的后缀）
+            'on_final_correction': [],  # 完整句子修正回调（快速定稿的句子经主模型复核后文本不同）
         }
+
+        # 实时文本增量编码器，每次实时更新只发送变化的后缀
+        self.transcript_delta = TranscriptDeltaEncoder()
+        self._realtime_committed = None  # 本次实时转写中按词稳定的已确认文本
+        self.finished_utterance = None  # 最近一个完整句子所属的语句编号
         
         # 从文件加载上次保存的配置
         self.load_config_from_file()
@@ -156,7 +206,8 @@ class STTService:
         注册回调函数
         
         Args:
-            event_type: 事件类型，可以是'on_interim_result', 'on_final_result'
+            event_type: 事件类型，可以是'on_interim_result', 'on_final_result', 'on_realtime_words', 'on_realtime_delta',
+                'on_final_correction'
             callback: 回调函数
             
         Returns:
@@ -285,9 +336,40 @@ class STTService:
                 callback({'text': text, 'is_final': False})
             except Exception as e:
                 print(f"执行实时转录回调时出错: {str(e)}")
+
+        # 生成增量补丁（按词稳定时同一次转写先调用 realtime_words_detected）
+        committed, self._realtime_committed = self._realtime_committed, None
+        recorder = self.recorder
+        patch = self.transcript_delta.encode(text, committed,
+                                             utterance=getattr(recorder, 'recording_id', None))
+        if patch:
+            for callback in self.callbacks['on_realtime_delta']:
+                try:
+                    callback(patch)
+                except Exception as e:
+                    print(f"执行实时转录增量回调时出错: {str(e)}")
                 
         print(f"\r{text}", end='', flush=True)
 
+    def realtime_words_detected(self, committed, tail):
+        """按词稳定的实时转录回调：committed 为不再变化的文本，tail 为之后仍可能变化的部分"""
+        self._realtime_committed = committed
+        for callback in self.callbacks['on_realtime_words']:
+            try:
+                callback({'committed': committed, 'tail': tail, 'is_final': False})
+            except Exception as e:
+                print(f"执行按词稳定的实时转录回调时出错: {str(e)}")
+
+    def final_correction_detected(self, text, corrected):
+        """快速定稿的句子经主模型复核后文本不同：text 为已发送的完整句子，corrected 为主模型的结果"""
+        for callback in self.callbacks['on_final_correction']:
+            try:
+                callback({'text': corrected, 'original': text, 'is_final': True})
+            except Exception as e:
+                print(f"执行完整句子修正回调时出错: {str(e)}")
+
+        print(f"\rCorrection: {corrected}")
+
     def get_serializable_config(self):
         """获取可序列化的配置，添加启动错误信息"""
         config = self.current_config.copy()
@@ -298,14 +380,29 @@ class STTService:
         
         return config
 
-    def decode_and_resample(self, audio_data, original_sample_rate, target_sample_rate=16000):
-        """重采样函数"""
+    def get_resampler(self, original_sample_rate, target_sample_rate=16000):
+        """获取默认的流式重采样器（每种采样率组合一个实例）"""
+        key = (original_sample_rate, target_sample_rate)
+        resampler = self.resamplers.get(key)
+        if resampler is None:
+            resampler = StreamingResampler(original_sample_rate, target_sample_rate)
+            self.resamplers[key] = resampler
+        return resampler
+
+    def decode_and_resample(self, audio_data, original_sample_rate, target_sample_rate=16000, resampler=None):
+        """
+        重采样函数
+
+        使用流式多相滤波器重采样，滤波器状态在数据块之间保留，避免块边界伪影。
+        每个输入流应传入自己的重采样器；未传入时使用按采样率共享的默认实例。
+        """
         try:
-            audio_np = np.frombuffer(audio_data, dtype=np.int16)
-            num_original_samples = len(audio_np)
-            num_target_samples = int(num_original_samples * target_sample_rate / original_sample_rate)
-            resampled_audio = resample(audio_np, num_target_samples)
-            return resampled_audio.astype(np.int16).tobytes()
+            if original_sample_rate == target_sample_rate:
+                return audio_data
+            if (resampler is None or resampler.source_rate != original_sample_rate
+                    or resampler.target_rate != target_sample_rate):
+                resampler = self.get_resampler(original_sample_rate, target_sample_rate)
+            return resampler.process_bytes(audio_data)
         except Exception as e:
             print(f"重采样错误: {e}")
             return audio_data
@@ -325,14 +422,16 @@ class STTService:
             with self.config_lock:
                 config_copy = self.current_config.copy()
                 config_copy['on_realtime_transcription_stabilized'] = self.text_detected
+                config_copy['on_realtime_transcription_words'] = self.realtime_words_detected
+                config_copy['on_transcription_correction'] = self.final_correction_detected
                 
                 # 确保日志级别被正确传递
                 level_name = config_copy.get('log_level', 'WARNING')
                 level = getattr(logging, level_name, logging.WARNING)
                 config_copy['level'] = level
-                # 确保移除log_level参数，因为AudioToTextRecorder不接受此参数
-                if 'log_level' in config_copy:
-                    config_copy.pop('log_level')
+                # 确保移除服务层配置项（如log_level），因为AudioToTextRecorder不接受这些参数
+                for key in SERVICE_CONFIG_KEYS:
+                    config_copy.pop(key, None)
 
             # 创建新录音机
             print("创建新录音机...")
@@ -403,22 +502,9 @@ class STTService:
                         if queue_size > 20:
                             print(f"警告: 音频队列非常大 ({queue_size})")
 
-                    # 获取完整文本
-                    full_sentence = self.recorder.text()
-
-                    if full_sentence:
-                        # 调用直接注册的回调
-                        if self.full_sentence_callback:
-                            self.full_sentence_callback(full_sentence)
-                            
-                        # 调用通过register_callback注册的回调
-                        for callback in self.callbacks['on_final_result']:
-                            try:
-                                callback({'text': full_sentence, 'is_final': True})
-                            except Exception as e:
-                                print(f"执行完整句子回调时出错: {str(e)}")
-                                
-                        print(f"\rSentence: {full_sentence}")
+                    # 取出完整的录音后立即返回，由转写工作池在后台转写，
+                    # 完整句子按录音顺序回调 _handle_full_sentence
+                    self.recorder.text(self._handle_full_sentence)
 
                     retry_count = 0  # 成功操作后重置重试计数
                 elif not self.recorder_ready.is_set():
@@ -433,8 +519,36 @@ class STTService:
 
             time.sleep(0.1)  # 避免 CPU 占用过高
 
-    def feed_audio(self, audio_data, sample_rate):
-        """处理音频数据"""
+    def _handle_full_sentence(self, full_sentence):
+        """录音机输出完整句子的回调，同一时间只有一个回调在执行"""
+        if not full_sentence:
+            return
+        # 完整句子所属的语句编号，与实时增量补丁的 utterance 一致
+        self.finished_utterance = getattr(self.recorder, 'finished_recording_id', None)
+
+        # 调用直接注册的回调
+        if self.full_sentence_callback:
+            self.full_sentence_callback(full_sentence)
+
+        # 调用通过register_callback注册的回调
+        for callback in self.callbacks['on_final_result']:
+            try:
+                callback({'text': full_sentence, 'is_final': True,
+                          'utterance': self.finished_utterance})
+            except Exception as e:
+                print(f"执行完整句子回调时出错: {str(e)}")
+
+        print(f"\rSentence: {full_sentence}")
+
+    def feed_audio(self, audio_data, sample_rate, resampler=None):
+        """
+        处理音频数据
+
+        Args:
+            audio_data: 16位PCM音频数据（bytes 或 memoryview）
+            sample_rate: 音频采样率
+            resampler: 该输入流的流式重采样器（可选）
+        """
         # 检查录音机是否就绪
         if not self.recorder_ready.is_set():
             print("录音机未就绪，忽略接收到的音频数据")
@@ -453,7 +567,7 @@ class STTService:
 
         try:
             # 重采样
-            resampled_audio = self.decode_and_resample(audio_data, sample_rate)
+            resampled_audio = self.decode_and_resample(audio_data, sample_rate, resampler=resampler)
 
             # 检查音频队列状态
             if hasattr(self.recorder, 'audio_queue'):
@@ -625,6 +739,33 @@ class STTService:
         """检查录音机是否就绪"""
         return self.recorder_ready.is_set()
 
+    def get_vad_stats(self):
+        """获取 Silero VAD 工作线程的统计信息（判定次数、合并的数据块、推理延迟、实时率）及能量预门限的命中率"""
+        recorder = self.recorder
+        if recorder is None or not hasattr(recorder, 'get_vad_stats'):
+            return {}
+        return recorder.get_vad_stats()
+
+    def get_realtime_stats(self):
+        """获取实时转写的统计信息（每次转写解码的音频秒数、实时率、是否为增量模式、自适应节奏选择的暂停时间、快速定稿的判定和延迟、增量补丁节省的文本量）"""
+        recorder = self.recorder
+        if recorder is None or not hasattr(recorder, 'get_realtime_stats'):
+            return {}
+        stats = recorder.get_realtime_stats()
+        stats['delta'] = self.transcript_delta.get_stats()
+        return stats
+
+    def get_transcription_stats(self):
+        """获取主模型转写工作池的统计信息（每个工作进程的请求数、未完成请求、利用率、排队等待时间和平均批量大小）"""
+        recorder = self.recorder
+        if recorder is None or not hasattr(recorder, 'get_transcription_stats'):
+            return {}
+        return recorder.get_transcription_stats()
+
+    def get_realtime_snapshot(self):
+        """获取当前语句完整的实时文本状态，供新连接的客户端作为增量补丁的起点"""
+        return self.transcript_delta.snapshot()
+
     def shutdown(self):
         """关闭服务，清除启动失败记录"""
         self.is_running = False
@@ -0,0 +1,131 @@
+"""
+实时文本增量编码模块。
+实时转写每次更新都会发送整句文本，句子越长，每秒重复发送给每个客户端的数据越多。
+TranscriptDeltaEncoder 为每次更新生成一个补丁：语句编号、修订号、与上一版本相同的
+前缀长度和替换的后缀，客户端用上一版本文本的前 keep 个字符加上新的后缀得到完整文本。
+前缀长度按 UTF-16 编码单元计算，与 JavaScript 字符串的索引一致。
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+
+def _utf16_length(text: str) -> int:
+    """返回文本的 UTF-16 编码单元数（JavaScript 中的 String.length）"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """返回两个字符串相同前缀的字符数"""
+    limit = min(len(a), len(b))
+    if a[:limit] == b[:limit]:
+        return limit
+    # 二分查找第一个不同的位置，切片比较由 C 实现，比逐字符循环快
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class TranscriptDeltaEncoder:
+    """
+    实时文本的增量编码器
+    实时转写线程调用 encode，由 encode 的 utterance 参数（录音编号）切换语句，
+    新客户端连接时调用 snapshot，因此所有方法都加锁
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.utterance = 1  # 当前语句编号（录音编号）
+        self.revision = 0  # 当前语句的修订号，0 表示还没有实时文本
+        self.text = ''
+        self.stable = 0  # 文本中不再变化的前缀长度（UTF-16 编码单元）
+
+        # 统计信息：补丁和对应的完整文本事件的文本长度（字符）
+        self.patches = 0
+        self.patch_chars = 0
+        self.full_chars = 0
+
+    def encode(self, text: str, stable: Optional[str] = None,
+               utterance: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        生成一次实时更新的补丁
+
+        Args:
+            text: 新的实时文本
+            stable: 已确认不再变化的文本（按词稳定时提供），应为 text 的前缀
+            utterance: 文本所属的语句编号（录音编号），与当前语句不同时开始新的语句；
+                多个语句的完整句子可能同时在转写，不能等到完整句子输出后再切换
+
+        Returns:
+            补丁 {'utterance', 'rev', 'keep', 'text'[, 'stable']}，文本和稳定前缀都没有变化
+            或文本属于已经结束的语句时返回 None
+        """
+        with self._lock:
+            if utterance is not None and utterance != self.utterance:
+                if utterance < self.utterance:
+                    return None
+                self.utterance = utterance
+                self.revision = 0
+                self.text = ''
+                self.stable = 0
+
+            stable_length = 0
+            if stable and text.startswith(stable):
+                stable_length = _utf16_length(stable)
+
+            if text == self.text and stable_length == self.stable and self.revision:
+                return None
+
+            keep_chars = _common_prefix_length(self.text, text)
+            suffix = text[keep_chars:]
+            self.revision += 1
+            self.text = text
+            self.stable = stable_length
+
+            self.patches += 1
+            self.patch_chars += len(suffix)
+            self.full_chars += len(text)
+
+            patch = {
+                'utterance': self.utterance,
+                'rev': self.revision,
+                'keep': _utf16_length(text[:keep_chars]) if keep_chars else 0,
+                'text': suffix,
+            }
+            if stable is not None:
+                patch['stable'] = stable_length
+            return patch
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        返回当前语句的完整状态，用于新连接的客户端或客户端请求重新同步
+
+        Returns:
+            {'utterance', 'rev', 'keep': 0, 'text', 'stable', 'full': True}，
+            客户端收到 full 为 True 的补丁时直接替换本地状态
+        """
+        with self._lock:
+            return {
+                'utterance': self.utterance,
+                'rev': self.revision,
+                'keep': 0,
+                'text': self.text,
+                'stable': self.stable,
+                'full': True,
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取补丁数量、补丁与完整文本的字符数以及节省的比例"""
+        with self._lock:
+            return {
+                'patches': self.patches,
+                'patch_chars': self.patch_chars,
+                'full_chars': self.full_chars,
+                'saved_ratio': round(1 - self.patch_chars / self.full_chars, 3)
+                if self.full_chars else 0.0,
+            }
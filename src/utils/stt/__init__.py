@@ -4,4 +4,20 @@
 """
 
 from .audio_recorder import AudioToTextRecorder
-from .audio_input import AudioInput
\ No newline at end of file
+from .audio_input import AudioInput
+from .resampler import StreamingResampler
+from .ring_buffer import AudioRingBuffer
+from .shared_audio_queue import SharedMemoryAudioQueue
+from .vad_worker import SileroVadWorker
+from .silero_onnx import SileroOnnxVad, SileroVadSession
+from .webrtc_vad import WebRtcVadFrontEnd
+from .energy_gate import EnergyGate
+from .local_agreement import LocalAgreement
+from .utterance_buffer import UtteranceBuffer
+from .realtime_cadence import RealtimeCadenceController
+from .word_stabilizer import WordStabilizer
+from .fast_finalization import FastFinalizationPolicy
+from .transcription_pool import TranscriptionPool
+from .micro_batch import MicroBatchPipeline
+from .shared_audio_arena import SharedAudioArena
+from .transcription_requests import TranscriptionRequest
\ No newline at end of file
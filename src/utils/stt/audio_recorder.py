@@ -28,16 +28,34 @@ Author: Kolja Beigel
 
 from faster_whisper import WhisperModel, BatchedInferencePipeline
 from typing import Iterable, List, Optional, Union
+from .resampler import StreamingResampler
+from .ring_buffer import AudioRingBuffer
+from .shared_audio_queue import SharedMemoryAudioQueue
+from .vad_worker import SileroVadWorker
+from .silero_onnx import SileroOnnxVad, SileroVadSession
+from .webrtc_vad import WebRtcVadFrontEnd
+from .energy_gate import EnergyGate, margin_for_sensitivity
+from .local_agreement import LocalAgreement, Word
+from .word_stabilizer import WordStabilizer
+from .utterance_buffer import UtteranceBuffer
+from .realtime_cadence import RealtimeCadenceController
+from .fast_finalization import (FastFinalizationPolicy, RealtimeResult,
+                                average_logprob, same_words, REASON_ACCEPTED)
+from .transcription_pool import TranscriptionPool, RequestDropped
+from .transcription_requests import (RequestQueue, CancelRequest, KIND_EARLY, KIND_REALTIME,
+                                     STATUS_DROPPED, STATUS_CANCELLED, DROP_CANCELLED)
+from .micro_batch import MicroBatchPipeline, collect_batch
+from .shared_audio_arena import SharedAudioReader
 from openwakeword.model import Model
 import torch.multiprocessing as mp
-from scipy.signal import resample
 import signal as system_signal
 from ctypes import c_bool
-from scipy import signal
 import soundfile as sf
 import faster_whisper
 import openwakeword
+import concurrent.futures
 import collections
+import itertools
 import numpy as np
 import pvporcupine
 import traceback
@@ -64,6 +82,13 @@ INIT_MODEL_TRANSCRIPTION = "tiny"
 INIT_MODEL_TRANSCRIPTION_REALTIME = "tiny"
 INIT_REALTIME_PROCESSING_PAUSE = 0.2
 INIT_REALTIME_INITIAL_PAUSE = 0.2
+INIT_REALTIME_MAX_WINDOW = 15.0
+INIT_REALTIME_TARGET_INTERVAL = 0.3
+INIT_REALTIME_CPU_BUDGET = 0.5
+INIT_FAST_FINALIZATION_MIN_LOGPROB = -0.5
+INIT_FAST_FINALIZATION_MAX_SECONDS = 3.0
+INIT_TRANSCRIPTION_BATCH_WINDOW = 0.02
+INIT_TRANSCRIPTION_MAX_BATCH = 8
 INIT_SILERO_SENSITIVITY = 0.4
 INIT_WEBRTC_SENSITIVITY = 3
 INIT_POST_SPEECH_SILENCE_DURATION = 0.6
@@ -75,6 +100,9 @@ INIT_WAKE_WORD_ACTIVATION_DELAY = 0.0
 INIT_WAKE_WORD_TIMEOUT = 5.0
 INIT_WAKE_WORD_BUFFER_DURATION = 0.1
 ALLOWED_LATENCY_LIMIT = 100
+SHARED_MEMORY_QUEUE_MIN_SLOTS = 256
+# Seconds of float32 audio the transcription requests' shared memory holds
+SHARED_AUDIO_ARENA_SECONDS = 300
 
 TIME_SLEEP = 0.02
 SAMPLE_RATE = 16000
@@ -85,11 +113,14 @@ INIT_HANDLE_BUFFER_OVERFLOW = False
 if platform.system() != 'Darwin':
     INIT_HANDLE_BUFFER_OVERFLOW = True
 
+# Ids of the recordings of all recorder instances
+_recording_ids = itertools.count(1)
+
 
 class TranscriptionWorker:
     def __init__(self, conn, stdout_pipe, model_path, download_root, compute_type, gpu_device_index, device,
                  ready_event, shutdown_event, interrupt_stop_event, beam_size, initial_prompt, suppress_tokens,
-                 batch_size):
+                 batch_size, batch_window=0.0, max_batch_requests=1):
         self.conn = conn
         self.stdout_pipe = stdout_pipe
         self.model_path = model_path
@@ -104,7 +135,16 @@ class TranscriptionWorker:
         self.initial_prompt = initial_prompt
         self.suppress_tokens = suppress_tokens
         self.batch_size = batch_size
-        self.queue = queue.Queue()
+        # Requests arriving within batch_window seconds of each other are
+        # decoded together (needs the batched pipeline)
+        self.batch_window = batch_window if batch_size > 0 else 0.0
+        self.max_batch_requests = max(int(max_batch_requests), 1) if batch_size > 0 else 1
+        # Most urgent request first, outdated requests are answered as dropped
+        self.queue = RequestQueue(self._drop)
+        # The polling thread answers dropped requests, the main loop the rest
+        self.send_lock = threading.Lock()
+        # request_id -> Event set when the parent cancels the request
+        self.cancel_events = {}
 
     def custom_print(self, *args, **kwargs):
         message = ' '.join(map(str, args))
@@ -113,17 +153,142 @@ class TranscriptionWorker:
         except (BrokenPipeError, EOFError, OSError):
             pass
 
+    def _send(self, message):
+        with self.send_lock:
+            self.conn.send(message)
+
+    def _drop(self, request, reason):
+        logging.debug(f"Dropping {request.kind} transcription request "
+                      f"{request.request_id}: {reason}")
+        self.cancel_events.pop(request.request_id, None)
+        status = STATUS_CANCELLED if reason == DROP_CANCELLED else STATUS_DROPPED
+        try:
+            self._send((request.request_id, status, reason, time.time(), 0.0, 0))
+        except (BrokenPipeError, EOFError, OSError):
+            pass
+
+    def _cancel(self, request_id):
+        event = self.cancel_events.get(request_id)
+        if event is None:
+            # Already answered
+            return
+        event.set()
+        # A queued request is answered right away, a running decode stops
+        # at its next segment
+        self.queue.cancel(request_id)
+
+    def _is_cancelled(self, request_id):
+        event = self.cancel_events.get(request_id)
+        return event is not None and event.is_set()
+
+    def _join_segments(self, segments, request_id):
+        """
+        Joins the text of lazily decoded segments. Stops decoding and
+        returns None as soon as the request is cancelled.
+        """
+        texts = []
+        while not self._is_cancelled(request_id):
+            segment = next(segments, None)
+            if segment is None:
+                return " ".join(texts).strip()
+            texts.append(segment.text)
+        segments.close()
+        return None
+
     def poll_connection(self):
         while not self.shutdown_event.is_set():
             if self.conn.poll(0.01):
                 try:
                     data = self.conn.recv()
-                    self.queue.put(data)
+                    if isinstance(data, CancelRequest):
+                        self._cancel(data.request_id)
+                    else:
+                        self.cancel_events[data.request_id] = threading.Event()
+                        self.queue.put(data)
                 except Exception as e:
                     logging.error(f"Error receiving data from connection: {e}", exc_info=True)
             else:
                 time.sleep(TIME_SLEEP)
 
+    def _transcribe_batch(self, model, batch):
+        """
+        Transcribes a batch of (request_id, audio, language) requests.
+
+        Returns:
+            list: ('success', (transcription, info)), ('error', message) or
+              (STATUS_CANCELLED, DROP_CANCELLED) for every request.
+        """
+        cancelled = (STATUS_CANCELLED, DROP_CANCELLED)
+        if self.batch_size <= 0:
+            results = []
+            for request_id, audio, language in batch:
+                if self._is_cancelled(request_id):
+                    results.append(cancelled)
+                    continue
+                try:
+                    logging.debug(f"Transcribing audio with language {language}")
+                    segments, info = model.transcribe(
+                        audio,
+                        language=language if language else None,
+                        beam_size=self.beam_size,
+                        initial_prompt=self.initial_prompt,
+                        suppress_tokens=self.suppress_tokens
+                    )
+                    transcription = self._join_segments(segments, request_id)
+                    if transcription is None:
+                        logging.debug(f"Transcription request {request_id} cancelled")
+                        results.append(cancelled)
+                        continue
+                    logging.debug(f"Final text detected with main model: {transcription}")
+                    results.append(('success', (transcription, info)))
+                except Exception as e:
+                    logging.error(f"General error in transcription: {e}", exc_info=True)
+                    results.append(('error', str(e)))
+            return results
+
+        results = [None] * len(batch)
+        prepared = []
+        for index, (request_id, audio, language) in enumerate(batch):
+            if self._is_cancelled(request_id):
+                results[index] = cancelled
+                continue
+            try:
+                logging.debug(f"Transcribing audio with language {language}")
+                utterance, info = model.prepare(
+                    audio,
+                    language=language if language else None,
+                    beam_size=self.beam_size,
+                    initial_prompt=self.initial_prompt,
+                    suppress_tokens=self.suppress_tokens
+                )
+                prepared.append((index, utterance, info))
+            except Exception as e:
+                logging.error(f"General error in transcription: {e}", exc_info=True)
+                results[index] = ('error', str(e))
+
+        if prepared:
+            if len(batch) > 1:
+                logging.debug(f"Decoding {len(prepared)} utterances in one batch")
+            try:
+                request_ids = [batch[index][0] for index, _, _ in prepared]
+                segment_lists = model.decode(
+                    [utterance for _, utterance, _ in prepared],
+                    batch_size=self.batch_size,
+                    cancelled=lambda position: self._is_cancelled(request_ids[position]))
+                for (index, _, info), segments in zip(prepared, segment_lists):
+                    if self._is_cancelled(batch[index][0]):
+                        logging.debug(f"Transcription request {batch[index][0]} cancelled")
+                        results[index] = cancelled
+                        continue
+                    transcription = " ".join(seg.text for seg in segments).strip()
+                    logging.debug(f"Final text detected with main model: {transcription}")
+                    results[index] = ('success', (transcription, info))
+            except Exception as e:
+                logging.error(f"General error in transcription: {e}", exc_info=True)
+                for index, _, _ in prepared:
+                    results[index] = ('error', str(e))
+        return results
+
     def run(self):
         if __name__ == "__main__":
             system_signal.signal(system_signal.SIGINT, system_signal.SIG_IGN)
@@ -141,7 +306,7 @@ class TranscriptionWorker:
             )
             # Create a short dummy audio array, for example 1 second of silence at 16 kHz
             if self.batch_size > 0:
-                model = BatchedInferencePipeline(model=model)
+                model = MicroBatchPipeline(model=model)
 
             # Run a warm-up transcription
             current_dir = os.path.dirname(os.path.realpath(__file__))
@@ -149,7 +314,11 @@ class TranscriptionWorker:
                 current_dir, "warmup_audio.wav"
             )
             warmup_audio_data, _ = sf.read(warmup_audio_path, dtype="float32")
-            segments, info = model.transcribe(warmup_audio_data, language="en", beam_size=1)
+            if self.batch_size > 0:
+                prepared, info = model.prepare(warmup_audio_data, language="en", beam_size=1)
+                segments = model.decode([prepared])[0]
+            else:
+                segments, info = model.transcribe(warmup_audio_data, language="en", beam_size=1)
             model_warmup_transcription = " ".join(segment.text for segment in segments)
         except Exception as e:
             logging.exception(f"Error initializing main faster_whisper transcription model: {e}")
@@ -161,37 +330,27 @@ class TranscriptionWorker:
         # Start the polling thread
         polling_thread = threading.Thread(target=self.poll_connection)
         polling_thread.start()
+        # Maps audio passed through shared memory without copying it
+        shared_audio = SharedAudioReader()
 
         try:
             while not self.shutdown_event.is_set():
                 try:
-                    audio, language = self.queue.get(timeout=0.1)
-                    try:
-                        logging.debug(f"Transcribing audio with language {language}")
-                        if self.batch_size > 0:
-                            segments, info = model.transcribe(
-                                audio,
-                                language=language if language else None,
-                                beam_size=self.beam_size,
-                                initial_prompt=self.initial_prompt,
-                                suppress_tokens=self.suppress_tokens,
-                                batch_size=self.batch_size
-                            )
-                        else:
-                            segments, info = model.transcribe(
-                                audio,
-                                language=language if language else None,
-                                beam_size=self.beam_size,
-                                initial_prompt=self.initial_prompt,
-                                suppress_tokens=self.suppress_tokens
-                            )
-
-                        transcription = " ".join(seg.text for seg in segments).strip()
-                        logging.debug(f"Final text detected with main model: {transcription}")
-                        self.conn.send(('success', (transcription, info)))
-                    except Exception as e:
-                        logging.error(f"General error in transcription: {e}", exc_info=True)
-                        self.conn.send(('error', str(e)))
+                    request = self.queue.get(timeout=0.1)
+                    batch = [request]
+                    if self.max_batch_requests > 1:
+                        batch = collect_batch(self.queue, request, self.batch_window,
+                                              self.max_batch_requests)
+                    started = time.time()
+                    results = self._transcribe_batch(
+                        model, [(request.request_id, shared_audio.view(request.audio),
+                                 request.language) for request in batch])
+                    # Every request of a batch is charged an equal share of it
+                    inference_time = (time.time() - started) / len(batch)
+                    for request, (status, result) in zip(batch, results):
+                        self.cancel_events.pop(request.request_id, None)
+                        self._send((request.request_id, status, result,
+                                    started, inference_time, len(batch)))
                 except queue.Empty:
                     continue
                 except KeyboardInterrupt:
@@ -206,6 +365,7 @@ class TranscriptionWorker:
             self.stdout_pipe.close()
             self.shutdown_event.set()  # Ensure the polling thread will stop
             polling_thread.join()  # Wait for the polling thread to finish
+            shared_audio.close()
 
 
 class bcolors:
@@ -238,6 +398,9 @@ class AudioToTextRecorder:
                  spinner=True,
                  level=logging.WARNING,
                  batch_size: int = 16,
+                 transcription_workers: int = 1,
+                 transcription_batch_window: float = INIT_TRANSCRIPTION_BATCH_WINDOW,
+                 transcription_max_batch: int = INIT_TRANSCRIPTION_MAX_BATCH,
 
                  # Realtime transcription parameters
                  enable_realtime_transcription=False,
@@ -247,13 +410,27 @@ class AudioToTextRecorder:
                  init_realtime_after_seconds=INIT_REALTIME_INITIAL_PAUSE,
                  on_realtime_transcription_update=None,
                  on_realtime_transcription_stabilized=None,
+                 on_realtime_transcription_words=None,
                  realtime_batch_size: int = 16,
+                 realtime_word_stabilization: bool = False,
+                 realtime_incremental: bool = False,
+                 realtime_max_window_seconds: float = INIT_REALTIME_MAX_WINDOW,
+                 realtime_adaptive_cadence: bool = False,
+                 realtime_target_interval: float = INIT_REALTIME_TARGET_INTERVAL,
+                 realtime_cpu_budget: float = INIT_REALTIME_CPU_BUDGET,
+                 fast_finalization: bool = False,
+                 fast_finalization_min_logprob: float = INIT_FAST_FINALIZATION_MIN_LOGPROB,
+                 fast_finalization_max_seconds: float = INIT_FAST_FINALIZATION_MAX_SECONDS,
+                 on_transcription_correction=None,
 
                  # Voice activation parameters
                  silero_sensitivity: float = INIT_SILERO_SENSITIVITY,
                  silero_use_onnx: bool = False,
+                 silero_model_path: str = None,
                  silero_deactivity_detection: bool = False,
                  webrtc_sensitivity: int = INIT_WEBRTC_SENSITIVITY,
+                 use_energy_gate: bool = False,
+                 energy_gate_margin_db: float = None,
                  post_speech_silence_duration: float = (
                          INIT_POST_SPEECH_SILENCE_DURATION
                  ),
@@ -300,6 +477,8 @@ class AudioToTextRecorder:
                  allowed_latency_limit: int = ALLOWED_LATENCY_LIMIT,
                  no_log_file: bool = False,
                  use_extended_logging: bool = False,
+                 use_shared_memory_queue: bool = False,
+                 use_shared_memory_transcription: bool = False,
                  ):
         """
         Initializes an audio recorder and  transcription
@@ -350,6 +529,21 @@ class AudioToTextRecorder:
             state.
         - level (int, default=logging.WARNING): Logging level.
         - batch_size (int, default=16): Batch size for the main transcription
+        - transcription_workers (int, default=1): Number of main model
+            transcription workers. Final transcriptions of overlapping
+            recordings (several speakers or feeds) are decoded in parallel
+            and sent to the worker with the fewest pending requests. Each
+            worker loads its own model; if gpu_device_index is a list, the
+            workers are spread over the listed GPUs.
+        - transcription_batch_window (float, default=0.02): Time in seconds
+            a transcription worker waits after a request for more requests
+            to decode in the same batch. Final transcriptions of speakers
+            who stop at about the same time then share one encoder and
+            decoder call, each request waits at most this long. Needs
+            batch_size > 0, set to 0 to only batch requests already waiting.
+        - transcription_max_batch (int, default=8): Maximum number of
+            requests a transcription worker decodes in one batch. Set to 1
+            to disable batching across requests.
         - enable_realtime_transcription (bool, default=False): Enables or
             disables real-time transcription of audio. When set to True, the
             audio will be transcribed continuously as it is being recorded.
@@ -381,8 +575,56 @@ class AudioToTextRecorder:
             triggered when the transcribed text stabilizes in quality. The
             stabilized text is generally more accurate but may arrive with a
             slight delay compared to the regular real-time updates.
+        - on_realtime_transcription_words = A callback function that is
+            triggered with two arguments, the committed text and the
+            volatile tail, when real-time word stabilization is enabled.
+            The committed text only ever grows during a recording, the tail
+            may still change with the next update.
         - realtime_batch_size (int, default=16): Batch size for the real-time
             transcription model.
+        - realtime_word_stabilization (bool, default=False): Stabilize the
+            real-time text on word timestamps instead of comparing the last
+            two transcripts character by character. Words that matched in
+            consecutive passes and end well before the end of the audio are
+            committed. Requires the dedicated real-time model
+            (use_main_model_for_realtime=False).
+        - realtime_incremental (bool, default=False): Transcribe only the
+            audio after the last committed word on each real-time pass
+            instead of the whole recording. Words two consecutive passes
+            agree on are committed, cut from the window and used as prompt
+            for the next pass. Requires the dedicated real-time model
+            (use_main_model_for_realtime=False).
+        - realtime_max_window_seconds (float, default=15.0): In incremental
+            mode, words of the latest pass are committed without agreement
+            once the uncommitted window grows longer than this.
+        - realtime_adaptive_cadence (bool, default=False): Choose the pause
+            between real-time passes from the measured inference time
+            instead of using realtime_processing_pause as a fixed value
+            (it becomes the minimum pause). Passes back off while the main
+            model has queued work.
+        - realtime_target_interval (float, default=0.3): Adaptive cadence:
+            desired time in seconds between the starts of two passes.
+        - realtime_cpu_budget (float, default=0.5): Adaptive cadence: share
+            of the time the real-time model may spend in inference.
+        - fast_finalization (bool, default=False): Return the last
+            real-time result as the final text of a short utterance when
+            that pass saw all of the speech and was confident, instead of
+            waiting for the main model. The main model still transcribes
+            the audio in the background and on_transcription_correction is
+            called if its words differ. Requires the dedicated real-time
+            model (use_main_model_for_realtime=False) and is disabled with
+            realtime_incremental, whose passes only score the audio after
+            the last committed word.
+        - fast_finalization_min_logprob (float, default=-0.5): Fast
+            finalization: minimum average log probability of the real-time
+            pass.
+        - fast_finalization_max_seconds (float, default=3.0): Fast
+            finalization: longest utterance in seconds that may be
+            finalized from the real-time result.
+        - on_transcription_correction = A callback function that is
+            triggered with two arguments, the fast final text and the main
+            model's text, when the background check of a fast finalized
+            utterance disagrees with it.
         - silero_sensitivity (float, default=SILERO_SENSITIVITY): Sensitivity
             for the Silero Voice Activity Detection model ranging from 0
             (least sensitive) to 1 (most sensitive). Default is 0.5.
@@ -390,6 +632,10 @@ class AudioToTextRecorder:
             pre-trained model from Silero in the ONNX (Open Neural Network
             Exchange) format instead of the PyTorch format. This is
             recommended for faster performance.
+        - silero_model_path (str, default=None): Path to a local Silero VAD
+            ONNX model (silero_vad.onnx). If set, the model is run directly
+            with onnxruntime on numpy arrays and torch.hub is not used, so
+            no hub cache or network access is needed at startup.
         - silero_deactivity_detection (bool, default=False): Enables the Silero
             model for end-of-speech detection. More robust against background
             noise. Utilizes additional GPU resources but improves accuracy in
@@ -400,6 +646,15 @@ class AudioToTextRecorder:
             for the WebRTC Voice Activity Detection engine ranging from 0
             (least aggressive / most sensitive) to 3 (most aggressive,
             least sensitive). Default is 3.
+        - use_energy_gate (bool, default=False): Runs a cheap energy
+            detector with an adaptive noise floor before the VADs. While
+            listening for speech, chunks clearly below the floor skip WebRTC
+            and Silero VAD entirely. The end of a recording is still decided
+            by the VADs alone.
+        - energy_gate_margin_db (float, default=None): Level above the
+            noise floor in dB at which the energy gate lets chunks through
+            to the VADs. If None, it is derived from webrtc_sensitivity and
+            silero_sensitivity.
         - post_speech_silence_duration (float, default=0.2): Duration in
             seconds of silence that must follow speech before the recording
             is considered to be completed. This ensures that any brief
@@ -510,6 +765,20 @@ class AudioToTextRecorder:
         - use_extended_logging (bool, default=False): Writes extensive
             log messages for the recording worker, that processes the audio
             chunks.
+        - use_shared_memory_queue (bool, default=False): Passes audio
+            chunks from the microphone reader and feed_audio() to the
+            recording worker through a lock-free ring in shared memory
+            instead of a multiprocessing queue. Avoids pickling every chunk
+            and makes the queue fill level an O(1) read, which also allows
+            handle_buffer_overflow on macOS. The ring holds
+            max(256, 4 * allowed_latency_limit) chunks; chunks arriving
+            while it is full are dropped and counted.
+        - use_shared_memory_transcription (bool, default=False): Stores the
+            audio of transcription requests in a shared memory arena and
+            sends only a descriptor to the transcription workers, which
+            read it without copying. The arena holds 300 seconds of audio
+            and each region is freed when its transcription returns;
+            requests that do not fit are sent through the pipe.
 
         Raises:
             Exception: Errors related to initializing transcription
@@ -562,16 +831,88 @@ class AudioToTextRecorder:
         self.on_realtime_transcription_stabilized = (
             on_realtime_transcription_stabilized
         )
+        self.on_realtime_transcription_words = on_realtime_transcription_words
         self.debug_mode = debug_mode
         self.handle_buffer_overflow = handle_buffer_overflow
         self.beam_size = beam_size
         self.beam_size_realtime = beam_size_realtime
         self.allowed_latency_limit = allowed_latency_limit
         self.batch_size = batch_size
+        self.transcription_batch_window = transcription_batch_window
+        self.transcription_max_batch = transcription_max_batch
+        if transcription_max_batch > 1 and batch_size <= 0:
+            logging.warning("Batching transcription requests needs the "
+                            "batched pipeline (batch_size > 0), decoding "
+                            "requests one by one")
         self.realtime_batch_size = realtime_batch_size
+        self.realtime_incremental = realtime_incremental
+        if realtime_incremental and use_main_model_for_realtime:
+            logging.warning("Incremental real-time transcription needs word "
+                            "timestamps from the dedicated real-time model, "
+                            "falling back to full transcription passes")
+            self.realtime_incremental = False
+        self.realtime_max_window_seconds = realtime_max_window_seconds
+        self.realtime_word_stabilization = realtime_word_stabilization
+        if realtime_word_stabilization and use_main_model_for_realtime:
+            logging.warning("Real-time word stabilization needs word "
+                            "timestamps from the dedicated real-time model, "
+                            "falling back to text based stabilization")
+            self.realtime_word_stabilization = False
+        self.realtime_stabilizer = WordStabilizer()
+        self.realtime_agreement = LocalAgreement()
+        self.realtime_cadence = None
+        if realtime_adaptive_cadence:
+            self.realtime_cadence = RealtimeCadenceController(
+                target_interval=realtime_target_interval,
+                cpu_budget=realtime_cpu_budget,
+                min_pause=realtime_processing_pause)
+        self.fast_finalization = None
+        if fast_finalization:
+            if use_main_model_for_realtime or not enable_realtime_transcription:
+                logging.warning("Fast finalization needs the log probabilities "
+                                "of the dedicated real-time model, always "
+                                "waiting for the main model")
+            elif self.realtime_incremental:
+                # An incremental pass only scores the uncommitted tail, not
+                # the whole utterance its text is returned for
+                logging.warning("Fast finalization needs real-time passes over "
+                                "the whole recording and is disabled in "
+                                "incremental mode, always waiting for the "
+                                "main model")
+            else:
+                self.fast_finalization = FastFinalizationPolicy(
+                    min_avg_logprob=fast_finalization_min_logprob,
+                    max_duration=fast_finalization_max_seconds,
+                    sample_rate=SAMPLE_RATE)
+        self.on_transcription_correction = on_transcription_correction
+        # Last real-time result of the current recording, and the same for
+        # the last stopped recording together with the position where its
+        # trailing silence started
+        self.realtime_final_candidate = None
+        self.speech_end_samples = None
+        self.last_realtime_final_candidate = None
+        self.last_speech_end_samples = None
+        self._realtime_audio_seconds = 0.0
+        self._realtime_pass_started = 0.0
+        self.realtime_pass_stats = {
+            'passes': 0,
+            'decoded_seconds_last': 0.0,
+            'decoded_seconds_avg': 0.0,
+            'decoded_seconds_max': 0.0,
+            'real_time_factor_last': 0.0,
+            'real_time_factor_avg': 0.0,
+        }
 
         self.level = level
-        self.audio_queue = mp.Queue()
+        self.use_shared_memory_queue = use_shared_memory_queue
+        if self.use_shared_memory_queue:
+            self.audio_queue = SharedMemoryAudioQueue(
+                slot_size=2 * buffer_size,
+                slots=max(SHARED_MEMORY_QUEUE_MIN_SLOTS,
+                          4 * int(allowed_latency_limit))
+            )
+        else:
+            self.audio_queue = mp.Queue()
         self.buffer_size = buffer_size
         self.sample_rate = sample_rate
         self.recording_start_time = 0
@@ -580,7 +921,10 @@ class AudioToTextRecorder:
         self.last_recording_stop_time = 0
         self.wake_word_detect_time = 0
         self.silero_check_time = 0
-        self.silero_working = False
+        self.silero_lock = threading.Lock()
+        self.silero_resampler = None
+        self.silero_vad_worker = None
+        self.energy_gate = None
         self.speech_end_silence_start = 0
         self.silero_sensitivity = silero_sensitivity
         self.silero_deactivity_detection = silero_deactivity_detection
@@ -593,7 +937,6 @@ class AudioToTextRecorder:
         self.realtime_stabilized_text = ""
         self.realtime_stabilized_safetext = ""
         self.is_webrtc_speech_active = False
-        self.is_silero_speech_active = False
         self.recording_thread = None
         self.realtime_thread = None
         self.audio_interface = None
@@ -613,9 +956,21 @@ class AudioToTextRecorder:
         self.detected_language_probability = 0
         self.detected_realtime_language = None
         self.detected_realtime_language_probability = 0
-        self.transcription_lock = threading.Lock()
         self.shutdown_lock = threading.Lock()
-        self.transcribe_count = 0
+        # Pending main model transcription started on silence, and the same
+        # for the last stopped recording
+        self.early_transcription = None
+        self.last_early_transcription = None
+        # Recordings are numbered so results of overlapping final
+        # transcriptions can be told apart. The numbers keep increasing
+        # when a recorder is replaced
+        self.recording_id = 0
+        self.last_recording_id = 0
+        self.finished_recording_id = 0
+        # text() callbacks run in recording order
+        self._text_order = threading.Condition()
+        self._text_tickets = itertools.count()
+        self._text_next_ticket = 0
         self.print_transcription_time = print_transcription_time
         self.early_transcription_on_silence = early_transcription_on_silence
         self.use_extended_logging = use_extended_logging
@@ -670,32 +1025,15 @@ class AudioToTextRecorder:
 
         self.interrupt_stop_event = mp.Event()
         self.was_interrupted = mp.Event()
-        self.main_transcription_ready_event = mp.Event()
-        self.parent_transcription_pipe, child_transcription_pipe = mp.Pipe()
-        self.parent_stdout_pipe, child_stdout_pipe = mp.Pipe()
 
         # Set device for model
         self.device = "cuda" if self.device == "cuda" and torch.cuda.is_available() else "cpu"
 
-        self.transcript_process = self._start_thread(
-            target=AudioToTextRecorder._transcription_worker,
-            args=(
-                child_transcription_pipe,
-                child_stdout_pipe,
-                self.main_model_type,
-                self.download_root,
-                self.compute_type,
-                self.gpu_device_index,
-                self.device,
-                self.main_transcription_ready_event,
-                self.shutdown_event,
-                self.interrupt_stop_event,
-                self.beam_size,
-                self.initial_prompt,
-                self.suppress_tokens,
-                self.batch_size
-            )
-        )
+        self.transcription_pool_size = max(int(transcription_workers), 1)
+        self.transcription_pool = TranscriptionPool(
+            self.transcription_pool_size, self._start_transcription_worker,
+            arena_size=SHARED_AUDIO_ARENA_SECONDS * SAMPLE_RATE * 4
+            if use_shared_memory_transcription else 0)
 
         # Start audio data reading process
         if self.use_microphone.value:
@@ -855,6 +1193,15 @@ class AudioToTextRecorder:
                          )
             self.webrtc_vad_model = webrtcvad.Vad()
             self.webrtc_vad_model.set_mode(webrtc_sensitivity)
+            self.webrtc_vad_frontend = WebRtcVadFrontEnd(
+                self.webrtc_vad_model, self.sample_rate)
+            if use_energy_gate:
+                if energy_gate_margin_db is None:
+                    energy_gate_margin_db = margin_for_sensitivity(
+                        webrtc_sensitivity, silero_sensitivity)
+                self.energy_gate = EnergyGate(energy_gate_margin_db)
+                logging.info("Energy pre-gate enabled with a margin of "
+                             f"{energy_gate_margin_db:.1f} dB")
 
         except Exception as e:
             logging.exception("Error initializing WebRTC voice "
@@ -868,12 +1215,18 @@ class AudioToTextRecorder:
 
         # Setup voice activity detection model Silero VAD
         try:
-            self.silero_vad_model, _ = torch.hub.load(
-                repo_or_dir="snakers4/silero-vad",
-                model="silero_vad",
-                verbose=False,
-                onnx=silero_use_onnx
-            )
+            if silero_model_path:
+                self.silero_vad_model = SileroOnnxVad(
+                    silero_model_path,
+                    sample_rate=SAMPLE_RATE
+                ).create_session()
+            else:
+                self.silero_vad_model, _ = torch.hub.load(
+                    repo_or_dir="snakers4/silero-vad",
+                    model="silero_vad",
+                    verbose=False,
+                    onnx=silero_use_onnx
+                )
 
         except Exception as e:
             logging.exception(f"Error initializing Silero VAD "
@@ -885,6 +1238,16 @@ class AudioToTextRecorder:
                       "engine initialized successfully"
                       )
 
+        # Chunks at other rates are converted for Silero as one stream, its
+        # history is reset together with the model state
+        self.silero_resampler = StreamingResampler(self.sample_rate, SAMPLE_RATE)
+
+        # Silero checks triggered by WebRTC VAD run on one persistent thread
+        self.silero_vad_worker = SileroVadWorker(
+            self._is_silero_speech,
+            chunk_duration=self.buffer_size / self.sample_rate
+        )
+
         self.audio_buffer = collections.deque(
             maxlen=int((self.sample_rate // self.buffer_size) *
                        self.pre_recording_buffer_duration)
@@ -893,8 +1256,8 @@ class AudioToTextRecorder:
             maxlen=int((self.sample_rate // self.buffer_size) *
                        0.3)
         )
-        self.frames = []
-        self.last_frames = []
+        self.frames = UtteranceBuffer()
+        self.last_frames = UtteranceBuffer()
 
         # Recording control flags
         self.is_recording = False
@@ -914,7 +1277,7 @@ class AudioToTextRecorder:
 
         # Wait for transcription models to start
         logging.debug('Waiting for main transcription model to start')
-        self.main_transcription_ready_event.wait()
+        self.transcription_pool.wait_ready()
         logging.debug('Main transcription model ready')
 
         self.stdout_thread = threading.Thread(target=self._read_stdout)
@@ -949,10 +1312,11 @@ class AudioToTextRecorder:
     def _read_stdout(self):
         while not self.shutdown_event.is_set():
             try:
-                if self.parent_stdout_pipe.poll(0.1):
-                    logging.debug("Receive from stdout pipe")
-                    message = self.parent_stdout_pipe.recv()
-                    logging.info(message)
+                for stdout_pipe in self.transcription_pool.stdout_pipes:
+                    if stdout_pipe.poll(0.1 / self.transcription_pool.size):
+                        logging.debug("Receive from stdout pipe")
+                        message = stdout_pipe.recv()
+                        logging.info(message)
             except (BrokenPipeError, EOFError, OSError):
                 # The pipe probably has been closed, so we ignore the error
                 pass
@@ -965,6 +1329,38 @@ class AudioToTextRecorder:
                 break
             time.sleep(0.1)
 
+    def _start_transcription_worker(self, index, conn, stdout_pipe, ready_event):
+        """
+        Starts one main model TranscriptionWorker of the transcription pool.
+        With several workers and a list of GPU indices, the workers are
+        assigned to the GPUs round robin.
+        """
+        gpu_device_index = self.gpu_device_index
+        if isinstance(gpu_device_index, list) and len(gpu_device_index) > 1 \
+                and self.transcription_pool_size > 1:
+            gpu_device_index = [gpu_device_index[index % len(gpu_device_index)]]
+        return self._start_thread(
+            target=AudioToTextRecorder._transcription_worker,
+            args=(
+                conn,
+                stdout_pipe,
+                self.main_model_type,
+                self.download_root,
+                self.compute_type,
+                gpu_device_index,
+                self.device,
+                ready_event,
+                self.shutdown_event,
+                self.interrupt_stop_event,
+                self.beam_size,
+                self.initial_prompt,
+                self.suppress_tokens,
+                self.batch_size,
+                self.transcription_batch_window,
+                self.transcription_max_batch
+            )
+        )
+
     def _transcription_worker(*args, **kwargs):
         worker = TranscriptionWorker(*args, **kwargs)
         worker.run()
@@ -1001,7 +1397,6 @@ class AudioToTextRecorder:
         """
         import pyaudio
         import numpy as np
-        from scipy import signal
 
         if __name__ == '__main__':
             system_signal.signal(system_signal.SIGINT, system_signal.SIG_IGN)
@@ -1116,37 +1511,37 @@ class AudioToTextRecorder:
 
         def preprocess_audio(chunk, original_sample_rate, target_sample_rate):
             """Preprocess audio chunk similar to feed_audio method."""
+            nonlocal resampler
+            if (resampler is None
+                    or resampler.source_rate != original_sample_rate
+                    or resampler.target_rate != target_sample_rate):
+                resampler = StreamingResampler(original_sample_rate, target_sample_rate)
+
             if isinstance(chunk, np.ndarray):
                 # Handle stereo to mono conversion if necessary
                 if chunk.ndim == 2:
                     chunk = np.mean(chunk, axis=1)
 
-                # Resample to target_sample_rate if necessary
-                if original_sample_rate != target_sample_rate:
-                    num_samples = int(len(chunk) * target_sample_rate / original_sample_rate)
-                    chunk = signal.resample(chunk, num_samples)
+                # Resample to target_sample_rate if necessary,
+                # keeping the filter state between chunks
+                chunk = resampler.process(chunk)
 
                 # Ensure data type is int16
                 chunk = chunk.astype(np.int16)
             else:
-                # If chunk is bytes, convert to numpy array
-                chunk = np.frombuffer(chunk, dtype=np.int16)
-
-                # Resample if necessary
-                if original_sample_rate != target_sample_rate:
-                    num_samples = int(len(chunk) * target_sample_rate / original_sample_rate)
-                    chunk = signal.resample(chunk, num_samples)
-                    chunk = chunk.astype(np.int16)
+                # If chunk is bytes, resample the 16 bit PCM directly
+                chunk = resampler.process(chunk)
 
             return chunk.tobytes()
 
         audio_interface = None
         stream = None
         device_sample_rate = None
+        resampler = None
         chunk_size = 1024  # Increased chunk size for better performance
 
         def setup_audio():
-            nonlocal audio_interface, stream, device_sample_rate, input_device_index
+            nonlocal audio_interface, stream, device_sample_rate, input_device_index, resampler
             try:
                 if audio_interface is None:
                     audio_interface = pyaudio.PyAudio()
@@ -1170,6 +1565,8 @@ class AudioToTextRecorder:
                         device_sample_rate = rate
                         stream = initialize_audio_stream(audio_interface, device_sample_rate, chunk_size)
                         if stream is not None:
+                            # New stream, start with a fresh filter history
+                            resampler = StreamingResampler(device_sample_rate, target_sample_rate)
                             logging.debug(
                                 f"Audio recording initialized successfully at {device_sample_rate} Hz, reading {chunk_size} frames at a time")
                             # logging.error(f"Audio recording initialized successfully at {device_sample_rate} Hz, reading {chunk_size} frames at a time")
@@ -1190,8 +1587,10 @@ class AudioToTextRecorder:
         if not setup_audio():
             raise Exception("Failed to set up audio recording.")
 
-        buffer = bytearray()
         silero_buffer_size = 2 * buffer_size  # silero complains if too short
+        # The ring buffer counts samples, silero_buffer_size is in bytes
+        window_samples = silero_buffer_size // 2
+        buffer = AudioRingBuffer(4 * window_samples)
 
         time_since_last_buffer_message = 0
 
@@ -1202,14 +1601,9 @@ class AudioToTextRecorder:
 
                     if use_microphone.value:
                         processed_data = preprocess_audio(data, device_sample_rate, target_sample_rate)
-                        buffer += processed_data
-
-                        # Check if the buffer has reached or exceeded the silero_buffer_size
-                        while len(buffer) >= silero_buffer_size:
-                            # Extract silero_buffer_size amount of data from the buffer
-                            to_process = buffer[:silero_buffer_size]
-                            buffer = buffer[silero_buffer_size:]
 
+                        # Take every complete silero_buffer_size window out of the ring buffer
+                        for to_process in buffer.windows(processed_data, window_samples):
                             # Feed the extracted data to the audio_queue
                             if time_since_last_buffer_message:
                                 time_passed = time.time() - time_since_last_buffer_message
@@ -1276,8 +1670,8 @@ class AudioToTextRecorder:
             logging.debug("Audio data worker process finished due to KeyboardInterrupt")
         finally:
             # After recording stops, feed any remaining audio data
-            if buffer:
-                audio_queue.put(bytes(buffer))
+            if len(buffer):
+                audio_queue.put(bytes(buffer.read_all()))
 
             try:
                 if stream:
@@ -1305,6 +1699,9 @@ class AudioToTextRecorder:
         self.was_interrupted.clear()
         if self.is_recording:  # if recording, make sure to stop the recorder
             self.stop()
+        # The aborted recording is never transcribed
+        self._cancel_transcription(self.last_early_transcription)
+        self.last_early_transcription = None
 
     def wait_audio(self):
         """
@@ -1355,27 +1752,14 @@ class AudioToTextRecorder:
             # Calculate samples needed for backdating resume
             samples_to_keep = int(self.sample_rate * self.backdate_resume_seconds)
 
-            # First convert all current frames to audio array
-            full_audio_array = np.frombuffer(b''.join(frames), dtype=np.int16)
-            full_audio = full_audio_array.astype(np.float32) / INT16_MAX_ABS_VALUE
+            # View of the recorded audio, the buffer keeps it as float32
+            full_audio = frames.float32()
 
             # Calculate how many samples we need to keep for backdating resume
             if samples_to_keep > 0:
                 samples_to_keep = min(samples_to_keep, len(full_audio))
                 # Keep the last N samples for backdating resume
-                frames_to_read_audio = full_audio[-samples_to_keep:]
-
-                # Convert the audio back to int16 bytes for frames
-                frames_to_read_int16 = (frames_to_read_audio * INT16_MAX_ABS_VALUE).astype(np.int16)
-                frame_bytes = frames_to_read_int16.tobytes()
-
-                # Split into appropriate frame sizes (assuming standard frame size)
-                FRAME_SIZE = 2048  # Typical frame size
-                frames_to_read = []
-                for i in range(0, len(frame_bytes), FRAME_SIZE):
-                    frame = frame_bytes[i:i + FRAME_SIZE]
-                    if frame:  # Only add non-empty frames
-                        frames_to_read.append(frame)
+                frames_to_read = [frames.int16()[len(full_audio) - samples_to_keep:len(full_audio)].tobytes()]
             else:
                 frames_to_read = []
 
@@ -1422,71 +1806,179 @@ class AudioToTextRecorder:
           stopped with `recorder.stop()`.
         Processes the recorded audio to generate transcription.
 
-        Args:
-            on_transcription_finished (callable, optional): Callback function
-              to be executed when transcription is ready.
-            If provided, transcription will be performed asynchronously,
-              and the callback will receive the transcription as its argument.
-              If omitted, the transcription will be performed synchronously,
-              and the result will be returned.
-
-        Returns (if no callback is set):
+        Returns:
             str: The transcription of the recorded audio.
 
         Raises:
             Exception: If there is an error during the transcription process.
         """
         self._set_state("transcribing")
-        audio_copy = copy.deepcopy(self.audio)
-        start_time = 0
-        with self.transcription_lock:
+        transcription = self._transcribe(self._take_transcription_request())
+        self._set_state("inactive")
+        return transcription
+
+    def _take_transcription_request(self):
+        """
+        Collects everything needed to transcribe the last stopped recording,
+        so the transcription can run while the next one is recorded.
+
+        Returns:
+            dict: The audio, the pending early transcription, the last
+              real-time result, the end of speech, the stop time and the
+              recording id.
+        """
+        request = {
+            'audio': copy.deepcopy(self.audio),
+            'early_transcription': self.last_early_transcription,
+            'realtime_result': self.last_realtime_final_candidate,
+            'speech_end_samples': self.last_speech_end_samples,
+            'stop_time': self.last_recording_stop_time,
+            'recording_id': self.last_recording_id,
+        }
+        self.last_early_transcription = None
+        # The request keeps its early transcription, the next recording may
+        # start its own
+        self.allowed_to_early_transcribe = True
+        return request
+
+    def _transcribe(self, request):
+        """
+        Transcribes a request taken by _take_transcription_request().
+        Returns an empty string if interrupted.
+        """
+        audio = request['audio']
+        if self.fast_finalization is not None:
+            transcription = self._finalize_from_realtime(request)
+            if transcription is not None:
+                return "" if self.interrupt_stop_event.is_set() else transcription
+
+        try:
+            response = self._run_main_transcription(request)
+            if response is None:
+                self.was_interrupted.set()
+                return ""  # return empty string if interrupted
+            status, result, start_time = response
+
+            if status == 'success':
+                segments, info = result
+                self.detected_language = info.language if info.language_probability > 0 else None
+                self.detected_language_probability = info.language_probability
+                self.last_transcription_bytes = audio
+                self.last_transcription_bytes_b64 = base64.b64encode(
+                    self.last_transcription_bytes.tobytes()).decode('utf-8')
+                transcription = self._preprocess_output(segments)
+                end_time = time.time()  # End timing
+                transcription_time = end_time - start_time
+                if self.fast_finalization is not None:
+                    self.fast_finalization.record_latency(
+                        False, end_time - request['stop_time'])
+
+                if start_time:
+                    if self.print_transcription_time:
+                        print(
+                            f"Model {self.main_model_type} completed transcription in {transcription_time:.2f} seconds")
+                    else:
+                        logging.debug(
+                            f"Model {self.main_model_type} completed transcription in {transcription_time:.2f} seconds")
+                return "" if self.interrupt_stop_event.is_set() else transcription  # if interrupted return empty string
+            else:
+                logging.error(f"Transcription error: {result}")
+                raise Exception(result)
+        except Exception as e:
+            logging.error(f"Error during transcription: {str(e)}", exc_info=True)
+            raise e
+
+    def _run_main_transcription(self, request):
+        """
+        Submits the request's audio to the transcription pool, unless an
+        early transcription of the recording is already pending, and waits
+        for the result.
 
+        Returns:
+            tuple: (status, result, start_time), start_time is 0 if the
+              result came from an early transcription. None if interrupted.
+        """
+        start_time = 0
+        future = request['early_transcription']
+        if future is None:
+            logging.debug("Adding transcription request, no early transcription started")
+            start_time = time.time()  # Start timing
+            future = self.transcription_pool.submit(request['audio'], self.language,
+                                                    utterance=request['recording_id'])
+
+        while True:
             try:
-                if self.transcribe_count == 0:
-                    logging.debug("Adding transcription request, no early transcription started")
-                    start_time = time.time()  # Start timing
-                    self.parent_transcription_pipe.send((audio_copy, self.language))
-                    self.transcribe_count += 1
-
-                while self.transcribe_count > 0:
-                    logging.debug(
-                        F"Receive from parent_transcription_pipe after sendiung transcription request, transcribe_count: {self.transcribe_count}")
-                    if not self.parent_transcription_pipe.poll(0.1):  # check if transcription done
-                        if self.interrupt_stop_event.is_set():  # check if interrupted
-                            self.was_interrupted.set()
-                            self._set_state("inactive")
-                            return ""  # return empty string if interrupted
-                        continue
-                    status, result = self.parent_transcription_pipe.recv()
-                    self.transcribe_count -= 1
-
-                self.allowed_to_early_transcribe = True
-                self._set_state("inactive")
-                if status == 'success':
-                    segments, info = result
-                    self.detected_language = info.language if info.language_probability > 0 else None
-                    self.detected_language_probability = info.language_probability
-                    self.last_transcription_bytes = copy.deepcopy(audio_copy)
-                    self.last_transcription_bytes_b64 = base64.b64encode(
-                        self.last_transcription_bytes.tobytes()).decode('utf-8')
-                    transcription = self._preprocess_output(segments)
-                    end_time = time.time()  # End timing
-                    transcription_time = end_time - start_time
-
-                    if start_time:
-                        if self.print_transcription_time:
-                            print(
-                                f"Model {self.main_model_type} completed transcription in {transcription_time:.2f} seconds")
-                        else:
-                            logging.debug(
-                                f"Model {self.main_model_type} completed transcription in {transcription_time:.2f} seconds")
-                    return "" if self.interrupt_stop_event.is_set() else transcription  # if interrupted return empty string
-                else:
-                    logging.error(f"Transcription error: {result}")
-                    raise Exception(result)
+                return 'success', future.result(timeout=0.1), start_time
+            except concurrent.futures.TimeoutError:
+                if self.interrupt_stop_event.is_set():  # check if interrupted
+                    self._cancel_transcription(future)
+                    return None
             except Exception as e:
-                logging.error(f"Error during transcription: {str(e)}", exc_info=True)
-                raise e
+                return 'error', str(e), start_time
+
+    def _cancel_transcription(self, future):
+        """
+        Cancels a transcription request nobody waits for anymore, so its
+        worker stops decoding it.
+        """
+        if future is not None and self.transcription_pool.cancel(future):
+            logging.debug(f"Cancelled transcription request {future.request_id}")
+
+    def _finalize_from_realtime(self, request):
+        """
+        Returns the last real-time result of the stopped recording as its
+        final text if the fast finalization policy accepts it and starts
+        the background check with the main model, otherwise None.
+        """
+        policy = self.fast_finalization
+        audio = request['audio']
+        candidate = request['realtime_result']
+        reason = policy.evaluate(candidate, len(audio), request['speech_end_samples'])
+        if reason != REASON_ACCEPTED:
+            logging.debug(f"Fast finalization not possible: {reason}")
+            return None
+
+        transcription = self._preprocess_output(candidate.text)
+        policy.record_latency(True, time.time() - request['stop_time'])
+        logging.debug(f"Fast finalization with the real-time result "
+                      f"(avg logprob {candidate.avg_logprob:.2f}): {transcription}")
+
+        self.detected_language = self.detected_realtime_language
+        self.detected_language_probability = self.detected_realtime_language_probability
+        self.last_transcription_bytes = audio
+        self.last_transcription_bytes_b64 = base64.b64encode(
+            audio.tobytes()).decode('utf-8')
+
+        # A pending early transcription of this recording is used by the check
+        threading.Thread(target=self._check_fast_finalization,
+                         args=(request, transcription), daemon=True).start()
+        return transcription
+
+    def _check_fast_finalization(self, request, transcription):
+        """
+        Transcribes a fast finalized utterance with the main model and
+        reports a correction if the words differ.
+        """
+        try:
+            response = self._run_main_transcription(request)
+            if response is None:
+                return
+            status, result, _ = response
+            if status != 'success':
+                logging.error(f"Transcription error in fast finalization check: {result}")
+                return
+
+            segments, info = result
+            corrected = self._preprocess_output(segments)
+            changed = bool(corrected) and not same_words(transcription, corrected)
+            self.fast_finalization.record_correction(changed)
+            if changed:
+                logging.info(f"Main model corrected fast finalized text: "
+                             f"'{transcription}' -> '{corrected}'")
+                if self.on_transcription_correction:
+                    self.on_transcription_correction(transcription, corrected)
+        except Exception as e:
+            logging.error(f"Error in fast finalization check: {e}", exc_info=True)
 
     def _process_wakeword(self, data):
         """
@@ -1546,6 +2038,10 @@ class AudioToTextRecorder:
               to be executed when transcription is ready.
             If provided, transcription will be performed asynchronously, and
               the callback will receive the transcription as its argument.
+              text() returns as soon as the recording is taken, so the next
+              recording can start while the transcription pool decodes this
+              one. Callbacks are called in recording order, the id of the
+              recording is in finished_recording_id during the callback.
               If omitted, the transcription will be performed synchronously,
               and the result will be returned.
 
@@ -1567,11 +2063,42 @@ class AudioToTextRecorder:
             return ""
 
         if on_transcription_finished:
-            threading.Thread(target=on_transcription_finished,
-                             args=(self.transcribe(),)).start()
+            # The recorder is free again once the request is taken, the
+            # transcription runs in the background
+            request = self._take_transcription_request()
+            self._set_state("inactive")
+            ticket = next(self._text_tickets)
+            threading.Thread(target=self._transcribe_in_background,
+                             args=(request, ticket, on_transcription_finished),
+                             daemon=True).start()
         else:
             return self.transcribe()
 
+    def _transcribe_in_background(self, request, ticket, on_transcription_finished):
+        """
+        Transcribes a request taken by text() and calls the callback once
+        the callbacks of all earlier recordings have been called.
+        """
+        transcription = None
+        try:
+            transcription = self._transcribe(request)
+        except Exception as e:
+            logging.error(f"Error in background transcription of recording "
+                          f"{request['recording_id']}: {e}")
+
+        with self._text_order:
+            self._text_order.wait_for(lambda: self._text_next_ticket == ticket)
+        try:
+            if transcription is not None:
+                self.finished_recording_id = request['recording_id']
+                on_transcription_finished(transcription)
+        except Exception as e:
+            logging.error(f"Error in transcription callback: {e}", exc_info=True)
+        finally:
+            with self._text_order:
+                self._text_next_ticket += 1
+                self._text_order.notify_all()
+
     def format_number(self, num):
         # Convert the number to a string
         num_str = f"{num:.10f}"  # Ensure precision is sufficient
@@ -1602,14 +2129,24 @@ class AudioToTextRecorder:
         self.realtime_stabilized_safetext = ""
         self.wakeword_detected = False
         self.wake_word_detect_time = 0
-        self.frames = []
-        if frames:
-            self.frames = frames
+        self.frames = UtteranceBuffer(frames)
         self.is_recording = True
 
         self.recording_start_time = time.time()
-        self.is_silero_speech_active = False
         self.is_webrtc_speech_active = False
+        self.silero_vad_worker.clear()
+        # A pass still running for the previous recording keeps its own
+        # LocalAgreement instance
+        self.realtime_agreement = LocalAgreement()
+        self.realtime_stabilizer = WordStabilizer()
+        self.realtime_final_candidate = None
+        self.speech_end_samples = None
+        self._cancel_transcription(self.early_transcription)
+        self.early_transcription = None
+        self.recording_id = next(_recording_ids)
+        self._realtime_audio_seconds = 0.0
+        if self.realtime_cadence is not None:
+            self.realtime_cadence.reset()
         self.stop_recording_event.clear()
         self.start_recording_event.set()
 
@@ -1643,13 +2180,18 @@ class AudioToTextRecorder:
             return self
 
         logging.info("recording stopped")
-        self.last_frames = copy.deepcopy(self.frames)
+        self.last_frames = self.frames.copy()
+        self.last_realtime_final_candidate = self.realtime_final_candidate
+        self.last_speech_end_samples = self.speech_end_samples
+        self.last_early_transcription = self.early_transcription
+        self.early_transcription = None
+        self.last_recording_id = self.recording_id
         self.backdate_stop_seconds = backdate_stop_seconds
         self.backdate_resume_seconds = backdate_resume_seconds
         self.is_recording = False
         self.recording_stop_time = time.time()
-        self.is_silero_speech_active = False
         self.is_webrtc_speech_active = False
+        self.silero_vad_worker.clear()
         self.silero_check_time = 0
         self.start_recording_event.clear()
         self.stop_recording_event.set()
@@ -1678,10 +2220,18 @@ class AudioToTextRecorder:
         Feed an audio chunk into the processing pipeline. Chunks are
         accumulated until the buffer size is reached, and then the accumulated
         data is fed into the audio_queue.
+
+        NumPy chunks at other sample rates are resampled with a streaming
+        polyphase resampler that keeps its filter state between calls, so
+        chunks of one stream must be fed in order. Byte chunks are expected
+        to already be 16 bit PCM at 16000 Hz.
         """
-        # Check if the buffer attribute exists, if not, initialize it
-        if not hasattr(self, 'buffer'):
-            self.buffer = bytearray()
+        # 2 * buffer_size bytes per chunk, silero complains if too short
+        window_samples = self.buffer_size
+
+        # Check if the ring buffer exists, if not, initialize it
+        if getattr(self, 'feed_buffer', None) is None:
+            self.feed_buffer = AudioRingBuffer(4 * window_samples)
 
         # Check if input is a NumPy array
         if isinstance(chunk, np.ndarray):
@@ -1691,26 +2241,18 @@ class AudioToTextRecorder:
 
             # Resample to 16000 Hz if necessary
             if original_sample_rate != 16000:
-                num_samples = int(len(chunk) * 16000 / original_sample_rate)
-                chunk = resample(chunk, num_samples)
-
-            # Ensure data type is int16
-            chunk = chunk.astype(np.int16)
-
-            # Convert the NumPy array to bytes
-            chunk = chunk.tobytes()
-
-        # Append the chunk to the buffer
-        self.buffer += chunk
-        buf_size = 2 * self.buffer_size  # silero complains if too short
-
-        # Check if the buffer has reached or exceeded the buffer_size
-        while len(self.buffer) >= buf_size:
-            # Extract self.buffer_size amount of data from the buffer
-            to_process = self.buffer[:buf_size]
-            self.buffer = self.buffer[buf_size:]
-
-            # Feed the extracted data to the audio_queue
+                resampler = getattr(self, '_feed_resampler', None)
+                if resampler is None or resampler.source_rate != original_sample_rate:
+                    resampler = StreamingResampler(original_sample_rate, 16000)
+                    self._feed_resampler = resampler
+                chunk = resampler.process(chunk)
+
+            # Ensure data type is int16, the ring buffer copies it from there
+            chunk = chunk.astype(np.int16, copy=False)
+
+        # Append the chunk to the ring buffer and feed every complete
+        # window into the audio_queue
+        for to_process in self.feed_buffer.windows(chunk, window_samples):
             self.audio_queue.put(to_process)
 
     def set_microphone(self, microphone_on=True):
@@ -1757,21 +2299,19 @@ class AudioToTextRecorder:
                                     )
                     self.reader_process.terminate()
 
-            logging.debug('Terminating transcription process')
-            self.transcript_process.join(timeout=10)
-
-            if self.transcript_process.is_alive():
-                logging.warning("Transcript process did not terminate "
-                                "in time. Terminating forcefully."
-                                )
-                self.transcript_process.terminate()
-
-            self.parent_transcription_pipe.close()
+            logging.debug('Terminating transcription workers')
+            self.transcription_pool.shutdown(timeout=10)
 
             logging.debug('Finishing realtime thread')
             if self.realtime_thread:
                 self.realtime_thread.join()
 
+            if self.silero_vad_worker:
+                self.silero_vad_worker.stop()
+
+            if self.use_shared_memory_queue:
+                self.audio_queue.close()
+
             if self.enable_realtime_transcription:
                 if self.realtime_model_type:
                     del self.realtime_model_type
@@ -1841,21 +2381,29 @@ class AudioToTextRecorder:
                         if self.use_extended_logging:
                             logging.debug('Debug: Handling buffer overflow')
                         # Handle queue overflow
-                        if (self.audio_queue.qsize() >
-                                self.allowed_latency_limit):
+                        queue_size = self.audio_queue.qsize()
+                        if queue_size > self.allowed_latency_limit:
                             if self.use_extended_logging:
                                 logging.debug('Debug: Queue size exceeds limit, logging warnings')
                             logging.warning("Audio queue size exceeds "
                                             "latency limit. Current size: "
-                                            f"{self.audio_queue.qsize()}. "
+                                            f"{queue_size}. "
                                             "Discarding old audio chunks."
                                             )
 
                         if self.use_extended_logging:
                             logging.debug('Debug: Discarding old chunks if necessary')
-                        while (self.audio_queue.qsize() >
-                               self.allowed_latency_limit):
-                            data = self.audio_queue.get()
+                        if self.use_shared_memory_queue:
+                            # Skip the excess chunks in one step, keep the
+                            # newest discarded one as the current chunk
+                            excess = int(np.ceil(queue_size - self.allowed_latency_limit))
+                            if excess > 0:
+                                self.audio_queue.discard(excess - 1)
+                                data = self.audio_queue.get()
+                        else:
+                            while (self.audio_queue.qsize() >
+                                   self.allowed_latency_limit):
+                                data = self.audio_queue.get()
 
                 except BrokenPipeError:
                     logging.error("BrokenPipeError _recording_worker", exc_info=True)
@@ -1988,7 +2536,9 @@ class AudioToTextRecorder:
 
                             if self.use_extended_logging:
                                 logging.debug('Debug: Resetting Silero VAD model states')
-                            self.silero_vad_model.reset_states()
+                            with self.silero_lock:
+                                self.silero_vad_model.reset_states()
+                                self.silero_resampler.reset()
                         else:
                             if self.use_extended_logging:
                                 logging.debug('Debug: Checking voice activity')
@@ -2007,19 +2557,7 @@ class AudioToTextRecorder:
                         if self.use_extended_logging:
                             logging.debug('Debug: Removing wakeword samples')
                         # Remove samples from the beginning of self.frames
-                        samples_removed = 0
-                        while wakeword_samples_to_remove > 0 and self.frames:
-                            frame = self.frames[0]
-                            frame_samples = len(frame) // 2  # Assuming 16-bit audio
-                            if wakeword_samples_to_remove >= frame_samples:
-                                self.frames.pop(0)
-                                samples_removed += frame_samples
-                                wakeword_samples_to_remove -= frame_samples
-                            else:
-                                self.frames[0] = frame[wakeword_samples_to_remove * 2:]
-                                samples_removed += wakeword_samples_to_remove
-                                samples_to_remove = 0
-
+                        self.frames.trim_front(wakeword_samples_to_remove)
                         wakeword_samples_to_remove = 0
 
                     if self.use_extended_logging:
@@ -2028,6 +2566,8 @@ class AudioToTextRecorder:
                     if self.stop_recording_on_voice_deactivity:
                         if self.use_extended_logging:
                             logging.debug('Debug: Determining if speech is detected')
+                        # The energy gate only guards the activation check,
+                        # quiet speech must not end a recording
                         is_speech = (
                             self._is_silero_speech(data) if self.silero_deactivity_detection
                             else self._is_webrtc_speech(data, True)
@@ -2054,6 +2594,8 @@ class AudioToTextRecorder:
                             if self.speech_end_silence_start == 0 and \
                                     (time.time() - self.recording_start_time > self.min_length_of_recording):
                                 self.speech_end_silence_start = time.time()
+                                # The current chunk is not appended yet
+                                self.speech_end_samples = len(self.frames)
 
                             if self.use_extended_logging:
                                 logging.debug('Debug: Checking early transcription conditions')
@@ -2064,15 +2606,15 @@ class AudioToTextRecorder:
                                     self.allowed_to_early_transcribe:
                                 if self.use_extended_logging:
                                     logging.debug("Debug:Adding early transcription request")
-                                self.transcribe_count += 1
-                                audio_array = np.frombuffer(b''.join(self.frames), dtype=np.int16)
-                                audio = audio_array.astype(np.float32) / INT16_MAX_ABS_VALUE
+                                audio = self.frames.float32()
 
                                 if self.use_extended_logging:
-                                    logging.debug("Debug: early transcription request pipe send")
-                                self.parent_transcription_pipe.send((audio, self.language))
+                                    logging.debug("Debug: early transcription request submit")
+                                self.early_transcription = self.transcription_pool.submit(
+                                    audio, self.language, kind=KIND_EARLY,
+                                    utterance=self.recording_id)
                                 if self.use_extended_logging:
-                                    logging.debug("Debug: early transcription request pipe send return")
+                                    logging.debug("Debug: early transcription request submit return")
                                 self.allowed_to_early_transcribe = False
 
                         else:
@@ -2082,6 +2624,10 @@ class AudioToTextRecorder:
                                 if self.use_extended_logging:
                                     logging.info("Resetting self.speech_end_silence_start")
                                 self.speech_end_silence_start = 0
+                                self.speech_end_samples = None
+                                # The early transcription misses the new speech
+                                self._cancel_transcription(self.early_transcription)
+                                self.early_transcription = None
                                 self.allowed_to_early_transcribe = True
 
                         if self.use_extended_logging:
@@ -2201,69 +2747,106 @@ class AudioToTextRecorder:
                 # Check if the recording is active
                 if self.is_recording:
 
-                    # Sleep for the duration of the transcription resolution
-                    time.sleep(self.realtime_processing_pause)
-
-                    # Convert the buffer frames to a NumPy array
-                    audio_array = np.frombuffer(
-                        b''.join(self.frames),
-                        dtype=np.int16
-                    )
+                    if self.realtime_cadence is not None:
+                        # Sleep for the pause chosen from the measured load
+                        time.sleep(self.realtime_cadence.pause)
+                        if self._is_main_model_busy():
+                            self.realtime_cadence.record_skip()
+                            continue
+                    else:
+                        # Sleep for the duration of the transcription resolution
+                        time.sleep(self.realtime_processing_pause)
+
+                    # In incremental mode only the audio after the last
+                    # committed word is transcribed
+                    agreement = self.realtime_agreement
+                    stabilizer = self.realtime_stabilizer
+                    realtime_words = None
+                    realtime_logprob = None
+                    # View of the recording, already normalized to [-1, 1]
+                    audio_array = self.frames.float32()
+                    recording_samples = len(audio_array)
+                    audio_seconds = len(audio_array) / SAMPLE_RATE
+                    window_offset = 0.0
+                    if self.realtime_incremental:
+                        window_offset = min(agreement.last_committed_end,
+                                            len(audio_array) / SAMPLE_RATE)
+                        audio_array = audio_array[int(window_offset * SAMPLE_RATE):]
 
                     logging.debug(f"Current realtime buffer size: {len(audio_array)}")
 
-                    # Normalize the array to a [-1, 1] range
-                    audio_array = audio_array.astype(np.float32) / \
-                                  INT16_MAX_ABS_VALUE
-
                     if self.use_main_model_for_realtime:
-                        with self.transcription_lock:
-                            try:
-                                self.parent_transcription_pipe.send((audio_array, self.language))
-                                if self.parent_transcription_pipe.poll(timeout=5):  # Wait for 5 seconds
-                                    logging.debug(
-                                        "Receive from realtime worker after transcription request to main model")
-                                    status, result = self.parent_transcription_pipe.recv()
-                                    if status == 'success':
-                                        segments, info = result
-                                        self.detected_realtime_language = info.language if info.language_probability > 0 else None
-                                        self.detected_realtime_language_probability = info.language_probability
-                                        realtime_text = segments
-                                        logging.debug(f"Realtime text detected with main model: {realtime_text}")
-                                    else:
-                                        logging.error(f"Realtime transcription error: {result}")
-                                        continue
-                                else:
-                                    logging.warning("Realtime transcription timed out")
-                                    continue
-                            except Exception as e:
-                                logging.error(f"Error in realtime transcription: {str(e)}", exc_info=True)
-                                continue
+                        pass_start = time.time()
+                        try:
+                            # Finals go first; the worker drops the pass once a
+                            # newer one or the recording's final is queued
+                            future = self.transcription_pool.submit(
+                                audio_array, self.language, kind=KIND_REALTIME,
+                                utterance=self.recording_id, deadline=pass_start + 5)
+                            segments, info = future.result(timeout=5)  # Wait for 5 seconds
+                            logging.debug(
+                                "Receive from realtime worker after transcription request to main model")
+                            self.detected_realtime_language = info.language if info.language_probability > 0 else None
+                            self.detected_realtime_language_probability = info.language_probability
+                            realtime_text = segments
+                            self._record_realtime_pass(
+                                len(audio_array) / SAMPLE_RATE, time.time() - pass_start,
+                                audio_seconds, pass_start)
+                            logging.debug(f"Realtime text detected with main model: {realtime_text}")
+                        except concurrent.futures.TimeoutError:
+                            logging.warning("Realtime transcription timed out")
+                            self._cancel_transcription(future)
+                            continue
+                        except RequestDropped as e:
+                            logging.debug(f"Realtime transcription dropped: {e}")
+                            continue
+                        except Exception as e:
+                            logging.error(f"Realtime transcription error: {str(e)}", exc_info=True)
+                            continue
                     else:
-                        # Perform transcription and assemble the text
+                        pass_start = time.time()
+                        transcribe_kwargs = {}
                         if self.realtime_batch_size > 0:
-                            segments, info = self.realtime_model_type.transcribe(
-                                audio_array,
-                                language=self.language if self.language else None,
-                                beam_size=self.beam_size_realtime,
-                                initial_prompt=self.initial_prompt_realtime,
-                                suppress_tokens=self.suppress_tokens,
-                                batch_size=self.realtime_batch_size
-                            )
-                        else:
-                            segments, info = self.realtime_model_type.transcribe(
-                                audio_array,
-                                language=self.language if self.language else None,
-                                beam_size=self.beam_size_realtime,
-                                initial_prompt=self.initial_prompt_realtime,
-                                suppress_tokens=self.suppress_tokens
-                            )
+                            transcribe_kwargs['batch_size'] = self.realtime_batch_size
+                        initial_prompt = self.initial_prompt_realtime
+                        if self.realtime_incremental or self.realtime_word_stabilization:
+                            transcribe_kwargs['word_timestamps'] = True
+                        if self.realtime_incremental:
+                            initial_prompt = self._incremental_prompt(agreement)
+
+                        # Perform transcription and assemble the text
+                        segments, info = self.realtime_model_type.transcribe(
+                            audio_array,
+                            language=self.language if self.language else None,
+                            beam_size=self.beam_size_realtime,
+                            initial_prompt=initial_prompt,
+                            suppress_tokens=self.suppress_tokens,
+                            **transcribe_kwargs
+                        )
+                        # Segments are generated lazily, collect them before
+                        # taking the time
+                        segments = list(segments)
+                        self._record_realtime_pass(
+                            len(audio_array) / SAMPLE_RATE, time.time() - pass_start,
+                            audio_seconds, pass_start)
 
                         self.detected_realtime_language = info.language if info.language_probability > 0 else None
                         self.detected_realtime_language_probability = info.language_probability
-                        realtime_text = " ".join(
-                            seg.text for seg in segments
-                        )
+                        realtime_logprob = average_logprob(segments)
+                        if self.realtime_incremental:
+                            realtime_text = self._commit_realtime_words(
+                                agreement, segments, window_offset,
+                                len(audio_array) / SAMPLE_RATE)
+                            realtime_words = agreement.committed + agreement.hypothesis
+                        else:
+                            realtime_text = " ".join(
+                                seg.text for seg in segments
+                            )
+                            if self.realtime_word_stabilization:
+                                realtime_words = [
+                                    Word(word.start, word.end, word.word)
+                                    for seg in segments for word in (seg.words or [])
+                                ]
                         logging.debug(f"Realtime text detected: {realtime_text}")
 
                     # double check recording state
@@ -2278,63 +2861,74 @@ class AudioToTextRecorder:
                         self.text_storage.append(
                             self.realtime_transcription_text
                         )
+                        # A pass of the previous recording must not become a
+                        # candidate of the current one
+                        if self.fast_finalization is not None and \
+                                agreement is self.realtime_agreement:
+                            self.realtime_final_candidate = RealtimeResult(
+                                self.realtime_transcription_text,
+                                realtime_logprob, recording_samples)
 
-                        # Take the last two texts in storage, if they exist
-                        if len(self.text_storage) >= 2:
-                            last_two_texts = self.text_storage[-2:]
+                        if realtime_words is not None and self.realtime_word_stabilization:
+                            self._stabilize_realtime_words(
+                                stabilizer, realtime_words, audio_seconds)
+                        else:
+                            # Take the last two texts in storage, if they exist
+                            if len(self.text_storage) >= 2:
+                                last_two_texts = self.text_storage[-2:]
+
+                                # Find the longest common prefix
+                                # between the two texts
+                                prefix = os.path.commonprefix(
+                                    [last_two_texts[0], last_two_texts[1]]
+                                )
 
-                            # Find the longest common prefix
-                            # between the two texts
-                            prefix = os.path.commonprefix(
-                                [last_two_texts[0], last_two_texts[1]]
+                                # This prefix is the text that was transcripted
+                                # two times in the same way
+                                # Store as "safely detected text"
+                                if len(prefix) >= \
+                                        len(self.realtime_stabilized_safetext):
+                                    # Only store when longer than the previous
+                                    # as additional security
+                                    self.realtime_stabilized_safetext = prefix
+
+                            # Find parts of the stabilized text
+                            # in the freshly transcripted text
+                            matching_pos = self._find_tail_match_in_text(
+                                self.realtime_stabilized_safetext,
+                                self.realtime_transcription_text
                             )
 
-                            # This prefix is the text that was transcripted
-                            # two times in the same way
-                            # Store as "safely detected text"
-                            if len(prefix) >= \
-                                    len(self.realtime_stabilized_safetext):
-                                # Only store when longer than the previous
-                                # as additional security
-                                self.realtime_stabilized_safetext = prefix
-
-                        # Find parts of the stabilized text
-                        # in the freshly transcripted text
-                        matching_pos = self._find_tail_match_in_text(
-                            self.realtime_stabilized_safetext,
-                            self.realtime_transcription_text
-                        )
-
-                        if matching_pos < 0:
-                            if self.realtime_stabilized_safetext:
-                                self._on_realtime_transcription_stabilized(
-                                    self._preprocess_output(
-                                        self.realtime_stabilized_safetext,
-                                        True
+                            if matching_pos < 0:
+                                if self.realtime_stabilized_safetext:
+                                    self._on_realtime_transcription_stabilized(
+                                        self._preprocess_output(
+                                            self.realtime_stabilized_safetext,
+                                            True
+                                        )
+                                    )
+                                else:
+                                    self._on_realtime_transcription_stabilized(
+                                        self._preprocess_output(
+                                            self.realtime_transcription_text,
+                                            True
+                                        )
                                     )
-                                )
                             else:
+                                # We found parts of the stabilized text
+                                # in the transcripted text
+                                # We now take the stabilized text
+                                # and add only the freshly transcripted part to it
+                                output_text = self.realtime_stabilized_safetext + \
+                                              self.realtime_transcription_text[matching_pos:]
+
+                                # This yields us the "left" text part as stabilized
+                                # AND at the same time delivers fresh detected
+                                # parts on the first run without the need for
+                                # two transcriptions
                                 self._on_realtime_transcription_stabilized(
-                                    self._preprocess_output(
-                                        self.realtime_transcription_text,
-                                        True
-                                    )
+                                    self._preprocess_output(output_text, True)
                                 )
-                        else:
-                            # We found parts of the stabilized text
-                            # in the transcripted text
-                            # We now take the stabilized text
-                            # and add only the freshly transcripted part to it
-                            output_text = self.realtime_stabilized_safetext + \
-                                          self.realtime_transcription_text[matching_pos:]
-
-                            # This yields us the "left" text part as stabilized
-                            # AND at the same time delivers fresh detected
-                            # parts on the first run without the need for
-                            # two transcriptions
-                            self._on_realtime_transcription_stabilized(
-                                self._preprocess_output(output_text, True)
-                            )
 
                         # Invoke the callback with the transcribed text
                         self._on_realtime_transcription_update(
@@ -2352,6 +2946,129 @@ class AudioToTextRecorder:
             logging.error(f"Unhandled exeption in _realtime_worker: {e}", exc_info=True)
             raise
 
+    def _stabilize_realtime_words(self, stabilizer, words, audio_seconds):
+        """
+        Splits the words of a real-time pass into committed words and the
+        volatile tail and invokes the callbacks with both.
+
+        Args:
+            stabilizer (WordStabilizer): Stabilizer of the current recording.
+            words (list of Word): Words of the whole recording with
+            absolute timestamps.
+            audio_seconds (float): Length of the audio the pass saw.
+        """
+        stabilizer.update(words, audio_seconds)
+        committed = self._preprocess_output(stabilizer.committed_text, True)
+        if committed:
+            # Keep the separating space, the tail is shown right after the
+            # committed text
+            tail = re.sub(r'\s+', ' ', stabilizer.tail_text).rstrip()
+        else:
+            tail = self._preprocess_output(stabilizer.tail_text, True)
+        self.realtime_stabilized_safetext = committed
+
+        self._on_realtime_transcription_words(committed, tail)
+        self._on_realtime_transcription_stabilized(
+            self._preprocess_output(committed + tail, True))
+
+    def _incremental_prompt(self, agreement):
+        """
+        Returns the prompt for an incremental real-time pass: the configured
+        real-time prompt (if it is text) followed by the committed text.
+        """
+        committed = agreement.prompt()
+        if isinstance(self.initial_prompt_realtime, str) and self.initial_prompt_realtime:
+            return f"{self.initial_prompt_realtime} {committed}".strip()
+        return committed or self.initial_prompt_realtime
+
+    def _commit_realtime_words(self, agreement, segments, window_offset, window_duration):
+        """
+        Feeds the words of an incremental pass into the LocalAgreement
+        policy and returns the full real-time text (committed words plus
+        the still unconfirmed tail).
+        """
+        words = [word for segment in segments for word in (segment.words or [])]
+        committed = agreement.insert(words, window_offset)
+
+        # Bound the window if consecutive passes keep disagreeing
+        if window_duration > self.realtime_max_window_seconds:
+            window_end = window_offset + window_duration
+            committed += agreement.force_commit(
+                window_end - self.realtime_max_window_seconds / 2)
+
+        if committed and self.debug_mode:
+            logging.info(f"Committed {len(committed)} real-time words, window "
+                         f"now starts at {agreement.last_committed_end:.2f}s")
+        return agreement.text
+
+    def _record_realtime_pass(self, decoded_seconds, elapsed, audio_seconds, pass_start):
+        """
+        Updates the per-pass statistics of the real-time worker and, if
+        enabled, lets the adaptive cadence choose the next pause.
+
+        Args:
+            decoded_seconds (float): Audio transcribed by this pass.
+            elapsed (float): Duration of the pass.
+            audio_seconds (float): Length of the whole recording when the
+            pass started.
+            pass_start (float): time.time() at the start of the pass.
+        """
+        if self.realtime_cadence is not None:
+            interval = pass_start - self._realtime_pass_started \
+                if self._realtime_pass_started else None
+            # The recording restarts from zero after start()
+            audio_growth = audio_seconds - self._realtime_audio_seconds \
+                if audio_seconds >= self._realtime_audio_seconds else audio_seconds
+            self.realtime_cadence.record_pass(elapsed, audio_growth, interval)
+        self._realtime_audio_seconds = audio_seconds
+        self._realtime_pass_started = pass_start
+
+        stats = self.realtime_pass_stats
+        real_time_factor = elapsed / decoded_seconds if decoded_seconds else 0.0
+        stats['passes'] += 1
+        stats['decoded_seconds_last'] = decoded_seconds
+        stats['real_time_factor_last'] = real_time_factor
+        stats['decoded_seconds_max'] = max(stats['decoded_seconds_max'], decoded_seconds)
+        if stats['passes'] == 1:
+            stats['decoded_seconds_avg'] = decoded_seconds
+            stats['real_time_factor_avg'] = real_time_factor
+        else:
+            stats['decoded_seconds_avg'] += (decoded_seconds - stats['decoded_seconds_avg']) * 0.1
+            stats['real_time_factor_avg'] += (real_time_factor - stats['real_time_factor_avg']) * 0.1
+
+    def _is_main_model_busy(self):
+        """
+        Returns true while the main model transcribes or has requests
+        (e.g. early transcriptions) waiting in the transcription pool.
+        """
+        return self.transcription_pool.outstanding > 0
+
+    def get_realtime_stats(self):
+        """
+        Returns statistics of the real-time transcription passes: audio
+        seconds decoded per pass and the real time factor (processing time
+        / decoded audio duration), last value and running average, plus
+        the adaptive cadence's chosen pause under 'cadence' and the fast
+        finalization decisions and latencies under 'fast_finalization'.
+        """
+        stats = {key: round(value, 3) if isinstance(value, float) else value
+                 for key, value in self.realtime_pass_stats.items()}
+        stats['incremental'] = self.realtime_incremental
+        if self.realtime_cadence is not None:
+            stats['cadence'] = self.realtime_cadence.get_stats()
+        if self.fast_finalization is not None:
+            stats['fast_finalization'] = self.fast_finalization.get_stats()
+        # The maximum covers the interval since the last call
+        self.realtime_pass_stats['decoded_seconds_max'] = 0.0
+        return stats
+
+    def get_transcription_stats(self):
+        """
+        Returns statistics of the main model transcription pool: requests,
+        outstanding requests, utilization and queue wait per worker.
+        """
+        return self.transcription_pool.get_stats()
+
     def _is_silero_speech(self, chunk):
         """
         Returns true if speech is detected in the provided audio data
@@ -2360,27 +3077,23 @@ class AudioToTextRecorder:
             data (bytes): raw bytes of audio data (1024 raw bytes with
             16000 sample rate and 16 bits per sample)
         """
-        if self.sample_rate != 16000:
-            pcm_data = np.frombuffer(chunk, dtype=np.int16)
-            data_16000 = signal.resample_poly(
-                pcm_data, 16000, self.sample_rate)
-            chunk = data_16000.astype(np.int16).tobytes()
+        if self._is_digital_silence(chunk):
+            return False
 
-        self.silero_working = True
         audio_chunk = np.frombuffer(chunk, dtype=np.int16)
         audio_chunk = audio_chunk.astype(np.float32) / INT16_MAX_ABS_VALUE
-        vad_prob = self.silero_vad_model(
-            torch.from_numpy(audio_chunk),
-            SAMPLE_RATE).item()
-        is_silero_speech_active = vad_prob > (1 - self.silero_sensitivity)
-        if is_silero_speech_active:
-            if not self.is_silero_speech_active and self.use_extended_logging:
-                logging.info(f"{bcolors.OKGREEN}Silero VAD detected speech{bcolors.ENDC}")
-        elif self.is_silero_speech_active and self.use_extended_logging:
-            logging.info(f"{bcolors.WARNING}Silero VAD detected silence{bcolors.ENDC}")
-        self.is_silero_speech_active = is_silero_speech_active
-        self.silero_working = False
-        return is_silero_speech_active
+        # The model and the resampler keep internal state, so the VAD worker
+        # and the deactivity check in _recording_worker must not run them
+        # concurrently
+        with self.silero_lock:
+            audio_chunk = self.silero_resampler.process(audio_chunk)
+            if isinstance(self.silero_vad_model, SileroVadSession):
+                vad_prob = self.silero_vad_model(audio_chunk)
+            else:
+                vad_prob = self.silero_vad_model(
+                    torch.from_numpy(audio_chunk),
+                    SAMPLE_RATE).item()
+        return vad_prob > (1 - self.silero_sensitivity)
 
     def _is_webrtc_speech(self, chunk, all_frames_must_be_true=False):
         """
@@ -2389,55 +3102,62 @@ class AudioToTextRecorder:
         Args:
             data (bytes): raw bytes of audio data (1024 raw bytes with
             16000 sample rate and 16 bits per sample)
+            all_frames_must_be_true (bool): require speech in every 10 ms
+            frame instead of in any frame
         """
         speech_str = f"{bcolors.OKGREEN}WebRTC VAD detected speech{bcolors.ENDC}"
         silence_str = f"{bcolors.WARNING}WebRTC VAD detected silence{bcolors.ENDC}"
-        if self.sample_rate != 16000:
-            pcm_data = np.frombuffer(chunk, dtype=np.int16)
-            data_16000 = signal.resample_poly(
-                pcm_data, 16000, self.sample_rate)
-            chunk = data_16000.astype(np.int16).tobytes()
-
-        # Number of audio frames per millisecond
-        frame_length = int(16000 * 0.01)  # for 10ms frame
-        num_frames = int(len(chunk) / (2 * frame_length))
-        speech_frames = 0
-
-        for i in range(num_frames):
-            start_byte = i * frame_length * 2
-            end_byte = start_byte + frame_length * 2
-            frame = chunk[start_byte:end_byte]
-            if self.webrtc_vad_model.is_speech(frame, 16000):
-                speech_frames += 1
-                if not all_frames_must_be_true:
-                    if self.debug_mode:
-                        logging.info(f"Speech detected in frame {i + 1}"
-                                     f" of {num_frames}")
-                    if not self.is_webrtc_speech_active and self.use_extended_logging:
-                        logging.info(speech_str)
-                    self.is_webrtc_speech_active = True
-                    return True
-        if all_frames_must_be_true:
-            if self.debug_mode and speech_frames == num_frames:
-                logging.info(f"Speech detected in {speech_frames} of "
-                             f"{num_frames} frames")
-            elif self.debug_mode:
-                logging.info(f"Speech not detected in all {num_frames} frames")
-            speech_detected = speech_frames == num_frames
-            if speech_detected and not self.is_webrtc_speech_active and self.use_extended_logging:
-                logging.info(speech_str)
-            elif not speech_detected and self.is_webrtc_speech_active and self.use_extended_logging:
-                logging.info(silence_str)
-            self.is_webrtc_speech_active = speech_detected
-            return speech_detected
-        else:
-            if self.debug_mode:
-                logging.info(f"Speech not detected in any of {num_frames} frames")
+        if self._is_digital_silence(chunk):
+            # The stream restarts after the gap, so the carried over
+            # samples and the resampler history are stale
+            self.webrtc_vad_frontend.reset()
             if self.is_webrtc_speech_active and self.use_extended_logging:
                 logging.info(silence_str)
             self.is_webrtc_speech_active = False
             return False
 
+        speech_mask = self.webrtc_vad_frontend.frame_mask(chunk)
+        if all_frames_must_be_true:
+            # An empty mask (chunk shorter than a frame) holds no speech
+            speech_detected = bool(len(speech_mask)) and bool(speech_mask.all())
+        else:
+            speech_detected = bool(speech_mask.any())
+
+        if self.debug_mode:
+            logging.info(f"Speech detected in {np.count_nonzero(speech_mask)} "
+                         f"of {len(speech_mask)} frames")
+        if speech_detected and not self.is_webrtc_speech_active and self.use_extended_logging:
+            logging.info(speech_str)
+        elif not speech_detected and self.is_webrtc_speech_active and self.use_extended_logging:
+            logging.info(silence_str)
+        self.is_webrtc_speech_active = speech_detected
+        return speech_detected
+
+    def _is_digital_silence(self, chunk):
+        """
+        Returns true if the chunk contains only zero samples.
+
+        Silence markers from the browser's client side VAD gate are fed as
+        all-zero chunks to keep the silence timing intact. They can never
+        contain speech, so the VAD models are not run on them.
+        """
+        return len(chunk) > 0 and not np.frombuffer(chunk, dtype=np.uint8).any()
+
+    def _is_below_noise_floor(self, chunk):
+        """
+        Returns true if the energy gate classifies the chunk as background
+        noise, in which case the VADs are skipped and treated as silent.
+        """
+        if self.energy_gate is None or not self.energy_gate.is_below_floor(chunk):
+            return False
+
+        if self.is_webrtc_speech_active and self.use_extended_logging:
+            logging.info(f"{bcolors.WARNING}Energy gate detected silence{bcolors.ENDC}")
+        self.is_webrtc_speech_active = False
+        # WebRTC VAD does not see this chunk, restart its stream
+        self.webrtc_vad_frontend.reset()
+        return True
+
     def _check_voice_activity(self, data):
         """
         Initiate check if voice is active based on the provided data.
@@ -2445,18 +3165,17 @@ class AudioToTextRecorder:
         Args:
             data: The audio data to be checked for voice activity.
         """
+        if self._is_below_noise_floor(data):
+            return
+
         self._is_webrtc_speech(data)
 
         # First quick performing check for voice activity using WebRTC
         if self.is_webrtc_speech_active:
 
-            if not self.silero_working:
-                self.silero_working = True
-
-                # Run the intensive check in a separate thread
-                threading.Thread(
-                    target=self._is_silero_speech,
-                    args=(data,)).start()
+            # Run the intensive check on the VAD worker thread. A chunk
+            # still waiting there is replaced by this newer one.
+            self.silero_vad_worker.submit(data)
 
     def clear_audio_queue(self):
         """
@@ -2479,7 +3198,20 @@ class AudioToTextRecorder:
         Returns:
             bool: True if voice is active, False otherwise.
         """
-        return self.is_webrtc_speech_active and self.is_silero_speech_active
+        return self.is_webrtc_speech_active and self.silero_vad_worker.decision
+
+    def get_vad_stats(self):
+        """
+        Returns Silero VAD worker statistics (decisions, coalesced chunks,
+        inference latency and real time factor) and, if enabled, the
+        energy gate's hit ratio and noise floor under 'energy_gate'.
+        """
+        if self.silero_vad_worker is None:
+            return {}
+        stats = self.silero_vad_worker.get_stats()
+        if self.energy_gate is not None:
+            stats['energy_gate'] = self.energy_gate.get_stats()
+        return stats
 
     def _set_state(self, new_state):
         """
@@ -2647,6 +3379,20 @@ class AudioToTextRecorder:
             if self.is_recording:
                 self.on_realtime_transcription_stabilized(text)
 
+    def _on_realtime_transcription_words(self, committed, tail):
+        """
+        Callback method invoked with the word-stabilized real-time
+        transcription, split into the committed text and the volatile tail,
+        if recording is still ongoing.
+
+        Args:
+            committed (str): Text that will not change anymore.
+            tail (str): Text after it that may still change.
+        """
+        if self.on_realtime_transcription_words:
+            if self.is_recording:
+                self.on_realtime_transcription_words(committed, tail)
+
     def _on_realtime_transcription_update(self, text):
         """
         Callback method invoked when there's an update in the real-time
@@ -0,0 +1,145 @@
+"""
+
+Adaptive energy pre-gate in front of the WebRTC and Silero VADs.
+
+AudioToTextRecorder runs WebRTC VAD on every chunk and Silero on most
+chunks WebRTC flags, even in a silent room. EnergyGate is a cheap first
+stage: it measures the chunk's energy, tracks the background noise floor
+with an exponential average and lets the recorder skip the heavier
+detectors for chunks that are clearly background noise while it waits
+for speech. The gate only ever rejects audio, the decision about speech is
+still made by the VADs. It is not used to detect the end of a recording:
+the margin is a few dB, and quiet speech would end it early.
+
+The floor follows drops in energy quickly and rises slowly, far more
+slowly while the gate is open, so speech barely pulls it up. Hysteresis
+keeps the gate from chattering: it opens at floor + margin_db and only
+closes again below floor + margin_db - hysteresis_db.
+
+"""
+
+import math
+import numpy as np
+
+# Noise floor tracking rates per chunk
+FLOOR_FALL_RATE = 0.5
+FLOOR_RISE_RATE = 0.05
+# Rise rate while the gate is open, lets the floor catch up with a lasting
+# increase in background noise (e.g. a fan being switched on)
+FLOOR_RISE_RATE_OPEN = 0.005
+
+# Starting floor. Deliberately low: the gate starts open and the floor
+# falls quickly to the real background level, so the first words of a
+# session are never gated away
+INITIAL_FLOOR_DB = -60.0
+MIN_FLOOR_DB = -90.0
+
+DEFAULT_HYSTERESIS_DB = 3.0
+
+INT16_FULL_SCALE_POWER = 32768.0 * 32768.0
+
+
+def margin_for_sensitivity(webrtc_sensitivity, silero_sensitivity):
+    """
+    Derives the gate margin from the VAD sensitivity settings.
+
+    A more aggressive WebRTC mode (3 rejects the most audio) widens the
+    margin, a more sensitive Silero setting narrows it, so the gate never
+    rejects audio the configured VADs would still accept.
+
+    Args:
+    - webrtc_sensitivity (int): WebRTC VAD mode, 0 to 3.
+    - silero_sensitivity (float): Silero sensitivity, 0 to 1.
+
+    Returns:
+        float: Margin above the noise floor in dB.
+    """
+    base = 3.0 + 1.5 * min(max(int(webrtc_sensitivity), 0), 3)
+    return base * (1.5 - min(max(float(silero_sensitivity), 0.0), 1.0))
+
+
+class EnergyGate:
+    """
+    Energy detector with an adaptive noise floor for one audio stream.
+    """
+
+    def __init__(self, margin_db, hysteresis_db=DEFAULT_HYSTERESIS_DB):
+        """
+        Args:
+        - margin_db (float): Energy above the noise floor at which the gate
+            opens and the VADs run.
+        - hysteresis_db (float, default=3.0): How far below the opening
+            level the energy must fall before the gate closes again.
+        """
+        self.margin_db = float(margin_db)
+        self.hysteresis_db = float(hysteresis_db)
+        self.reset()
+
+        # Statistics
+        self.checked = 0
+        self.skipped = 0
+
+    def reset(self):
+        """Restarts noise floor tracking with the gate open."""
+        self.noise_floor_db = INITIAL_FLOOR_DB
+        self.is_open = True
+        self.last_db = MIN_FLOOR_DB
+
+    def is_below_floor(self, chunk):
+        """
+        Classifies a chunk and updates the noise floor.
+
+        Args:
+        - chunk (bytes): 16 bit mono PCM.
+
+        Returns:
+            bool: True if the chunk is background noise and the VADs can
+              be skipped.
+        """
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        self.checked += 1
+        if not len(samples):
+            self.skipped += 1
+            return True
+
+        power = float(np.dot(samples, samples)) / len(samples)
+        if power == 0.0:
+            # Digital silence (e.g. client VAD silence markers) says nothing
+            # about the room's background noise, leave the floor alone
+            self.skipped += 1
+            return True
+
+        db = max(10.0 * math.log10(power / INT16_FULL_SCALE_POWER), MIN_FLOOR_DB)
+        self.last_db = db
+
+        threshold = self.noise_floor_db + self.margin_db
+        if self.is_open:
+            self.is_open = db >= threshold - self.hysteresis_db
+        else:
+            self.is_open = db >= threshold
+
+        if db < self.noise_floor_db:
+            self.noise_floor_db += (db - self.noise_floor_db) * FLOOR_FALL_RATE
+        else:
+            rate = FLOOR_RISE_RATE_OPEN if self.is_open else FLOOR_RISE_RATE
+            self.noise_floor_db += (db - self.noise_floor_db) * rate
+
+        if not self.is_open:
+            self.skipped += 1
+        return not self.is_open
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: Checked and skipped chunk counts, the hit ratio (share of
+              chunks that skipped the VADs) and the current levels in dBFS.
+        """
+        return {
+            'checked': self.checked,
+            'skipped': self.skipped,
+            'hit_ratio': round(self.skipped / self.checked, 3)
+            if self.checked else 0.0,
+            'noise_floor_db': round(self.noise_floor_db, 1),
+            'last_level_db': round(self.last_db, 1),
+            'margin_db': round(self.margin_db, 1),
+        }
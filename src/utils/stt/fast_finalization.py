@@ -0,0 +1,160 @@
+"""
+
+Fast finalization of short utterances from the last real-time pass.
+
+At the end of an utterance AudioToTextRecorder.transcribe() used to send
+the whole recording to the main model and wait for it, even when the
+real-time model had just transcribed exactly that audio. For short
+phrases the real-time result is usually already right. FastFinalizationPolicy
+accepts it as the final text when
+
+- the pass saw all of the speech in the final audio (audio after the end
+  of speech is the trailing silence the VAD waited for),
+- the pass was confident: its token weighted average log probability is
+  at least min_avg_logprob, and
+- the utterance is not longer than max_duration seconds.
+
+The recorder then runs the main model in the background and only reports
+a correction if its words differ.
+
+"""
+
+from typing import NamedTuple, Optional
+import collections
+import statistics
+import re
+
+# Number of latencies kept per path for the median
+LATENCY_HISTORY = 100
+
+# Punctuation, whitespace and underscores, ignored when comparing texts
+_NON_WORD = re.compile(r'[\W_]+')
+
+REASON_ACCEPTED = 'accepted'
+REASON_NO_RESULT = 'no_result'
+REASON_EMPTY = 'empty'
+REASON_TOO_LONG = 'too_long'
+REASON_NOT_COVERED = 'not_covered'
+REASON_LOW_CONFIDENCE = 'low_confidence'
+
+
+class RealtimeResult(NamedTuple):
+    text: str
+    avg_logprob: Optional[float]
+    # Samples of the recording the pass transcribed
+    samples: int
+
+
+def average_logprob(segments):
+    """
+    Returns the average log probability of faster_whisper segments,
+    weighted by their number of tokens, or None without tokens.
+    """
+    total = 0.0
+    tokens = 0
+    for segment in segments:
+        count = len(segment.tokens)
+        total += segment.avg_logprob * count
+        tokens += count
+    return total / tokens if tokens else None
+
+
+def same_words(first, second):
+    """
+    True if two texts only differ in case, punctuation and spacing. Works
+    for languages written without spaces as well.
+    """
+    return _NON_WORD.sub('', first).casefold() == _NON_WORD.sub('', second).casefold()
+
+
+class FastFinalizationPolicy:
+    """
+    Decides whether the last real-time result can replace the main model
+    transcription of an utterance, and keeps statistics about it.
+
+    Decisions are made on the thread calling transcribe(), corrections are
+    recorded by the background correction thread.
+    """
+
+    def __init__(self, min_avg_logprob=-0.5, max_duration=3.0,
+                 sample_rate=16000):
+        """
+        Args:
+        - min_avg_logprob (float, default=-0.5): Minimum average log
+            probability of the real-time pass.
+        - max_duration (float, default=3.0): Longest utterance in seconds
+            that may be finalized from the real-time result.
+        - sample_rate (int, default=16000): Sample rate of the audio.
+        """
+        self.min_avg_logprob = float(min_avg_logprob)
+        self.max_duration = float(max_duration)
+        self.sample_rate = sample_rate
+
+        # Statistics
+        self.decisions = collections.Counter()
+        self.corrections = 0
+        self.confirmations = 0
+        self.latencies = {
+            'fast': collections.deque(maxlen=LATENCY_HISTORY),
+            'main': collections.deque(maxlen=LATENCY_HISTORY),
+        }
+
+    def evaluate(self, result, audio_samples, speech_end_samples=None):
+        """
+        Checks the last real-time result against the final audio.
+
+        Args:
+        - result (RealtimeResult or None): Last real-time pass of the
+            recording.
+        - audio_samples (int): Length of the final audio in samples.
+        - speech_end_samples (int, optional): Position where the trailing
+            silence starts, if the recording was stopped by the VAD.
+
+        Returns:
+            str: REASON_ACCEPTED or the reason the result was rejected.
+        """
+        if result is None:
+            reason = REASON_NO_RESULT
+        elif not result.text.strip():
+            reason = REASON_EMPTY
+        elif audio_samples > self.max_duration * self.sample_rate:
+            reason = REASON_TOO_LONG
+        elif result.samples < min(audio_samples, speech_end_samples
+                                  if speech_end_samples is not None
+                                  else audio_samples):
+            reason = REASON_NOT_COVERED
+        elif result.avg_logprob is None or result.avg_logprob < self.min_avg_logprob:
+            reason = REASON_LOW_CONFIDENCE
+        else:
+            reason = REASON_ACCEPTED
+        self.decisions[reason] += 1
+        return reason
+
+    def record_latency(self, fast, seconds):
+        """Records the time from the end of the recording to the final text."""
+        self.latencies['fast' if fast else 'main'].append(seconds)
+
+    def record_correction(self, corrected):
+        """Records the outcome of a background main model check."""
+        if corrected:
+            self.corrections += 1
+        else:
+            self.confirmations += 1
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: Decision counts by reason, corrections and confirmations
+              by the main model, and the median latency of both paths.
+        """
+        stats = {
+            'min_avg_logprob': self.min_avg_logprob,
+            'max_duration_s': self.max_duration,
+            'decisions': dict(self.decisions),
+            'corrections': self.corrections,
+            'confirmations': self.confirmations,
+        }
+        for path, latencies in self.latencies.items():
+            stats[f'{path}_latency_median_s'] = round(statistics.median(list(latencies)), 3) \
+                if latencies else None
+        return stats
@@ -0,0 +1,145 @@
+"""
+
+LocalAgreement commit policy for incremental realtime transcription.
+
+Re-transcribing the whole recording on every realtime pass makes the cost
+of a long utterance quadratic. In incremental mode AudioToTextRecorder
+only transcribes the audio after the last committed word and feeds it
+word by word into LocalAgreement. A word is committed once two
+consecutive passes agree on it (LocalAgreement-2), after which its audio
+can be dropped from the window and its text used as the prompt for the
+next pass. Words are kept with absolute timestamps in seconds since the
+start of the recording.
+
+"""
+
+from typing import List, NamedTuple
+import string
+
+# Words starting before the last committed end minus this tolerance were
+# already committed in an earlier window
+COMMIT_TOLERANCE = 0.1
+
+# Longest run of repeated words removed where a new window overlaps the
+# committed text
+MAX_OVERLAP_WORDS = 5
+
+# Only look for a repeated run if the window starts this close to the
+# end of the committed text (seconds)
+OVERLAP_WINDOW = 1.0
+
+_STRIP_CHARS = string.punctuation + string.whitespace + "，。！？、；：“”‘’…"
+
+
+class Word(NamedTuple):
+    start: float
+    end: float
+    text: str
+
+
+def normalize_word(text):
+    """Returns a word's text for comparison, without case and punctuation."""
+    return text.strip(_STRIP_CHARS).casefold()
+
+
+class LocalAgreement:
+    """
+    Commits the words two consecutive hypotheses agree on.
+
+    One instance per recording. Not thread safe, it is only used by the
+    realtime worker thread.
+    """
+
+    def __init__(self):
+        self.committed: List[Word] = []
+        self.hypothesis: List[Word] = []
+        self.last_committed_end = 0.0
+
+    @property
+    def committed_text(self):
+        """Text of all committed words."""
+        return "".join(word.text for word in self.committed).strip()
+
+    @property
+    def pending_text(self):
+        """Text of the latest hypothesis after the committed words."""
+        return "".join(word.text for word in self.hypothesis).strip()
+
+    @property
+    def text(self):
+        """Committed text followed by the still unconfirmed tail."""
+        return "".join(word.text for word in self.committed + self.hypothesis).strip()
+
+    def prompt(self, max_chars=200):
+        """
+        Returns the end of the committed text as prompt for the next
+        window, cut at a word boundary.
+        """
+        words = []
+        length = 0
+        for word in reversed(self.committed):
+            length += len(word.text)
+            if length > max_chars:
+                break
+            words.append(word.text)
+        return "".join(reversed(words)).strip()
+
+    def insert(self, words, offset):
+        """
+        Adds the words of a new pass and commits the agreed prefix.
+
+        Args:
+        - words (iterable): Words with start, end and word attributes
+            (faster_whisper Word objects), timestamps relative to the
+            window.
+        - offset (float): Start of the window in seconds since the start
+            of the recording.
+
+        Returns:
+            list of Word: The newly committed words.
+        """
+        new = [Word(word.start + offset, word.end + offset, word.word)
+               for word in words
+               if word.start + offset > self.last_committed_end - COMMIT_TOLERANCE]
+
+        # The window may start with words that repeat the committed tail
+        if new and self.committed and \
+                abs(new[0].start - self.last_committed_end) < OVERLAP_WINDOW:
+            for n in range(min(len(self.committed), len(new), MAX_OVERLAP_WORDS), 0, -1):
+                tail = [normalize_word(word.text) for word in self.committed[-n:]]
+                head = [normalize_word(word.text) for word in new[:n]]
+                if tail == head:
+                    del new[:n]
+                    break
+
+        agreed = 0
+        for previous, current in zip(self.hypothesis, new):
+            if normalize_word(previous.text) != normalize_word(current.text):
+                break
+            agreed += 1
+
+        newly_committed = new[:agreed]
+        self.hypothesis = new[agreed:]
+        self._commit(newly_committed)
+        return newly_committed
+
+    def force_commit(self, before):
+        """
+        Commits the hypothesis words ending before a point in time without
+        waiting for agreement, used when the window grows too long.
+
+        Returns:
+            list of Word: The newly committed words.
+        """
+        count = 0
+        while count < len(self.hypothesis) and self.hypothesis[count].end <= before:
+            count += 1
+        newly_committed = self.hypothesis[:count]
+        del self.hypothesis[:count]
+        self._commit(newly_committed)
+        return newly_committed
+
+    def _commit(self, words):
+        if words:
+            self.committed.extend(words)
+            self.last_committed_end = words[-1].end
@@ -0,0 +1,169 @@
+"""
+
+Micro-batching of final transcriptions across utterances.
+
+With batch_size > 0 TranscriptionWorker runs the main model through
+faster_whisper's BatchedInferencePipeline, which only batches the VAD
+chunks of a single utterance. When several speakers stop talking at
+about the same time, their requests reach the worker within a few
+milliseconds of each other and were still decoded one after another.
+
+MicroBatchPipeline splits BatchedInferencePipeline.transcribe() into its
+two halves. prepare() runs the cheap per-utterance part (VAD, features,
+language detection, options) and decode() runs the encoder and decoder
+once for the chunks of all prepared utterances that share a language,
+then hands every utterance its own segments back.
+
+Written against faster_whisper 1.1.1 (requirements.txt).
+
+"""
+
+from faster_whisper import BatchedInferencePipeline
+from faster_whisper.transcribe import Segment
+from typing import NamedTuple
+import dataclasses
+import numpy as np
+import queue
+import time
+
+
+class PreparedUtterance(NamedTuple):
+    # Mel features of the utterance's VAD chunks, shape (chunks, mels, frames)
+    features: object
+    tokenizer: object
+    chunks_metadata: list
+    options: object
+
+
+class MicroBatchPipeline(BatchedInferencePipeline):
+    """
+    BatchedInferencePipeline that decodes the chunks of several utterances
+    in one batch.
+    """
+
+    def _batched_segments_generator(self, features, tokenizer, chunks_metadata,
+                                    batch_size, options, log_progress):
+        # Called at the end of transcribe(): keep everything it prepared
+        # instead of starting to decode
+        return PreparedUtterance(features, tokenizer, chunks_metadata, options)
+
+    def prepare(self, audio, language=None, **kwargs):
+        """
+        Runs VAD, feature extraction and language detection for one
+        utterance.
+
+        Args:
+        - audio (np.ndarray): float32 audio at 16 kHz.
+        - language (str, optional): Language code, None to detect it.
+        - kwargs: Further BatchedInferencePipeline.transcribe() arguments.
+
+        Returns:
+            tuple: (PreparedUtterance, TranscriptionInfo)
+        """
+        return self.transcribe(audio, language=language, **kwargs)
+
+    def decode(self, prepared, batch_size=16, cancelled=None):
+        """
+        Decodes prepared utterances. Chunks of utterances with the same
+        language, task and options are decoded together, at most
+        batch_size chunks per encoder and decoder call.
+
+        Args:
+        - prepared (list of PreparedUtterance): The utterances.
+        - batch_size (int, default=16): Maximum number of chunks per call.
+        - cancelled (callable, optional): Called as cancelled(index) before
+            every call. The remaining chunks of utterances for which it
+            returns true are skipped.
+
+        Returns:
+            list: The segments of every utterance, in the order of prepared.
+        """
+        results = [[] for _ in prepared]
+        # Utterances decoded together need the same prompt and options. The
+        # options also hold the utterance's own VAD clip timestamps, which
+        # decoding does not use
+        groups = []
+        for index, utterance in enumerate(prepared):
+            if len(utterance.features) == 0:
+                continue
+            key = (utterance.tokenizer.language_code, utterance.tokenizer.task)
+            options = dataclasses.replace(utterance.options, clip_timestamps=None)
+            for group_key, group_options, indices in groups:
+                if group_key == key and group_options == options:
+                    indices.append(index)
+                    break
+            else:
+                groups.append((key, options, [index]))
+
+        for _, options, indices in groups:
+            tokenizer = prepared[indices[0]].tokenizer
+            # Owner of every chunk
+            owners = [index for index in indices
+                      for _ in range(len(prepared[index].features))]
+            features = np.concatenate([prepared[index].features for index in indices])
+            chunks_metadata = [metadata for index in indices
+                               for metadata in prepared[index].chunks_metadata]
+
+            remaining = list(range(len(features)))
+            while remaining:
+                if cancelled is not None:
+                    remaining = [chunk for chunk in remaining if not cancelled(owners[chunk])]
+                    if not remaining:
+                        break
+                selected, remaining = remaining[:batch_size], remaining[batch_size:]
+                outputs = self.forward(features[selected],
+                                       tokenizer,
+                                       [chunks_metadata[chunk] for chunk in selected],
+                                       options)
+                for owner, chunk_segments in zip((owners[chunk] for chunk in selected), outputs):
+                    for segment in chunk_segments:
+                        results[owner].append(self._to_segment(
+                            segment, len(results[owner]) + 1, options))
+
+        self.last_speech_timestamp = 0.0
+        return results
+
+    @staticmethod
+    def _to_segment(segment, segment_id, options):
+        """Builds a Segment like BatchedInferencePipeline's generator does."""
+        return Segment(
+            seek=segment["seek"],
+            id=segment_id,
+            text=segment["text"],
+            start=round(segment["start"], 3),
+            end=round(segment["end"], 3),
+            words=None,
+            tokens=segment["tokens"],
+            avg_logprob=segment["avg_logprob"],
+            no_speech_prob=segment["no_speech_prob"],
+            compression_ratio=segment["compression_ratio"],
+            temperature=options.temperatures[0],
+        )
+
+
+def collect_batch(requests, first, window, max_requests):
+    """
+    Collects the requests arriving within window seconds after the first.
+
+    Args:
+    - requests (queue.Queue): Queue of pending requests.
+    - first: Request already taken from the queue.
+    - window (float): Seconds to wait for more requests.
+    - max_requests (int): Maximum number of requests per batch.
+
+    Returns:
+        list: first followed by the collected requests.
+    """
+    batch = [first]
+    deadline = time.time() + window
+    while len(batch) < max_requests:
+        remaining = deadline - time.time()
+        try:
+            if remaining > 0:
+                batch.append(requests.get(timeout=remaining))
+            else:
+                # Requests that are already waiting join without delay
+                batch.append(requests.get_nowait())
+        except queue.Empty:
+            break
+    return batch
@@ -0,0 +1,139 @@
+"""
+
+Load-adaptive pause between realtime transcription passes.
+
+With a fixed realtime_processing_pause of 0 the realtime worker runs the
+realtime model back to back. On a busy CPU that starves the main
+transcription and the VAD threads, on an idle machine the update rate is
+only limited by inference time. RealtimeCadenceController measures every
+pass and picks the pause before the next one so that
+
+- passes start no more often than the target update interval,
+- the realtime model uses at most cpu_budget of the wall clock time
+  (inference / (inference + pause)),
+- passes back off exponentially while the main model has queued work or
+  a pass found no new audio.
+
+"""
+
+# Smoothing factor of the inference time and interval averages
+EMA_ALPHA = 0.2
+
+# Pause multiplied by the backoff factor when no computed pause exists
+MIN_BACKOFF_PAUSE = 0.05
+MAX_BACKOFF = 16
+
+
+class RealtimeCadenceController:
+    """
+    Chooses the pause before each realtime transcription pass.
+
+    Only used by the realtime worker thread, the statistics may be read
+    from any thread.
+    """
+
+    def __init__(self, target_interval=0.3, cpu_budget=0.5, min_pause=0.0,
+                 max_pause=2.0):
+        """
+        Args:
+        - target_interval (float, default=0.3): Desired time between the
+            starts of two passes in seconds.
+        - cpu_budget (float, default=0.5): Share of the time the realtime
+            model may spend in inference, between 0 and 1.
+        - min_pause (float, default=0.0): Lower bound of the pause, e.g.
+            the configured realtime_processing_pause.
+        - max_pause (float, default=2.0): Upper bound of the pause,
+            including backoff.
+        """
+        self.target_interval = max(float(target_interval), 0.0)
+        self.cpu_budget = min(max(float(cpu_budget), 0.01), 1.0)
+        self.min_pause = max(float(min_pause), 0.0)
+        self.max_pause = max(float(max_pause), self.min_pause)
+
+        self.pause = self.min_pause
+        self.backoff = 1
+        self.inference_avg = 0.0
+        self.interval_avg = 0.0
+        self.audio_growth_last = 0.0
+
+        # Statistics
+        self.passes = 0
+        self.skipped = 0
+        self.backoffs = 0
+
+    def reset(self):
+        """Clears the backoff, e.g. when a new recording starts."""
+        self.backoff = 1
+        self._update_pause()
+
+    def record_pass(self, inference_time, audio_growth, interval=None):
+        """
+        Records a finished pass and computes the next pause.
+
+        Args:
+        - inference_time (float): Duration of the pass in seconds.
+        - audio_growth (float): Seconds of audio added since the previous
+            pass.
+        - interval (float, optional): Time since the start of the previous
+            pass, for the statistics.
+        """
+        self.passes += 1
+        if self.passes == 1:
+            self.inference_avg = inference_time
+        else:
+            self.inference_avg += (inference_time - self.inference_avg) * EMA_ALPHA
+        if interval is not None:
+            if self.interval_avg:
+                self.interval_avg += (interval - self.interval_avg) * EMA_ALPHA
+            else:
+                self.interval_avg = interval
+        self.audio_growth_last = audio_growth
+
+        if audio_growth <= 0:
+            # Nothing new to transcribe, the pass was wasted
+            self._increase_backoff()
+        else:
+            self.backoff = 1
+        self._update_pause()
+
+    def record_skip(self):
+        """
+        Records a pass skipped because the main model has queued work and
+        backs off further.
+        """
+        self.skipped += 1
+        self._increase_backoff()
+        self._update_pause()
+
+    def _increase_backoff(self):
+        self.backoffs += 1
+        self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+
+    def _update_pause(self):
+        budget_pause = self.inference_avg * (1.0 - self.cpu_budget) / self.cpu_budget
+        interval_pause = self.target_interval - self.inference_avg
+        pause = max(self.min_pause, budget_pause, interval_pause)
+        if self.backoff > 1:
+            pause = max(pause, MIN_BACKOFF_PAUSE) * self.backoff
+        self.pause = min(pause, self.max_pause)
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: The chosen pause, average inference time and interval
+              between passes, the resulting duty cycle, the current backoff
+              factor and pass / skip counters.
+        """
+        cycle = self.inference_avg + self.pause
+        return {
+            'pause_s': round(self.pause, 3),
+            'inference_avg_s': round(self.inference_avg, 3),
+            'interval_avg_s': round(self.interval_avg, 3),
+            'duty_cycle': round(self.inference_avg / cycle, 3) if cycle else 0.0,
+            'target_interval_s': self.target_interval,
+            'cpu_budget': self.cpu_budget,
+            'backoff': self.backoff,
+            'passes': self.passes,
+            'skipped': self.skipped,
+            'backoffs': self.backoffs,
+        }
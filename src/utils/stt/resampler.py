@@ -0,0 +1,192 @@
+"""
+
+Streaming polyphase resampler used for browser and microphone audio.
+
+Resampling every small chunk independently with the FFT based
+`scipy.signal.resample` is expensive and produces edge artifacts at every
+chunk boundary. StreamingResampler instead precomputes a polyphase filter
+bank once per (source, target) rate pair and carries the filter history
+from one chunk to the next, so a stream resampled chunk by chunk is
+identical to resampling the concatenated signal in one go.
+
+"""
+
+from math import gcd
+import functools
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+from scipy import signal
+
+INT16_MAX_VALUE = 32767
+INT16_MIN_VALUE = -32768
+
+# Source rates accepted from clients. An odd rate such as 44101 Hz has a
+# huge up/down ratio and a filter bank of hundreds of thousands of taps
+COMMON_SAMPLE_RATES = (8000, 11025, 12000, 16000, 22050, 24000, 32000,
+                       44100, 48000, 88200, 96000, 176400, 192000)
+
+# Number of rate pairs whose filter banks are kept for reuse
+FILTER_BANK_CACHE_SIZE = 16
+
+
+@functools.lru_cache(maxsize=FILTER_BANK_CACHE_SIZE)
+def _design_filter_bank(source_rate, target_rate):
+    """
+    Designs the anti-aliasing low pass filter for a rate pair and splits it
+    into its polyphase components.
+
+    The filter matches the one used by `scipy.signal.resample_poly`
+    (Kaiser window, beta 5.0, 10 zero crossings per side).
+
+    Returns:
+        tuple: (up, down, bank) where bank[p] holds the time reversed taps
+          of phase p, ready to be applied to an ascending input window.
+    """
+    divisor = gcd(source_rate, target_rate)
+    up = target_rate // divisor
+    down = source_rate // divisor
+
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    taps = signal.firwin(2 * half_len + 1, 1.0 / max_rate,
+                         window=('kaiser', 5.0)) * up
+
+    taps_per_phase = -(-len(taps) // up)
+    padded = np.zeros(taps_per_phase * up, dtype=np.float64)
+    padded[:len(taps)] = taps
+
+    # bank[p, k] = taps[p + k * up], reversed along k
+    bank = padded.reshape(taps_per_phase, up).T[:, ::-1]
+    bank = np.ascontiguousarray(bank, dtype=np.float32)
+    bank.setflags(write=False)
+    return up, down, bank
+
+
+class StreamingResampler:
+    """
+    Stateful polyphase resampler for one input stream.
+
+    Create one instance per stream (browser connection, microphone) and feed
+    its chunks in order through process(). Filter banks are shared between
+    instances with the same rate pair.
+    """
+
+    def __init__(self, source_rate, target_rate=16000):
+        """
+        Args:
+        - source_rate (int): Sample rate of the incoming audio.
+        - target_rate (int, default=16000): Sample rate to convert to.
+        """
+        self.source_rate = int(source_rate)
+        self.target_rate = int(target_rate)
+        self.passthrough = self.source_rate == self.target_rate
+
+        if not self.passthrough:
+            self._up, self._down, self._bank = _design_filter_bank(
+                self.source_rate, self.target_rate)
+            self._taps_per_phase = self._bank.shape[1]
+            # Output n uses phase (n * down) % up, which repeats every `up`
+            # outputs. Rows in output order, tiled on demand, let process()
+            # take the coefficients for a chunk as a slice instead of a gather.
+            self._phase_order = self._bank[
+                (np.arange(self._up) * self._down) % self._up]
+            self._phase_rows = self._phase_order
+        self.reset()
+
+    def reset(self):
+        """
+        Clears the filter history, e.g. when the stream is restarted.
+        """
+        self._consumed = 0
+        self._next_output = 0
+        if not self.passthrough:
+            self._history = np.zeros(self._taps_per_phase - 1,
+                                     dtype=np.float32)
+
+    def output_length(self, input_length):
+        """
+        Returns the number of samples the next process() call will produce
+        for an input of the given length.
+        """
+        if self.passthrough:
+            return input_length
+        total = self._consumed + input_length
+        if total <= 0:
+            return 0
+        return max(0, (self._up * total - 1) // self._down + 1
+                   - self._next_output)
+
+    def process(self, samples, out=None):
+        """
+        Resamples the next chunk of the stream.
+
+        Args:
+        - samples (bytes, memoryview or np.ndarray): Mono audio chunk.
+            Raw bytes are interpreted as 16 bit PCM. Arrays keep their
+            dtype: int16 input produces int16 output, anything else is
+            processed and returned as float32.
+        - out (np.ndarray, optional): Preallocated array receiving the
+            output. Must hold at least output_length(len(samples)) samples.
+
+        Returns:
+            np.ndarray: The resampled chunk (a view into `out` if given).
+        """
+        if not isinstance(samples, np.ndarray):
+            samples = np.frombuffer(samples, dtype=np.int16,
+                                    count=len(samples) // 2)
+        is_int16 = samples.dtype == np.int16
+
+        if self.passthrough:
+            if out is None:
+                return samples if is_int16 else samples.astype(np.float32, copy=False)
+            out[:len(samples)] = samples
+            return out[:len(samples)]
+
+        n_out = self.output_length(len(samples))
+        buffer = np.concatenate((self._history, samples.astype(np.float32, copy=False)))
+
+        # windows[i] holds the taps_per_phase input samples ending at input i
+        windows = as_strided(
+            buffer,
+            shape=(len(buffer) - self._taps_per_phase + 1, self._taps_per_phase),
+            strides=(buffer.strides[0], buffer.strides[0]),
+            writeable=False)
+
+        if self._up == 1:
+            # Integer decimation: a single phase, outputs are evenly strided
+            start = self._next_output * self._down - self._consumed
+            result = np.einsum('ij,j->i', windows[start::self._down][:n_out],
+                               self._bank[0])
+        else:
+            # Absolute output positions and the input sample they map to
+            positions = np.arange(self._next_output, self._next_output + n_out,
+                                  dtype=np.int64) * self._down
+            input_index = positions // self._up - self._consumed
+
+            first_row = self._next_output % self._up
+            if first_row + n_out > len(self._phase_rows):
+                periods = -(-(first_row + n_out) // self._up)
+                self._phase_rows = np.tile(self._phase_order, (periods, 1))
+            coefficients = self._phase_rows[first_row:first_row + n_out]
+
+            result = np.einsum('ij,ij->i', windows[input_index], coefficients)
+
+        self._consumed += len(samples)
+        self._next_output += n_out
+        self._history = buffer[len(buffer) - (self._taps_per_phase - 1):].copy()
+
+        if is_int16:
+            np.rint(result, out=result)
+            np.clip(result, INT16_MIN_VALUE, INT16_MAX_VALUE, out=result)
+        if out is None:
+            return result.astype(np.int16) if is_int16 else result
+        out[:n_out] = result
+        return out[:n_out]
+
+    def process_bytes(self, data):
+        """
+        Resamples a chunk of 16 bit PCM bytes and returns 16 bit PCM bytes.
+        """
+        if self.passthrough:
+            return data
+        return self.process(data).tobytes()
@@ -0,0 +1,194 @@
+"""
+
+Fixed-capacity ring buffer for chunking 16 bit PCM audio.
+
+AudioToTextRecorder used to collect incoming audio in a bytearray, growing
+it with += and cutting every emitted chunk off the front with a slice. Each
+slice reallocates and copies everything that is left in the buffer.
+AudioRingBuffer keeps the samples in one preallocated int16 array instead,
+so writing and reading only ever copy the samples that move.
+
+"""
+
+import logging
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Preallocated int16 ring buffer.
+
+    Writing more samples than there is free space for overwrites the oldest
+    samples. Every such overflow is counted and logged, never silent.
+    """
+
+    def __init__(self, capacity, dtype=np.int16):
+        """
+        Args:
+        - capacity (int): Maximum number of samples held by the buffer.
+        - dtype (np.dtype, default=np.int16): Sample type of the buffer.
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be a positive number of samples")
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(self.capacity, dtype=self.dtype)
+        self._bytes = memoryview(self._data).cast('B')
+        self._itemsize = self.dtype.itemsize
+        self._read_pos = 0
+        self._size = 0
+        self.overflow_count = 0
+        self.dropped_samples = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def free(self):
+        """Number of samples that can be written without overflowing."""
+        return self.capacity - self._size
+
+    def clear(self):
+        """Discards all buffered samples. Overflow counters are kept."""
+        self._read_pos = 0
+        self._size = 0
+
+    def _as_bytes(self, samples):
+        """Returns a flat byte view of samples without copying if possible."""
+        if isinstance(samples, np.ndarray):
+            samples = np.ascontiguousarray(samples, dtype=self.dtype)
+        view = memoryview(samples)
+        if view.format != 'B' or view.ndim != 1:
+            view = view.cast('B')
+        excess = len(view) % self._itemsize
+        return view[:len(view) - excess] if excess else view
+
+    def write(self, samples):
+        """
+        Appends samples to the buffer.
+
+        Args:
+        - samples (bytes, bytearray, memoryview or np.ndarray): Audio to
+            append. Raw bytes are interpreted with the buffer's dtype.
+
+        Returns:
+            int: Number of samples lost to the overflow (0 normally).
+        """
+        return self._write_bytes(self._as_bytes(samples))
+
+    def _write_bytes(self, data):
+        count = len(data) // self._itemsize
+        if count == 0:
+            return 0
+
+        dropped = 0
+        if count > self.capacity - self._size:
+            dropped = count - (self.capacity - self._size)
+            self.overflow_count += 1
+            self.dropped_samples += dropped
+            logging.warning(
+                f"Audio ring buffer overflow: dropped {dropped} oldest "
+                f"samples (capacity {self.capacity}, "
+                f"{self.overflow_count} overflows so far)")
+            if count >= self.capacity:
+                # Only the newest capacity samples survive
+                data = data[(count - self.capacity) * self._itemsize:]
+                count = self.capacity
+                self._read_pos = 0
+                self._size = 0
+            else:
+                self._read_pos = (self._read_pos + dropped) % self.capacity
+                self._size -= dropped
+
+        itemsize = self._itemsize
+        write_pos = (self._read_pos + self._size) % self.capacity
+        first = min(count, self.capacity - write_pos)
+        self._bytes[write_pos * itemsize:(write_pos + first) * itemsize] = \
+            data[:first * itemsize]
+        if first < count:
+            self._bytes[:(count - first) * itemsize] = data[first * itemsize:]
+        self._size += count
+        return dropped
+
+    def peek(self, count):
+        """
+        Returns the oldest `count` samples without consuming them.
+
+        The result is a view into the buffer when the samples are stored
+        contiguously (valid until they are overwritten) and a copy when
+        they wrap around the end of the buffer.
+        """
+        count = min(count, self._size)
+        end = self._read_pos + count
+        if end <= self.capacity:
+            return self._data[self._read_pos:end]
+        return np.concatenate((self._data[self._read_pos:],
+                               self._data[:end - self.capacity]))
+
+    def read(self, count):
+        """
+        Consumes the oldest `count` samples.
+
+        Returns:
+            bytearray: The samples as raw bytes (a single copy out of the
+              ring), or None if fewer than `count` samples are buffered.
+        """
+        if count > self._size:
+            return None
+        itemsize = self._itemsize
+        start = self._read_pos
+        end = start + count
+        if end <= self.capacity:
+            out = bytearray(self._bytes[start * itemsize:end * itemsize])
+        else:
+            out = bytearray(self._bytes[start * itemsize:])
+            out += self._bytes[:(end - self.capacity) * itemsize]
+        self._read_pos = end % self.capacity
+        self._size -= count
+        return out
+
+    def read_all(self):
+        """Consumes and returns everything buffered as raw bytes."""
+        return self.read(self._size)
+
+    def windows(self, samples, window_size):
+        """
+        Appends samples and yields every complete window as it fills up.
+
+        Buffered samples are topped up to a full window first. Further
+        complete windows are copied straight out of the input and only the
+        remainder is stored, so input of any length is chunked without
+        overflowing and every sample is copied at most twice. window_size
+        must not exceed the capacity.
+
+        Yields:
+            bytearray: `window_size` samples as raw bytes.
+        """
+        if window_size > self.capacity:
+            raise ValueError("window_size exceeds the ring buffer capacity")
+        data = self._as_bytes(samples)
+        itemsize = self._itemsize
+
+        # Common case for small chunks: not enough for a window yet
+        if self._size + len(data) // itemsize < window_size:
+            self._write_bytes(data)
+            return
+
+        while self._size >= window_size:
+            yield self.read(window_size)
+
+        position = 0
+        if self._size:
+            missing = (window_size - self._size) * itemsize
+            position = min(missing, len(data))
+            self._write_bytes(data[:position])
+            if self._size < window_size:
+                return
+            yield self.read(window_size)
+
+        window_bytes = window_size * itemsize
+        while len(data) - position >= window_bytes:
+            yield bytearray(data[position:position + window_bytes])
+            position += window_bytes
+
+        self._write_bytes(data[position:])
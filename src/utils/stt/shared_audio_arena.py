@@ -0,0 +1,177 @@
+"""
+
+Shared memory arena for the audio of transcription requests.
+
+TranscriptionPool used to pickle the whole float32 utterance into the
+worker's pipe for every final and early transcription request, about
+1.9 MB for 30 seconds of speech, copied into the pipe and out of it
+again. SharedAudioArena is one multiprocessing.shared_memory block the
+parent carves into variable sized regions. submit() copies the audio
+into a free region once and sends only a SharedAudio descriptor (block
+name, offset, length, dtype). The worker's SharedAudioReader maps the
+region as a read-only NumPy view without copying. The pool frees the
+region when the worker's answer arrives, so regions are reclaimed
+without any action of the caller.
+
+Allocation is first fit over a free list kept sorted by offset, adjacent
+free regions are merged. Only the parent allocates and frees, so a
+local lock is enough. Requests that do not fit are sent through the
+pipe as before and counted.
+
+"""
+
+from multiprocessing import shared_memory
+from typing import NamedTuple
+from .shared_audio_queue import _attach
+import numpy as np
+import threading
+import bisect
+
+# Regions start at multiples of this many bytes
+ALIGNMENT = 64
+
+
+def _region_size(nbytes):
+    """Size of the region holding nbytes, rounded up to the alignment."""
+    return max(-(-nbytes // ALIGNMENT) * ALIGNMENT, ALIGNMENT)
+
+
+class SharedAudio(NamedTuple):
+    """Descriptor of audio stored in a SharedAudioArena."""
+    name: str
+    offset: int
+    # Number of samples
+    length: int
+    dtype: str
+
+
+class SharedAudioArena:
+    """
+    Variable size allocator for request audio in one shared memory block.
+    Parent process only; put() and free() may be called from any thread.
+    """
+
+    def __init__(self, size):
+        """
+        Args:
+        - size (int): Size of the shared memory block in bytes.
+        """
+        self.size = int(size)
+        self._shm = shared_memory.SharedMemory(create=True, size=self.size)
+        self.name = self._shm.name
+        self._lock = threading.Lock()
+        # Free regions as sorted (offset, size) tuples
+        self._free = [(0, self.size)]
+
+        # Statistics
+        self.allocations = 0
+        self.fallbacks = 0
+        self.bytes_in_use = 0
+        self.bytes_in_use_max = 0
+
+    def put(self, audio):
+        """
+        Copies audio into a free region.
+
+        Returns:
+            SharedAudio: Descriptor of the region, or None if the arena has
+              no free region large enough.
+        """
+        audio = np.ascontiguousarray(audio)
+        size = _region_size(audio.nbytes)
+        with self._lock:
+            for index, (offset, free_size) in enumerate(self._free):
+                if free_size >= size:
+                    break
+            else:
+                self.fallbacks += 1
+                return None
+            if free_size == size:
+                del self._free[index]
+            else:
+                self._free[index] = (offset + size, free_size - size)
+            self.allocations += 1
+            self.bytes_in_use += size
+            self.bytes_in_use_max = max(self.bytes_in_use_max, self.bytes_in_use)
+
+        # The region is reserved, so it can be filled outside the lock
+        target = np.ndarray(audio.shape, dtype=audio.dtype,
+                            buffer=self._shm.buf, offset=offset)
+        target[:] = audio
+        return SharedAudio(self.name, offset, len(audio), audio.dtype.str)
+
+    def free(self, descriptor):
+        """Returns the region of a descriptor to the free list."""
+        size = _region_size(descriptor.length * np.dtype(descriptor.dtype).itemsize)
+        with self._lock:
+            self.bytes_in_use -= size
+            offset = descriptor.offset
+            index = bisect.bisect(self._free, (offset, 0))
+            # Merge with the following and the preceding free region
+            if index < len(self._free) and self._free[index][0] == offset + size:
+                size += self._free[index][1]
+                del self._free[index]
+            if index > 0 and sum(self._free[index - 1]) == offset:
+                offset, previous_size = self._free[index - 1]
+                size += previous_size
+                del self._free[index - 1]
+                index -= 1
+            self._free.insert(index, (offset, size))
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: Arena size, bytes in use now and at most, the number of
+              requests stored in the arena and of those sent through the
+              pipe because the arena was full.
+        """
+        with self._lock:
+            return {
+                'size_mb': round(self.size / 1e6, 1),
+                'in_use_mb': round(self.bytes_in_use / 1e6, 2),
+                'in_use_max_mb': round(self.bytes_in_use_max / 1e6, 2),
+                'allocations': self.allocations,
+                'fallbacks': self.fallbacks,
+            }
+
+    def close(self):
+        """Releases the shared memory block."""
+        # Unlink first: close() fails while views of the block are alive
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            self._shm.close()
+        except BufferError:
+            pass
+
+
+class SharedAudioReader:
+    """
+    Worker side: maps SharedAudio descriptors to read-only NumPy views.
+    Blocks are attached on first use and kept until close().
+    """
+
+    def __init__(self):
+        self._blocks = {}
+
+    def view(self, audio):
+        """Returns the audio of a descriptor, other audio unchanged."""
+        if not isinstance(audio, SharedAudio):
+            return audio
+        block = self._blocks.get(audio.name)
+        if block is None:
+            block = self._blocks[audio.name] = _attach(audio.name)
+        view = np.ndarray((audio.length,), dtype=np.dtype(audio.dtype),
+                          buffer=block.buf, offset=audio.offset)
+        view.flags.writeable = False
+        return view
+
+    def close(self):
+        for block in self._blocks.values():
+            try:
+                block.close()
+            except BufferError:
+                pass
+        self._blocks.clear()
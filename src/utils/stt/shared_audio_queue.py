@@ -0,0 +1,221 @@
+"""
+
+Shared memory audio queue between the audio producer and _recording_worker.
+
+AudioToTextRecorder.audio_queue is a torch.multiprocessing.Queue by
+default: every chunk is pickled, pushed through a pipe by a feeder thread
+and unpickled again, and qsize() has to ask a semaphore (and is not
+implemented at all on macOS). SharedMemoryAudioQueue is a single producer /
+single consumer ring of fixed size slots in multiprocessing.shared_memory.
+The producer only ever advances the write index and the consumer only the
+read index, so no lock is needed. A multiprocessing Event is used as a
+doorbell to wake a waiting consumer, and the fill level is the difference
+of the two indices.
+
+"""
+
+from multiprocessing import shared_memory
+import multiprocessing as mp
+import numpy as np
+import threading
+import logging
+import queue
+import time
+
+# Header layout (int64): write index, read index, dropped chunks
+_HEADER_FIELDS = 3
+_WRITE, _READ, _DROPPED = range(_HEADER_FIELDS)
+_HEADER_BYTES = _HEADER_FIELDS * 8
+
+
+def _attach(name):
+    """
+    Attaches to an existing shared memory block. Only the creating queue
+    unlinks the block, so the attaching side does not need to track it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track parameter. Child processes share the
+        # creator's resource tracker, so registering the name again is a
+        # no-op and unregistering it here would drop the creator's entry.
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedMemoryAudioQueue:
+    """
+    Lock-free single producer / single consumer audio chunk queue.
+
+    Offers the subset of the multiprocessing.Queue interface the recorder
+    uses (put, get, get_nowait, qsize, empty), plus an O(1) discard() for
+    overflow handling. Chunks longer than a slot are split over several
+    slots. When the ring is full, put() drops the new chunk and counts it
+    instead of blocking the audio producer. Several producer threads within
+    one process are serialized by a local lock; the consumer never takes it.
+    """
+
+    def __init__(self, slot_size, slots=256):
+        """
+        Args:
+        - slot_size (int): Maximum number of bytes per slot, normally the
+            size of one audio chunk (2 * buffer_size).
+        - slots (int, default=256): Number of chunks the ring can hold.
+        """
+        self.slot_size = int(slot_size)
+        self.slots = int(slots)
+        size = _HEADER_BYTES + 4 * self.slots + self.slot_size * self.slots
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._owner = True
+        self._doorbell = mp.Event()
+        self._put_lock = threading.Lock()
+        self._map_buffers()
+        self._header[:] = 0
+        self._last_drop_warning = 0
+
+    def _map_buffers(self):
+        buf = self._shm.buf
+        self._header = np.ndarray(
+            (_HEADER_FIELDS,), dtype=np.int64, buffer=buf)
+        self._lengths = np.ndarray(
+            (self.slots,), dtype=np.int32, buffer=buf, offset=_HEADER_BYTES)
+        self._data_offset = _HEADER_BYTES + 4 * self.slots
+        self._buf = buf
+
+    def __getstate__(self):
+        return {
+            'name': self._shm.name,
+            'slot_size': self.slot_size,
+            'slots': self.slots,
+            'doorbell': self._doorbell,
+        }
+
+    def __setstate__(self, state):
+        self.slot_size = state['slot_size']
+        self.slots = state['slots']
+        self._doorbell = state['doorbell']
+        self._shm = _attach(state['name'])
+        self._owner = False
+        self._put_lock = threading.Lock()
+        self._last_drop_warning = 0
+        self._map_buffers()
+
+    @property
+    def dropped(self):
+        """Number of chunks dropped because the ring was full."""
+        return int(self._header[_DROPPED])
+
+    def qsize(self):
+        """Returns the number of queued chunks (O(1), lock free)."""
+        return int(self._header[_WRITE] - self._header[_READ])
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def full(self):
+        return self.qsize() >= self.slots
+
+    def put(self, data):
+        """
+        Appends an audio chunk. Producer side only.
+
+        Returns:
+            bool: False if the ring was full and the chunk was dropped.
+        """
+        view = memoryview(data).cast('B')
+        pieces = max(1, -(-len(view) // self.slot_size))
+        with self._put_lock:
+            return self._put_pieces(view, pieces)
+
+    def _put_pieces(self, view, pieces):
+        write_index = int(self._header[_WRITE])
+
+        if write_index + pieces - int(self._header[_READ]) > self.slots:
+            self._header[_DROPPED] += 1
+            now = time.time()
+            if now - self._last_drop_warning > 1:
+                logging.warning("Shared memory audio queue is full, "
+                                f"dropping chunks ({self.dropped} so far)")
+                self._last_drop_warning = now
+            return False
+
+        for piece in range(pieces):
+            chunk = view[piece * self.slot_size:(piece + 1) * self.slot_size]
+            slot = (write_index + piece) % self.slots
+            start = self._data_offset + slot * self.slot_size
+            self._buf[start:start + len(chunk)] = chunk
+            self._lengths[slot] = len(chunk)
+
+        # Publish the slots only after their contents are written
+        self._header[_WRITE] = write_index + pieces
+        self._doorbell.set()
+        return True
+
+    def get_nowait(self):
+        """
+        Removes and returns the oldest chunk as bytes. Consumer side only.
+
+        Raises:
+            queue.Empty: If no chunk is available.
+        """
+        read_index = int(self._header[_READ])
+        if read_index >= self._header[_WRITE]:
+            raise queue.Empty
+        slot = read_index % self.slots
+        start = self._data_offset + slot * self.slot_size
+        data = bytes(self._buf[start:start + int(self._lengths[slot])])
+        self._header[_READ] = read_index + 1
+        return data
+
+    def get(self, block=True, timeout=None):
+        """
+        Removes and returns the oldest chunk, waiting for the doorbell
+        if the queue is empty.
+
+        Raises:
+            queue.Empty: If no chunk arrived within timeout.
+        """
+        try:
+            return self.get_nowait()
+        except queue.Empty:
+            if not block:
+                raise
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Clear before re-checking, so a put() in between rings again
+            self._doorbell.clear()
+            try:
+                return self.get_nowait()
+            except queue.Empty:
+                pass
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise queue.Empty
+            self._doorbell.wait(remaining)
+
+    def discard(self, count):
+        """
+        Drops up to `count` of the oldest chunks at once. Consumer side only.
+
+        Returns:
+            int: The number of chunks discarded.
+        """
+        read_index = int(self._header[_READ])
+        count = max(0, min(int(count), int(self._header[_WRITE]) - read_index))
+        self._header[_READ] = read_index + count
+        return count
+
+    def close(self):
+        """
+        Detaches from the shared memory. The creating process also
+        releases the block.
+        """
+        self._header = self._lengths = self._buf = None
+        try:
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+        except (FileNotFoundError, BufferError):
+            pass
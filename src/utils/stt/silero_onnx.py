@@ -0,0 +1,158 @@
+"""
+
+Standalone Silero VAD engine running the ONNX model with onnxruntime.
+
+AudioToTextRecorder used to load Silero VAD through torch.hub, which needs
+either a populated hub cache or network access at startup, and evaluated
+it one 512 sample chunk at a time through torch tensors. SileroOnnxVad
+loads silero_vad.onnx from a local path and runs it with onnxruntime on
+numpy arrays. The model's recurrent state is kept outside the engine in
+one SileroVadSession per audio stream, so the frames of many streams can
+be evaluated together in a single batched call to process_batch().
+
+Both model generations are supported: v5 and later (single `state`
+input, 64 samples of context prepended to each frame) and v4 (`h` and
+`c` inputs, no context).
+
+"""
+
+import numpy as np
+import logging
+import os
+
+try:
+    import onnxruntime
+except ImportError:  # only needed when a local Silero model path is set
+    onnxruntime = None
+
+# Frame and context length per supported sample rate (v5 and later)
+FRAME_SAMPLES = {16000: 512, 8000: 256}
+CONTEXT_SAMPLES = {16000: 64, 8000: 32}
+
+# Recurrent state sizes: v5 uses one (2, batch, 128) state tensor, v4 uses
+# separate (2, batch, 64) h and c tensors
+STATE_SIZE_V5 = 128
+STATE_SIZE_V4 = 64
+
+
+class SileroVadSession:
+    """
+    Recurrent state of one audio stream for a SileroOnnxVad engine.
+
+    Calling the session evaluates a single frame. The interface mirrors
+    the torch.hub model (a callable with reset_states()), so it can be
+    used in its place.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.reset_states()
+
+    def reset_states(self):
+        """Clears the recurrent state, e.g. at the start of a recording."""
+        engine = self.engine
+        if engine.has_context:
+            self.state = np.zeros((2, 1, STATE_SIZE_V5), dtype=np.float32)
+            self.context = np.zeros(engine.context_samples, dtype=np.float32)
+        else:
+            self.state = np.zeros((2, 2, 1, STATE_SIZE_V4), dtype=np.float32)
+            self.context = None
+
+    def __call__(self, frame):
+        """
+        Returns the speech probability of one frame.
+
+        Args:
+        - frame (np.ndarray): frame_samples float32 samples in [-1, 1].
+        """
+        return float(self.engine.process_batch([frame], [self])[0])
+
+
+class SileroOnnxVad:
+    """
+    Silero VAD ONNX model shared by any number of SileroVadSessions.
+
+    onnxruntime sessions are thread safe, so one engine can serve several
+    threads as long as each session is only used by one of them at a time.
+    """
+
+    def __init__(self, model_path, sample_rate=16000, providers=None,
+                 num_threads=1):
+        """
+        Args:
+        - model_path (str): Path to a local silero_vad.onnx file.
+        - sample_rate (int, default=16000): 16000 or 8000.
+        - providers (list, optional): onnxruntime execution providers,
+            defaults to CPUExecutionProvider.
+        - num_threads (int, default=1): Intra-op threads per inference call.
+        """
+        if onnxruntime is None:
+            raise ImportError("onnxruntime is required for the ONNX "
+                              "Silero VAD engine")
+        if sample_rate not in FRAME_SAMPLES:
+            raise ValueError(f"Silero VAD supports 8000 and 16000 Hz, "
+                             f"not {sample_rate}")
+        if not os.path.isfile(model_path):
+            raise FileNotFoundError(f"Silero VAD model not found: {model_path}")
+
+        options = onnxruntime.SessionOptions()
+        options.inter_op_num_threads = 1
+        options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            model_path,
+            sess_options=options,
+            providers=providers or ['CPUExecutionProvider'])
+
+        self.sample_rate = sample_rate
+        self.frame_samples = FRAME_SAMPLES[sample_rate]
+        input_names = {i.name for i in self.session.get_inputs()}
+        self.has_context = 'state' in input_names
+        self.context_samples = (CONTEXT_SAMPLES[sample_rate]
+                                if self.has_context else 0)
+        self._sr = np.array(sample_rate, dtype=np.int64)
+
+        logging.debug(f"Silero VAD ONNX model loaded from {model_path} "
+                      f"({'v5' if self.has_context else 'v4'} interface)")
+
+    def create_session(self):
+        """Returns a new SileroVadSession with cleared state."""
+        return SileroVadSession(self)
+
+    def process_batch(self, frames, sessions):
+        """
+        Evaluates one frame for each session in a single inference call
+        and advances every session's state.
+
+        Args:
+        - frames (sequence of np.ndarray or 2D np.ndarray): One frame of
+            frame_samples float32 samples per session.
+        - sessions (sequence of SileroVadSession): Sessions of this
+            engine, in the same order as frames.
+
+        Returns:
+            np.ndarray: Speech probability per session (float32).
+        """
+        batch = len(sessions)
+        if batch == 0:
+            return np.zeros(0, dtype=np.float32)
+        frames = np.asarray(frames, dtype=np.float32).reshape(
+            batch, self.frame_samples)
+
+        if self.has_context:
+            contexts = np.stack([s.context for s in sessions])
+            x = np.concatenate((contexts, frames), axis=1)
+            state = np.concatenate([s.state for s in sessions], axis=1)
+            out, state = self.session.run(
+                None, {'input': x, 'state': state, 'sr': self._sr})
+            for i, session in enumerate(sessions):
+                session.state = state[:, i:i + 1]
+                session.context = x[i, -self.context_samples:]
+        else:
+            state = np.concatenate([s.state for s in sessions], axis=2)
+            out, h, c = self.session.run(
+                None, {'input': frames, 'sr': self._sr,
+                       'h': state[0], 'c': state[1]})
+            for i, session in enumerate(sessions):
+                session.state = np.stack((h[:, i:i + 1], c[:, i:i + 1]))
+
+        return np.asarray(out, dtype=np.float32).reshape(batch)
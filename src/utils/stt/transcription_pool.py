@@ -0,0 +1,368 @@
+"""
+
+Pool of main model transcription workers.
+
+AudioToTextRecorder used to start exactly one TranscriptionWorker and
+talk to it through a single pipe. Callers serialized on
+transcription_lock and matched responses to requests by counting them
+(transcribe_count), so one long utterance blocked every other final
+transcription. TranscriptionPool starts N workers, each with its own
+pipe. Every request carries an ID, goes to the worker with the fewest
+outstanding requests and is answered through a Future. A single receiver
+thread matches the responses to their Futures by ID.
+
+Workers report when they picked a request up, how long inference took
+and how many requests were decoded in the same batch. The pool turns
+this into per-worker utilization, the time requests waited in a
+worker's queue and the average batch size.
+
+With an arena size, the audio of a request is stored in a
+SharedAudioArena and only its descriptor goes through the pipe. The
+region is freed when the answer arrives or the worker is lost.
+
+Requests are TranscriptionRequests (see transcription_requests). A
+request goes to the worker with the fewest outstanding requests of the
+same or a higher priority, since the worker serves those first. Workers
+may answer a request with STATUS_DROPPED instead of transcribing it;
+its Future then fails with RequestDropped.
+
+cancel() cancels a request's Future at once and tells its worker to
+stop working on it. The request stays pending, and its shared memory
+region stays reserved, until the worker answers. The worker answers
+with STATUS_CANCELLED and the decode time wasted on the request, which
+the pool reports per worker.
+
+"""
+
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from .shared_audio_arena import SharedAudioArena
+from .transcription_requests import (TranscriptionRequest, CancelRequest, PRIORITIES,
+                                     KIND_FINAL, STATUS_DROPPED, STATUS_CANCELLED)
+import torch.multiprocessing as mp
+import itertools
+import threading
+import logging
+import time
+
+# Receiver poll interval while no response arrives (seconds)
+RECEIVE_TIMEOUT = 0.1
+
+# Smoothing factor of the queue wait average
+QUEUE_WAIT_EMA_ALPHA = 0.1
+
+
+class TranscriptionError(Exception):
+    """Raised by a request's Future if the worker failed to transcribe."""
+
+
+class RequestDropped(TranscriptionError):
+    """Raised by a request's Future if the worker dropped the request."""
+
+
+class _Worker:
+    """Parent side state of one worker."""
+
+    def __init__(self, index, conn, stdout_pipe, ready_event):
+        self.index = index
+        self.conn = conn
+        self.stdout_pipe = stdout_pipe
+        self.ready_event = ready_event
+        self.process = None
+        self.send_lock = threading.Lock()
+        self.alive = True
+        # request_id -> (Future, submit time, SharedAudio or None, priority)
+        self.pending = {}
+
+        # Statistics
+        self.requests = 0
+        self.errors = 0
+        self.dropped = 0
+        self.cancelled = 0
+        # Decode time spent on requests cancelled while being decoded
+        self.wasted_seconds = 0.0
+        self.busy_seconds = 0.0
+        # Sum of the batch sizes the answered requests were decoded in
+        self.answered = 0
+        self.batched_total = 0
+        self.queue_wait_avg = 0.0
+        self.queue_wait_max = 0.0
+        # Busy time and wall clock at the last get_stats() call
+        self.busy_mark = 0.0
+        self.time_mark = time.time()
+
+
+class TranscriptionPool:
+    """
+    Routes transcription requests to a pool of TranscriptionWorkers.
+
+    submit() may be called from any thread.
+    """
+
+    def __init__(self, size, start_worker, arena_size=0):
+        """
+        Args:
+        - size (int): Number of workers, at least 1.
+        - start_worker (callable): Called as start_worker(index, conn,
+            stdout_pipe, ready_event) to start one TranscriptionWorker on
+            the child ends of its pipes. Returns the thread or process.
+        - arena_size (int, default=0): Size in bytes of the shared memory
+            arena for request audio, 0 to send the audio through the pipes.
+        """
+        self.size = max(int(size), 1)
+        self.arena = SharedAudioArena(arena_size) if arena_size > 0 else None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self.workers = []
+        for index in range(self.size):
+            conn, child_conn = mp.Pipe()
+            stdout_pipe, child_stdout_pipe = mp.Pipe()
+            worker = _Worker(index, conn, stdout_pipe, mp.Event())
+            worker.process = start_worker(index, child_conn, child_stdout_pipe,
+                                          worker.ready_event)
+            self.workers.append(worker)
+
+        self._receiver = threading.Thread(target=self._receive,
+                                          name="transcription-pool-receiver",
+                                          daemon=True)
+        self._receiver.start()
+
+    @property
+    def stdout_pipes(self):
+        """Parent ends of the workers' stdout pipes."""
+        return [worker.stdout_pipe for worker in self.workers]
+
+    @property
+    def outstanding(self):
+        """Number of requests sent and not answered yet."""
+        return sum(len(worker.pending) for worker in self.workers)
+
+    def wait_ready(self):
+        """Blocks until every worker has loaded its model."""
+        for worker in self.workers:
+            worker.ready_event.wait()
+
+    def submit(self, audio, language, kind=KIND_FINAL, utterance=None, deadline=None):
+        """
+        Sends audio to the least loaded worker.
+
+        Args:
+        - audio (np.ndarray): float32 audio at 16 kHz.
+        - language (str): Language code, empty or None to detect it.
+        - kind (str, default=KIND_FINAL): KIND_FINAL, KIND_EARLY or
+            KIND_REALTIME, decides the request's priority.
+        - utterance (int, optional): ID of the recording the audio belongs
+            to. Lets the worker drop real-time requests of the recording
+            that newer requests made useless.
+        - deadline (float, optional): time.time() after which the worker
+            drops the request instead of transcribing it.
+
+        Returns:
+            Future: Resolves to (transcription, info), fails with
+              TranscriptionError, or RequestDropped if the worker dropped
+              the request. Its request_id attribute holds the ID.
+        """
+        if self._closed.is_set():
+            raise RuntimeError("Transcription pool is shut down")
+        future = Future()
+        priority = PRIORITIES[kind]
+        # Falls back to the pipe if the arena is full
+        shared = self.arena.put(audio) if self.arena is not None else None
+        with self._lock:
+            candidates = [worker for worker in self.workers if worker.alive]
+            if not candidates:
+                if shared is not None:
+                    self.arena.free(shared)
+                raise RuntimeError("No transcription worker is running")
+            # Fewest outstanding requests served before this one, then the
+            # fewest outstanding requests, then the least busy so far
+            worker = min(candidates,
+                         key=lambda w: (sum(1 for entry in w.pending.values()
+                                            if entry[3] <= priority),
+                                        len(w.pending), w.busy_seconds))
+            request_id = next(self._ids)
+            future.request_id = request_id
+            worker.pending[request_id] = (future, time.time(), shared, priority)
+            worker.requests += 1
+
+        request = TranscriptionRequest(request_id, kind, priority, deadline, utterance,
+                                       shared if shared is not None else audio, language)
+        try:
+            with worker.send_lock:
+                worker.conn.send(request)
+        except (BrokenPipeError, EOFError, OSError) as e:
+            self._fail_worker(worker, e)
+        return future
+
+    def cancel(self, future):
+        """
+        Cancels a request submitted with submit(). Its worker drops it if
+        it is still queued and stops decoding it otherwise.
+
+        Returns:
+            bool: False if the request was already answered.
+        """
+        request_id = future.request_id
+        with self._lock:
+            worker = next((worker for worker in self.workers
+                           if request_id in worker.pending), None)
+        if worker is None or not future.cancel():
+            return False
+        try:
+            with worker.send_lock:
+                worker.conn.send(CancelRequest(request_id))
+        except (BrokenPipeError, EOFError, OSError) as e:
+            self._fail_worker(worker, e)
+        return True
+
+    def _receive(self):
+        """Matches the workers' responses to the pending Futures."""
+        while not self._closed.is_set():
+            connections = {worker.conn: worker for worker in self.workers
+                           if worker.alive}
+            if not connections:
+                time.sleep(RECEIVE_TIMEOUT)
+                continue
+            try:
+                ready = wait(list(connections), timeout=RECEIVE_TIMEOUT)
+            except OSError:
+                # A connection was closed during shutdown
+                continue
+            for conn in ready:
+                worker = connections[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError) as e:
+                    if not self._closed.is_set():
+                        self._fail_worker(worker, e)
+                    continue
+                self._complete(worker, message)
+
+    def _complete(self, worker, message):
+        request_id, status, result, started, inference_time, batch_size = message
+        with self._lock:
+            entry = worker.pending.pop(request_id, None)
+            if entry is None:
+                logging.warning(f"Transcription worker {worker.index} answered "
+                                f"unknown request {request_id}")
+                return
+            future, submitted, shared, _ = entry
+            if status == STATUS_DROPPED:
+                worker.dropped += 1
+            elif status == STATUS_CANCELLED:
+                worker.cancelled += 1
+                worker.busy_seconds += inference_time
+                worker.wasted_seconds += inference_time
+            else:
+                worker.busy_seconds += inference_time
+                worker.answered += 1
+                worker.batched_total += batch_size
+                queue_wait = max(started - submitted, 0.0)
+                worker.queue_wait_avg += (queue_wait - worker.queue_wait_avg) * QUEUE_WAIT_EMA_ALPHA
+                worker.queue_wait_max = max(worker.queue_wait_max, queue_wait)
+                if status != 'success':
+                    worker.errors += 1
+
+        if shared is not None:
+            self.arena.free(shared)
+        if not future.set_running_or_notify_cancel():
+            # Cancelled by cancel()
+            return
+        if status == 'success':
+            future.set_result(result)
+        elif status == STATUS_DROPPED:
+            future.set_exception(RequestDropped(result))
+        else:
+            future.set_exception(TranscriptionError(result))
+
+    def _fail_worker(self, worker, error):
+        """Takes a worker whose pipe broke out of the pool."""
+        with self._lock:
+            if not worker.alive:
+                return
+            worker.alive = False
+            pending = list(worker.pending.values())
+            worker.pending.clear()
+        logging.error(f"Transcription worker {worker.index} is unreachable: {error}")
+        for future, _, shared, _ in pending:
+            if shared is not None:
+                self.arena.free(shared)
+            if not future.set_running_or_notify_cancel():
+                continue
+            future.set_exception(TranscriptionError(
+                f"Transcription worker {worker.index} is unreachable"))
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: Per worker the requests, errors, dropped, cancelled and
+              outstanding requests, the decode seconds wasted on cancelled
+              requests, utilization (share of the time spent in inference
+              since the previous call), the average and maximum queue wait in
+              milliseconds and the average number of requests decoded
+              together; plus pool totals and the shared memory arena's
+              usage under 'shared_memory'.
+        """
+        now = time.time()
+        workers = []
+        with self._lock:
+            for worker in self.workers:
+                interval = now - worker.time_mark
+                busy = worker.busy_seconds - worker.busy_mark
+                workers.append({
+                    'alive': worker.alive,
+                    'requests': worker.requests,
+                    'errors': worker.errors,
+                    'dropped': worker.dropped,
+                    'cancelled': worker.cancelled,
+                    'wasted_seconds': round(worker.wasted_seconds, 3),
+                    'outstanding': len(worker.pending),
+                    'utilization': round(min(busy / interval, 1.0), 3)
+                    if interval > 0 else 0.0,
+                    'queue_wait_avg_ms': round(worker.queue_wait_avg * 1000, 1),
+                    'queue_wait_max_ms': round(worker.queue_wait_max * 1000, 1),
+                    'batch_size_avg': round(worker.batched_total / worker.answered, 2)
+                    if worker.answered else 0.0,
+                })
+                # Utilization and the maximum cover the interval since the
+                # last call
+                worker.busy_mark = worker.busy_seconds
+                worker.time_mark = now
+                worker.queue_wait_max = 0.0
+        stats = {
+            'size': self.size,
+            'outstanding': sum(worker['outstanding'] for worker in workers),
+            'cancelled': sum(worker['cancelled'] for worker in workers),
+            'wasted_seconds': round(sum(worker['wasted_seconds'] for worker in workers), 3),
+            'utilization': round(sum(worker['utilization'] for worker in workers)
+                                 / len(workers), 3),
+            'workers': workers,
+        }
+        if self.arena is not None:
+            stats['shared_memory'] = self.arena.get_stats()
+        return stats
+
+    def shutdown(self, timeout=10):
+        """
+        Stops the receiver and waits for the workers, which end on the
+        recorder's shutdown event. Pending requests are cancelled.
+        """
+        self._closed.set()
+        for worker in self.workers:
+            process = worker.process
+            if process is not None:
+                process.join(timeout=timeout)
+                if process.is_alive():
+                    logging.warning(f"Transcription worker {worker.index} did not "
+                                    "terminate in time. Terminating forcefully.")
+                    if hasattr(process, 'terminate'):
+                        process.terminate()
+        self._receiver.join(timeout=1.0)
+        for worker in self.workers:
+            for future, _, _, _ in worker.pending.values():
+                future.cancel()
+            worker.pending.clear()
+            worker.conn.close()
+        if self.arena is not None:
+            self.arena.close()
@@ -0,0 +1,183 @@
+"""
+
+Typed requests to the main model transcription workers.
+
+Final transcriptions, early transcriptions and, with
+use_main_model_for_realtime, real-time passes all go to the same
+workers. Each worker used to take them from a FIFO queue, so a final
+transcription waited behind every real-time pass queued before it, and
+real-time passes that a newer pass of the same utterance had already
+replaced were still decoded.
+
+Every request now carries its kind, priority, utterance and an optional
+deadline. RequestQueue, the worker's queue, hands out the most urgent
+request first (final before early before real-time, FIFO within a
+priority). A real-time request replaces the queued real-time request
+of its utterance, a final request drops it as the recording is over,
+and requests whose deadline passed are dropped when they are taken.
+Dropped requests are answered with STATUS_DROPPED so the caller's
+Future resolves and the pool releases their resources.
+
+Preemption happens between batches: a decode that already started is
+not interrupted.
+
+A CancelRequest withdraws a request. The worker drops it if it is still
+queued. If it is being decoded, the worker stops at the next segment
+(or batch of VAD chunks) and answers with STATUS_CANCELLED and the
+decode time spent on it.
+
+"""
+
+from typing import NamedTuple, Optional
+import threading
+import itertools
+import heapq
+import queue
+import time
+
+KIND_FINAL = 'final'
+KIND_EARLY = 'early'
+KIND_REALTIME = 'realtime'
+
+# Lower values are served first
+PRIORITIES = {
+    KIND_FINAL: 0,
+    KIND_EARLY: 1,
+    KIND_REALTIME: 2,
+}
+
+# Status of the answer to a request the worker did not transcribe
+STATUS_DROPPED = 'dropped'
+# Status of the answer to a cancelled request
+STATUS_CANCELLED = 'cancelled'
+
+DROP_SUPERSEDED = 'superseded'
+DROP_EXPIRED = 'expired'
+DROP_CANCELLED = 'cancelled'
+
+
+class TranscriptionRequest(NamedTuple):
+    request_id: int
+    kind: str
+    priority: int
+    # Absolute time.time() after which the result is no longer needed
+    deadline: Optional[float]
+    # Recording the audio belongs to, None if unknown
+    utterance: Optional[int]
+    # np.ndarray or SharedAudio descriptor
+    audio: object
+    language: Optional[str]
+
+
+class CancelRequest(NamedTuple):
+    request_id: int
+
+
+class RequestQueue:
+    """
+    Priority queue of TranscriptionRequests, used like queue.Queue by the
+    worker (put, get, get_nowait, queue.Empty).
+    """
+
+    def __init__(self, on_drop):
+        """
+        Args:
+        - on_drop (callable): Called as on_drop(request, reason) for every
+            request that is dropped instead of being returned. Called
+            without holding the queue's lock.
+        """
+        self.on_drop = on_drop
+        self._heap = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        # Request IDs removed from the heap but not popped yet
+        self._removed = set()
+        # utterance -> its queued real-time request, there is at most one
+        self._realtime = {}
+
+    def put(self, request):
+        dropped = []
+        with self._cond:
+            if request.utterance is not None and request.kind in (KIND_REALTIME, KIND_FINAL):
+                # Newer audio of the utterance, or its final transcription,
+                # makes its queued real-time passes useless
+                queued = self._realtime.pop(request.utterance, None)
+                if queued is not None:
+                    self._removed.add(queued.request_id)
+                    dropped.append(queued)
+                if request.kind == KIND_REALTIME:
+                    self._realtime[request.utterance] = request
+            heapq.heappush(self._heap, (request.priority, next(self._order), request))
+            self._cond.notify()
+        for queued in dropped:
+            self.on_drop(queued, DROP_SUPERSEDED)
+
+    def cancel(self, request_id):
+        """
+        Drops a queued request with reason DROP_CANCELLED.
+
+        Returns:
+            bool: False if the request is not queued.
+        """
+        with self._cond:
+            if request_id in self._removed:
+                return False
+            for _, _, request in self._heap:
+                if request.request_id == request_id:
+                    break
+            else:
+                return False
+            self._removed.add(request_id)
+            if self._realtime.get(request.utterance) is request:
+                del self._realtime[request.utterance]
+        self.on_drop(request, DROP_CANCELLED)
+        return True
+
+    def get(self, timeout=None):
+        """
+        Returns the most urgent request whose deadline has not passed.
+
+        Raises:
+            queue.Empty: If no request arrives within timeout seconds.
+        """
+        end = None if timeout is None else time.time() + timeout
+        while True:
+            expired = []
+            with self._cond:
+                while True:
+                    request = self._pop(expired)
+                    if request is not None or expired:
+                        break
+                    remaining = None if end is None else end - time.time()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            for dropped in expired:
+                self.on_drop(dropped, DROP_EXPIRED)
+            if request is not None:
+                return request
+            if end is not None and time.time() >= end:
+                raise queue.Empty
+
+    def get_nowait(self):
+        return self.get(timeout=0)
+
+    def qsize(self):
+        with self._cond:
+            return len(self._heap) - len(self._removed)
+
+    def _pop(self, expired):
+        """Pops the next live request, collecting expired ones. Needs the lock."""
+        now = time.time()
+        while self._heap:
+            _, _, request = heapq.heappop(self._heap)
+            if request.request_id in self._removed:
+                self._removed.discard(request.request_id)
+                continue
+            if self._realtime.get(request.utterance) is request:
+                del self._realtime[request.utterance]
+            if request.deadline is not None and request.deadline < now:
+                expired.append(request)
+                continue
+            return request
+        return None
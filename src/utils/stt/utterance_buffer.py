@@ -0,0 +1,145 @@
+"""
+
+Contiguous, growable buffer holding the audio of the current utterance.
+
+AudioToTextRecorder used to keep the recording as a list of byte chunks.
+Every realtime pass, early transcription and wait_audio() rebuilt the
+whole utterance with `np.frombuffer(b''.join(frames))` and converted it
+with `astype(np.float32) / 32768`, allocating and copying all of it each
+time. UtteranceBuffer appends each chunk once into a preallocated int16
+array and a float32 mirror that grow by doubling, so taking the audio is
+an O(1) view.
+
+Views stay valid while the buffer keeps growing: the arrays are never
+written below the current end, growing moves the data to new arrays and
+clear() starts new ones. Readers on other threads therefore need no lock.
+
+"""
+
+import numpy as np
+
+INT16_MAX_ABS_VALUE = 32768.0
+
+# Initial capacity in samples (10 seconds at 16 kHz)
+INITIAL_CAPACITY = 160000
+
+
+class UtteranceBuffer:
+    """
+    Append-only int16 audio buffer with a float32 mirror in [-1, 1].
+
+    Only one thread may write (append, extend, trim_front, clear), any
+    number of threads may read.
+    """
+
+    def __init__(self, frames=None, capacity=INITIAL_CAPACITY):
+        """
+        Args:
+        - frames (iterable of bytes, optional): Chunks of 16 bit PCM to
+            start with.
+        - capacity (int, default=160000): Initial capacity in samples.
+        """
+        self._capacity = max(int(capacity), 1)
+        self._state = self._empty_state(self._capacity)
+
+        # Bytes written into the arrays, including growth copies
+        self.bytes_copied = 0
+        if frames:
+            self.extend(frames)
+
+    @staticmethod
+    def _empty_state(capacity):
+        # (int16 samples, float32 mirror, start, end), swapped as a whole so
+        # readers always see a consistent combination
+        return (np.empty(capacity, dtype=np.int16),
+                np.empty(capacity, dtype=np.float32), 0, 0)
+
+    def __len__(self):
+        _, _, start, end = self._state
+        return end - start
+
+    def append(self, data):
+        """
+        Appends a chunk of 16 bit PCM.
+
+        Args:
+        - data (bytes, bytearray, memoryview or np.ndarray): Mono int16
+            audio.
+        """
+        if isinstance(data, np.ndarray):
+            samples = data.astype(np.int16, copy=False).ravel()
+        else:
+            samples = np.frombuffer(data, dtype=np.int16,
+                                    count=len(data) // 2)
+        count = len(samples)
+        if not count:
+            return
+
+        pcm, audio, start, end = self._state
+        if end + count > len(pcm):
+            pcm, audio = self._grow(pcm, audio, end, end + count)
+
+        pcm[end:end + count] = samples
+        np.divide(samples, INT16_MAX_ABS_VALUE, out=audio[end:end + count],
+                  dtype=np.float32)
+        self.bytes_copied += count * 6
+        # Publish the new end only after the samples are written
+        self._state = (pcm, audio, start, end + count)
+
+    def extend(self, frames):
+        """Appends several chunks of 16 bit PCM at once."""
+        frames = list(frames)
+        if len(frames) == 1:
+            self.append(frames[0])
+        elif frames:
+            self.append(b''.join(frames))
+
+    def _grow(self, pcm, audio, end, required):
+        capacity = max(2 * len(pcm), required)
+        new_pcm = np.empty(capacity, dtype=np.int16)
+        new_audio = np.empty(capacity, dtype=np.float32)
+        # Positions are kept, so a concurrent reader's start stays valid
+        new_pcm[:end] = pcm[:end]
+        new_audio[:end] = audio[:end]
+        self.bytes_copied += end * 6
+        self._capacity = capacity
+        return new_pcm, new_audio
+
+    def trim_front(self, samples):
+        """
+        Removes samples from the beginning, e.g. a detected wake word.
+
+        Returns:
+            int: Number of samples removed.
+        """
+        pcm, audio, start, end = self._state
+        removed = min(max(int(samples), 0), end - start)
+        self._state = (pcm, audio, start + removed, end)
+        return removed
+
+    def clear(self):
+        """
+        Empties the buffer. New arrays of the current capacity are used, so
+        views handed out before stay untouched.
+        """
+        self._state = self._empty_state(self._capacity)
+
+    def int16(self):
+        """Returns an int16 view of the buffered audio."""
+        pcm, _, start, end = self._state
+        return pcm[start:end]
+
+    def float32(self):
+        """Returns a float32 view of the buffered audio in [-1, 1]."""
+        _, audio, start, end = self._state
+        return audio[start:end]
+
+    def tobytes(self):
+        """Returns a copy of the buffered audio as 16 bit PCM bytes."""
+        return self.int16().tobytes()
+
+    def copy(self):
+        """Returns an independent buffer with the same audio."""
+        duplicate = UtteranceBuffer(capacity=max(len(self), 1))
+        duplicate.append(self.int16())
+        return duplicate
@@ -0,0 +1,183 @@
+"""
+
+Long-lived worker thread for Silero VAD decisions.
+
+While listening, AudioToTextRecorder confirms every chunk WebRTC VAD flags
+as speech with the much more expensive Silero model. It used to start a new
+thread per chunk, guarded only by a plain boolean, so under load hundreds
+of short-lived threads were created per second and their results raced on
+is_silero_speech_active. SileroVadWorker runs all of these checks on one
+thread. Chunks submitted while a check is running are coalesced: only the
+newest one is kept, because the decision is only ever needed for the most
+recent audio. Decisions are published under the worker's lock, together
+with the check that they are not stale, and read without it.
+
+"""
+
+import threading
+import logging
+import time
+
+# Smoothing factor of the running inference latency average
+LATENCY_EMA_ALPHA = 0.1
+
+# Minimum interval between "falling behind" warnings (seconds)
+BEHIND_WARNING_INTERVAL = 5.0
+
+
+class SileroVadWorker:
+    """
+    Runs a VAD decision function on a single background thread.
+
+    submit() never blocks: if a chunk is still waiting to be processed it
+    is replaced by the new one and counted as coalesced. The latest
+    decision is available as `decision` without locking.
+    """
+
+    def __init__(self, detect, chunk_duration, name="silero-vad-worker"):
+        """
+        Args:
+        - detect (callable): Function taking a chunk of 16 bit PCM bytes and
+            returning True if it contains speech.
+        - chunk_duration (float): Duration of one submitted chunk in
+            seconds. Inference slower than this falls behind real time.
+        - name (str, default="silero-vad-worker"): Name of the thread.
+        """
+        self._detect = detect
+        self.chunk_duration = chunk_duration
+        self._condition = threading.Condition()
+        self._pending = None
+        self._running = True
+        self._busy = False
+        self._generation = 0
+
+        # Decision slot, only ever replaced as a whole while holding _condition
+        self.decision = False
+
+        # Statistics
+        self.submitted = 0
+        self.coalesced = 0
+        self.decisions = 0
+        self.errors = 0
+        self.behind = 0
+        self.latency_last = 0.0
+        self.latency_avg = 0.0
+        self.latency_max = 0.0
+        self._last_behind_warning = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def busy(self):
+        """True while a chunk is waiting or being processed."""
+        return self._busy or self._pending is not None
+
+    def submit(self, chunk):
+        """
+        Queues a chunk for a VAD decision, replacing any chunk that is
+        still waiting.
+        """
+        with self._condition:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = chunk
+            self.submitted += 1
+            self._condition.notify()
+
+    def clear(self):
+        """
+        Drops a waiting chunk and resets the decision, e.g. when recording
+        starts and the model state is reset.
+        """
+        with self._condition:
+            self._pending = None
+            # A decision still in flight belongs to the old generation and
+            # is not published
+            self._generation += 1
+            self.decision = False
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                chunk = self._pending
+                generation = self._generation
+                self._pending = None
+                self._busy = True
+
+            start = time.perf_counter()
+            try:
+                decision = bool(self._detect(chunk))
+                with self._condition:
+                    if generation == self._generation:
+                        self.decision = decision
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"Silero VAD worker error: {e}", exc_info=True)
+            finally:
+                self._busy = False
+            self._record_latency(time.perf_counter() - start)
+
+    def _record_latency(self, latency):
+        self.decisions += 1
+        self.latency_last = latency
+        if self.decisions == 1:
+            self.latency_avg = latency
+        else:
+            self.latency_avg += (latency - self.latency_avg) * LATENCY_EMA_ALPHA
+        if latency > self.latency_max:
+            self.latency_max = latency
+
+        if latency > self.chunk_duration:
+            self.behind += 1
+            now = time.time()
+            if now - self._last_behind_warning > BEHIND_WARNING_INTERVAL:
+                logging.warning(
+                    f"Silero VAD is falling behind real time: inference took "
+                    f"{latency * 1000:.1f} ms for a "
+                    f"{self.chunk_duration * 1000:.0f} ms chunk "
+                    f"({self.coalesced} chunks coalesced so far)")
+                self._last_behind_warning = now
+
+    def get_stats(self, reset_max=True):
+        """
+        Returns decision and latency statistics.
+
+        Args:
+        - reset_max (bool, default=True): Restart the maximum latency
+            window after reading it.
+
+        Returns:
+            dict: Counters, latencies in milliseconds and the real time
+              factor (average inference latency / chunk duration, above
+              1.0 means Silero cannot keep up).
+        """
+        stats = {
+            'submitted': self.submitted,
+            'decisions': self.decisions,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'behind_real_time': self.behind,
+            'latency_last_ms': round(self.latency_last * 1000, 2),
+            'latency_avg_ms': round(self.latency_avg * 1000, 2),
+            'latency_max_ms': round(self.latency_max * 1000, 2),
+            'real_time_factor': round(self.latency_avg / self.chunk_duration, 3)
+            if self.chunk_duration else 0.0,
+        }
+        if reset_max:
+            self.latency_max = 0.0
+        return stats
+
+    def stop(self, timeout=1.0):
+        """Stops the worker thread. A waiting chunk is discarded."""
+        with self._condition:
+            self._running = False
+            self._pending = None
+            self._condition.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
@@ -0,0 +1,115 @@
+"""
+
+Streaming WebRTC VAD front-end producing a per-frame speech mask.
+
+AudioToTextRecorder used to resample every chunk on its own with
+`scipy.signal.resample_poly` and then call webrtcvad once per 10 ms frame
+from a Python loop, dropping the samples that did not fill a whole frame.
+WebRtcVadFrontEnd converts the stream to 16 kHz once with a stateful
+StreamingResampler, carries incomplete frames over to the next chunk and
+evaluates all frames of a chunk with a single `map` over the webrtcvad C
+function, so no Python code runs per frame. The result is a boolean numpy
+mask with one entry per frame: activation checks use mask.any(),
+deactivation checks mask.all().
+
+"""
+
+from itertools import repeat
+import numpy as np
+
+from .resampler import StreamingResampler
+
+try:
+    import _webrtcvad
+except ImportError:  # other webrtcvad builds, fall back to Vad.is_speech
+    _webrtcvad = None
+
+VAD_SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2
+
+
+class WebRtcVadFrontEnd:
+    """
+    Feeds one audio stream into a webrtcvad.Vad instance.
+
+    Create one instance per stream and pass its chunks in order to
+    frame_mask(). Not thread safe, like the Vad instance it wraps.
+    """
+
+    def __init__(self, vad, sample_rate=16000, frame_duration_ms=10):
+        """
+        Args:
+        - vad (webrtcvad.Vad): Configured WebRTC VAD instance.
+        - sample_rate (int, default=16000): Sample rate of the incoming
+            16 bit PCM chunks.
+        - frame_duration_ms (int, default=10): WebRTC VAD frame length,
+            10, 20 or 30 ms.
+        """
+        self.vad = vad
+        self.sample_rate = int(sample_rate)
+        self.frame_samples = VAD_SAMPLE_RATE * frame_duration_ms // 1000
+        self.frame_bytes = self.frame_samples * BYTES_PER_SAMPLE
+        self._resampler = (StreamingResampler(self.sample_rate, VAD_SAMPLE_RATE)
+                           if self.sample_rate != VAD_SAMPLE_RATE else None)
+
+        # Call the C function directly when the Vad exposes its handle,
+        # otherwise go through the bound method
+        handle = getattr(vad, '_vad', None)
+        self._direct = _webrtcvad is not None and handle is not None
+        self._handle = handle
+
+        # Frame slices per number of frames, reused across chunks
+        self._slices = {}
+        self.reset()
+
+    def reset(self):
+        """
+        Drops the carried over samples and the resampler history, e.g.
+        after a gap in the stream.
+        """
+        self._remainder = b''
+        if self._resampler is not None:
+            self._resampler.reset()
+
+    def _frame_slices(self, num_frames):
+        slices = self._slices.get(num_frames)
+        if slices is None:
+            size = self.frame_bytes
+            slices = [slice(i * size, (i + 1) * size) for i in range(num_frames)]
+            self._slices[num_frames] = slices
+        return slices
+
+    def frame_mask(self, chunk):
+        """
+        Runs WebRTC VAD on every complete frame available after this chunk.
+
+        Args:
+        - chunk (bytes): 16 bit mono PCM at the front-end's sample rate.
+
+        Returns:
+            np.ndarray: Boolean speech flag per 10 ms frame. Empty if the
+              chunk did not complete a frame.
+        """
+        if self._resampler is not None:
+            chunk = self._resampler.process_bytes(chunk)
+        if self._remainder:
+            chunk = self._remainder + chunk
+
+        num_frames = len(chunk) // self.frame_bytes
+        used = num_frames * self.frame_bytes
+        self._remainder = bytes(chunk[used:])
+        if not num_frames:
+            return np.zeros(0, dtype=bool)
+
+        frames = map(memoryview(chunk).__getitem__,
+                     self._frame_slices(num_frames))
+        if self._direct:
+            results = map(_webrtcvad.process,
+                          repeat(self._handle, num_frames),
+                          repeat(VAD_SAMPLE_RATE, num_frames),
+                          frames,
+                          repeat(self.frame_samples, num_frames))
+        else:
+            results = map(self.vad.is_speech, frames,
+                          repeat(VAD_SAMPLE_RATE, num_frames))
+        return np.fromiter(results, dtype=bool, count=num_frames)
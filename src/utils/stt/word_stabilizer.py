@@ -0,0 +1,96 @@
+"""
+
+Word timestamp based stabilization of realtime transcripts.
+
+The realtime worker used to find the stable part of its text with
+`os.path.commonprefix` over the last two transcripts and then locate it
+in the newest one with a character by character tail search. A changed
+comma or capital letter cut the stable prefix short, and the search got
+slower as the text grew. WordStabilizer compares faster-whisper words
+instead. A word is committed when
+
+- the previous pass produced the same word (ignoring case and
+  punctuation) at about the same time, and
+- it ends well before the end of the audio, where the model still lacks
+  the context that follows.
+
+Committed words are never taken back. Everything after them is the
+volatile tail, which may still change with the next pass.
+
+"""
+
+from typing import List
+
+from .local_agreement import Word, normalize_word
+
+# Words ending less than this before the end of the audio stay volatile
+DEFAULT_TAIL_GUARD = 1.0
+
+# Maximum start time difference of the same word in two passes (seconds)
+DEFAULT_TIME_TOLERANCE = 0.3
+
+
+class WordStabilizer:
+    """
+    Splits the words of consecutive realtime passes into a committed part
+    and a volatile tail.
+
+    One instance per recording, used by the realtime worker thread only.
+    """
+
+    def __init__(self, tail_guard=DEFAULT_TAIL_GUARD,
+                 time_tolerance=DEFAULT_TIME_TOLERANCE):
+        """
+        Args:
+        - tail_guard (float, default=1.0): Words must end at least this
+            many seconds before the end of the audio to be committed.
+        - time_tolerance (float, default=0.3): Maximum difference of a
+            word's start time between two passes to count as a match.
+        """
+        self.tail_guard = tail_guard
+        self.time_tolerance = time_tolerance
+        self.committed: List[Word] = []
+        self.tail: List[Word] = []
+
+    @property
+    def committed_end(self):
+        """End time of the last committed word."""
+        return self.committed[-1].end if self.committed else 0.0
+
+    @property
+    def committed_text(self):
+        return "".join(word.text for word in self.committed)
+
+    @property
+    def tail_text(self):
+        return "".join(word.text for word in self.tail)
+
+    def update(self, words, audio_duration):
+        """
+        Adds the words of a new pass.
+
+        Args:
+        - words (iterable of Word): Words of the whole recording with
+            absolute start and end times in seconds.
+        - audio_duration (float): Length of the audio the pass saw.
+
+        Returns:
+            list of Word: The newly committed words.
+        """
+        # Words inside the committed part were already decided
+        boundary = self.committed_end - self.time_tolerance / 2
+        new = [word for word in words if word.start >= boundary]
+
+        commit_before = audio_duration - self.tail_guard
+        count = 0
+        for previous, current in zip(self.tail, new):
+            if current.end > commit_before \
+                    or abs(current.start - previous.start) > self.time_tolerance \
+                    or normalize_word(current.text) != normalize_word(previous.text):
+                break
+            count += 1
+
+        newly_committed = new[:count]
+        self.committed.extend(newly_committed)
+        self.tail = new[count:]
+        return newly_committed
@@ -1,34 +1,311 @@
 /**
  * AudioWorklet 处理器
  * 用于高性能音频处理，替代被弃用的 ScriptProcessorNode
+ *
+ * 在音频线程内把设备采样率（通常为 48kHz / 44.1kHz）的音频降采样到 16kHz，
+ * 并累积成固定时长的 16 位 PCM 数据包后再发送给主线程，
+ * 服务器收到 16kHz 音频后不再重采样。
+ *
+ * 可选的静音门限（客户端 VAD）按数据包计算能量并跟踪背景噪声，静音期间不发送音频，
+ * 只定期发送“静音 N 毫秒”标记；检测到语音时先补发预缓冲的数据包，避免语音开头被截断。
  */
+
+// 默认输出采样率（与服务器录音机一致）
+const DEFAULT_TARGET_SAMPLE_RATE = 16000;
+// 默认数据包时长（毫秒），16kHz 下为 512 个采样
+const DEFAULT_PACKET_DURATION_MS = 32;
+// 抗混叠滤波器参数，与服务器端 StreamingResampler 相同（Kaiser 窗，beta 5.0，每侧 10 个过零点）
+const KAISER_BETA = 5.0;
+const FILTER_ZERO_CROSSINGS = 10;
+
+// 客户端静音门限默认参数
+const DEFAULT_VAD_OPTIONS = {
+    enabled: false,
+    thresholdDb: 9,        // 能量高于背景噪声多少分贝视为语音
+    minSpeechDb: -55,      // 语音的最低绝对能量（dBFS），低于此值始终视为静音
+    hangoverMs: 400,       // 语音结束后继续发送的时长，避免截断词尾和短暂停顿
+    prerollMs: 320,        // 静音期间保留的最近音频，语音开始时先补发
+    silenceReportMs: 96    // 静音标记的发送间隔
+};
+// 背景噪声跟踪速度：能量下降时快速跟随，静音期间缓慢上升
+const NOISE_FLOOR_FALL_RATE = 0.5;
+const NOISE_FLOOR_RISE_RATE = 0.02;
+
+/**
+ * 合并静音门限参数，忽略未设置（undefined / null）的字段
+ */
+function mergeVadOptions(base, options) {
+    const merged = Object.assign({}, base);
+    for (const key in options || {}) {
+        if (options[key] !== undefined && options[key] !== null) {
+            merged[key] = options[key];
+        }
+    }
+    return merged;
+}
+
+function gcd(a, b) {
+    while (b) {
+        [a, b] = [b, a % b];
+    }
+    return a;
+}
+
+/**
+ * 第一类零阶修正贝塞尔函数（级数展开），用于计算 Kaiser 窗
+ */
+function besselI0(x) {
+    let sum = 1;
+    let term = 1;
+    const halfX = x / 2;
+    for (let k = 1; k < 50; k++) {
+        term *= (halfX / k) * (halfX / k);
+        sum += term;
+        if (term < sum * 1e-12) break;
+    }
+    return sum;
+}
+
+/**
+ * 设计 Kaiser 窗低通滤波器并拆分为多相滤波器组
+ * bank[p * tapsPerPhase + j] = taps[p + j * up]
+ */
+function designFilterBank(up, down) {
+    const maxRate = Math.max(up, down);
+    const halfLength = FILTER_ZERO_CROSSINGS * maxRate;
+    const numTaps = 2 * halfLength + 1;
+    const cutoff = 1 / maxRate;
+
+    const taps = new Float64Array(numTaps);
+    const i0Beta = besselI0(KAISER_BETA);
+    let sum = 0;
+    for (let n = 0; n < numTaps; n++) {
+        const x = n - halfLength;
+        const sinc = x === 0 ? 1 : Math.sin(Math.PI * cutoff * x) / (Math.PI * cutoff * x);
+        const ratio = 2 * n / (numTaps - 1) - 1;
+        const window = besselI0(KAISER_BETA * Math.sqrt(1 - ratio * ratio)) / i0Beta;
+        taps[n] = cutoff * sinc * window;
+        sum += taps[n];
+    }
+
+    // 直流增益归一化为 1，再乘以插值倍数补偿零值插入
+    const tapsPerPhase = Math.ceil(numTaps / up);
+    const bank = new Float32Array(up * tapsPerPhase);
+    for (let p = 0; p < up; p++) {
+        for (let j = 0; j < tapsPerPhase; j++) {
+            const index = p + j * up;
+            if (index < numTaps) {
+                bank[p * tapsPerPhase + j] = taps[index] / sum * up;
+            }
+        }
+    }
+    return { bank, tapsPerPhase };
+}
+
 class AudioProcessor extends AudioWorkletProcessor {
-    constructor() {
+    constructor(options) {
         super();
-        this._bufferSize = 256;
-        this._buffer = new Float32Array(this._bufferSize);
-        console.log('AudioProcessor 构造函数执行'); // 调试日志
+        const processorOptions = (options && options.processorOptions) || {};
+        this._targetSampleRate = processorOptions.targetSampleRate || DEFAULT_TARGET_SAMPLE_RATE;
+        const packetDurationMs = processorOptions.packetDurationMs || DEFAULT_PACKET_DURATION_MS;
+
+        // 输出数据包累积缓冲
+        this._packetSamples = Math.round(this._targetSampleRate * packetDurationMs / 1000);
+        this._packet = new Int16Array(this._packetSamples);
+        this._packetLength = 0;
+        this._packetMs = this._packetSamples * 1000 / this._targetSampleRate;
+
+        // 静音门限状态，可由主线程通过 port 消息随时更新参数
+        this._vad = mergeVadOptions(DEFAULT_VAD_OPTIONS, processorOptions.vad);
+        this._noiseFloorDb = null;
+        this._hangoverPackets = 0;
+        this._preroll = [];
+        this._suppressedMs = 0;
+        this.port.onmessage = (event) => {
+            if (event.data && event.data.vad) {
+                this._setVadOptions(event.data.vad);
+            }
+        };
+
+        // 设备采样率与目标采样率相同时直接转换，不做滤波
+        this._passthrough = sampleRate === this._targetSampleRate;
+        if (!this._passthrough) {
+            const divisor = gcd(sampleRate, this._targetSampleRate);
+            this._up = this._targetSampleRate / divisor;
+            this._down = sampleRate / divisor;
+            const { bank, tapsPerPhase } = designFilterBank(this._up, this._down);
+            this._bank = bank;
+            this._tapsPerPhase = tapsPerPhase;
+
+            // 输入缓冲：前 tapsPerPhase - 1 个采样为上一块保留的滤波器历史
+            this._historyLength = tapsPerPhase - 1;
+            this._buffer = new Float32Array(this._historyLength + 128);
+            // 下一个输出对应的输入位置（相对当前块）和多相相位
+            this._inputIndex = 0;
+            this._phase = 0;
+        }
+        console.log('AudioProcessor 构造函数执行: ' + sampleRate + 'Hz -> ' + this._targetSampleRate + 'Hz'); // 调试日志
     }
-    
+
+    /**
+     * 追加一个输出采样，数据包填满后发送给主线程
+     */
+    _pushSample(value) {
+        const scaled = value * 32768;
+        this._packet[this._packetLength++] = scaled > 32767 ? 32767 : (scaled < -32768 ? -32768 : scaled);
+        if (this._packetLength === this._packetSamples) {
+            const packet = this._packet;
+            this._packet = new Int16Array(this._packetSamples);
+            this._packetLength = 0;
+            if (this._vad.enabled) {
+                this._gatePacket(packet);
+            } else {
+                this._postPacket(packet);
+            }
+        }
+    }
+
+    /**
+     * 以可转移的 ArrayBuffer 发送给主线程，避免结构化克隆复制
+     */
+    _postPacket(packet) {
+        this.port.postMessage({
+            audioData: packet.buffer,
+            sampleRate: this._targetSampleRate
+        }, [packet.buffer]);
+    }
+
+    /**
+     * 发送累计的静音时长标记
+     */
+    _postSilence() {
+        if (this._suppressedMs > 0) {
+            this.port.postMessage({
+                silenceMs: this._suppressedMs,
+                sampleRate: this._targetSampleRate
+            });
+            this._suppressedMs = 0;
+        }
+    }
+
+    /**
+     * 先发送累计的静音标记，再按顺序补发预缓冲的数据包，保持时间顺序
+     */
+    _flushPreroll() {
+        this._postSilence();
+        for (const packet of this._preroll) {
+            this._postPacket(packet);
+        }
+        this._preroll = [];
+    }
+
+    /**
+     * 静音门限：语音（及其后的拖尾）直接发送，静音进入预缓冲，
+     * 超出预缓冲时长的部分只累计为静音标记
+     */
+    _gatePacket(packet) {
+        let energy = 0;
+        for (let i = 0; i < packet.length; i++) {
+            energy += packet[i] * packet[i];
+        }
+        const db = 10 * Math.log10(energy / packet.length / (32768 * 32768) + 1e-12);
+
+        if (this._noiseFloorDb === null) {
+            this._noiseFloorDb = db;
+        }
+        const isSpeech = db > this._noiseFloorDb + this._vad.thresholdDb && db > this._vad.minSpeechDb;
+        if (db < this._noiseFloorDb) {
+            this._noiseFloorDb += (db - this._noiseFloorDb) * NOISE_FLOOR_FALL_RATE;
+        } else if (!isSpeech) {
+            this._noiseFloorDb += (db - this._noiseFloorDb) * NOISE_FLOOR_RISE_RATE;
+        }
+
+        if (isSpeech) {
+            this._hangoverPackets = Math.ceil(this._vad.hangoverMs / this._packetMs);
+        } else if (this._hangoverPackets > 0) {
+            this._hangoverPackets--;
+        } else {
+            // 静音：放入预缓冲，最旧的数据包只记为静音时长
+            this._preroll.push(packet);
+            const prerollPackets = Math.ceil(this._vad.prerollMs / this._packetMs);
+            while (this._preroll.length > prerollPackets) {
+                this._preroll.shift();
+                this._suppressedMs += this._packetMs;
+            }
+            if (this._suppressedMs >= this._vad.silenceReportMs) {
+                this._postSilence();
+            }
+            return;
+        }
+
+        this._flushPreroll();
+        this._postPacket(packet);
+    }
+
+    /**
+     * 更新静音门限参数，关闭门限时立即补发缓冲的音频
+     */
+    _setVadOptions(options) {
+        this._vad = mergeVadOptions(this._vad, options);
+        if (!this._vad.enabled) {
+            this._flushPreroll();
+            this._hangoverPackets = 0;
+        }
+    }
+
+    /**
+     * 流式多相重采样：滤波器历史在块之间保留，块边界没有伪影
+     */
+    _resample(input) {
+        const historyLength = this._historyLength;
+        const length = input.length;
+        if (this._buffer.length < historyLength + length) {
+            const buffer = new Float32Array(historyLength + length);
+            buffer.set(this._buffer.subarray(0, historyLength));
+            this._buffer = buffer;
+        }
+        const buffer = this._buffer;
+        buffer.set(input, historyLength);
+
+        const bank = this._bank;
+        const tapsPerPhase = this._tapsPerPhase;
+        const up = this._up;
+        const down = this._down;
+        let inputIndex = this._inputIndex;
+        let phase = this._phase;
+
+        while (inputIndex < length) {
+            // y[n] = sum_j taps[phase + j * up] * x[inputIndex - j]
+            const offset = phase * tapsPerPhase;
+            let position = historyLength + inputIndex;
+            let acc = 0;
+            for (let j = 0; j < tapsPerPhase; j++) {
+                acc += bank[offset + j] * buffer[position--];
+            }
+            this._pushSample(acc);
+
+            phase += down;
+            inputIndex += Math.floor(phase / up);
+            phase %= up;
+        }
+
+        this._inputIndex = inputIndex - length;
+        this._phase = phase;
+        buffer.copyWithin(0, length, length + historyLength);
+    }
+
     process(inputs, outputs, parameters) {
         const input = inputs[0][0];
         if (!input) return true;
-        
-        // 将输入复制到缓冲区
-        this._buffer.set(input);
-        
-        // 将Float32Array转换为Int16Array
-        const outputData = new Int16Array(input.length);
-        for (let i = 0; i < input.length; i++) {
-            outputData[i] = Math.max(-32768, Math.min(32767, input[i] * 32768));
-        }
-        
-        // 发送消息给主线程
-        this.port.postMessage({
-            audioData: outputData,
-            sampleRate: sampleRate
-        });
-        
+
+        if (this._passthrough) {
+            for (let i = 0; i < input.length; i++) {
+                this._pushSample(input[i]);
+            }
+        } else {
+            this._resample(input);
+        }
+
         return true;
     }
 }
@@ -39,4 +316,4 @@ try {
     registerProcessor('audio-processor', AudioProcessor);
 } catch (e) {
     console.error('注册 AudioProcessor 失败:', e);
-} 
\ No newline at end of file
+}
@@ -1,4 +1,8 @@
-let socket = io();
+let socket = io({
+    // 连接时声明客户端支持的音频上传编码，服务器通过 audio_codec 事件返回协商结果；
+    // 同时声明支持实时文本增量补丁，服务器改为发送 realtime_delta 事件
+    auth: { audioCodecs: getSupportedAudioCodecs(), transcriptDelta: true }
+});
 // 推迟 displayDiv 的初始化，保证在DOM加载完成后获取
 let displayDiv = null;
 let server_available = false;
@@ -8,6 +12,8 @@ let currentConfig = {}; // 存储当前配置信息
 let waitingForConfigUpdate = false; // 是否正在等待配置更新
 let useSimplifiedChinese = true; // 是否使用简体中文
 let originalFullSentences = []; // 保存原始句子（未转换前）
+let realtimeWords = null; // 最近一次按词稳定的实时文本 {committed, tail}，尾部仍可能变化
+let realtimeDelta = new TranscriptDeltaState(); // 由 realtime_delta 补丁还原的当前语句实时文本
 let currentWakewordStyle = 1; // 当前唤醒灯样式
 
 // 全局变量，用于跟踪当前激活的导航标签
@@ -44,6 +50,281 @@ let animationFrameId;
 let recorder = null;
 let isFirstConnection = true;
 
+// 音频上传方式：true 使用 Socket.IO 二进制附件，false 回退为旧版 base64 文本
+const USE_BINARY_AUDIO_TRANSPORT = true;
+
+// 音频数据包序列号，每次连接（服务器端新会话）从 0 开始，供服务器端抖动缓冲排序
+let audioSequence = 0;
+
+// 压缩上传（Opus）设置
+const OPUS_BITRATE = 32000; // Opus 目标码率（约为 48kHz PCM 的 1/24）
+const OPUS_FRAME_DURATION_US = 20000; // WebCodecs 每个 Opus 数据包 20ms
+const WEBM_TIMESLICE_MS = 100; // MediaRecorder 分片间隔
+let audioUplinkCodec = 'pcm'; // 与服务器协商得到的上传编码
+let mediaStream = null; // 麦克风流（MediaRecorder 使用）
+let opusEncoder = null; // WebCodecs AudioEncoder
+let opusEncoderSampleRate = 0;
+let opusTimestampUs = 0;
+let webmRecorder = null; // MediaRecorder（WebM/Opus）
+let webmSendChain = Promise.resolve(); // 保证 WebM 分片按产生顺序发送
+
+// 客户端静音门限：AudioWorklet 静音期间只发送静音标记，参数来自服务器配置
+let audioWorkletNode = null;
+
+/**
+ * 获取浏览器支持的音频上传编码，按优先顺序排列
+ * @returns {string[]} 编码列表
+ */
+function getSupportedAudioCodecs() {
+    const codecs = [];
+    if (typeof AudioEncoder !== 'undefined' && typeof AudioData !== 'undefined') {
+        codecs.push('opus');
+    }
+    if (typeof MediaRecorder !== 'undefined' && MediaRecorder.isTypeSupported &&
+        MediaRecorder.isTypeSupported('audio/webm;codecs=opus')) {
+        codecs.push('webm-opus');
+    }
+    codecs.push('pcm');
+    return codecs;
+}
+
+/**
+ * 为一个数据包编号、记录时间戳并发送到服务器
+ * @param {ArrayBuffer} audioBuffer - 音频数据（PCM 或 Opus）
+ * @param {number} sampleRate - 采样率
+ * @param {Object} [extra] - 附加字段（codec、duration 等）
+ */
+function emitAudioPacket(audioBuffer, sampleRate, extra) {
+    // 在采集回调中立即编号并记录时间戳（毫秒，单调时钟）
+    const packet = Object.assign({
+        audio: audioBuffer,
+        sampleRate: sampleRate,
+        seq: audioSequence++,
+        ts: performance.now()
+    }, extra);
+    // ArrayBuffer 会被 Socket.IO 作为二进制附件发送，无需编码
+    socket.emit('audio_data', packet);
+}
+
+/**
+ * 发送静音标记，服务器据此补足静音时长，保持录音机的静音计时正确
+ * @param {number} durationMs - 被跳过的静音时长（毫秒）
+ */
+function sendSilenceMarker(durationMs) {
+    if (!socket.connected) return;
+
+    if (audioUplinkCodec === 'webm-opus' && webmRecorder) {
+        // MediaRecorder 直接录制麦克风流，不经过静音门限
+        return;
+    }
+
+    const emitMarker = () => {
+        socket.emit('audio_silence', {
+            duration: durationMs,
+            seq: audioSequence++,
+            ts: performance.now()
+        });
+    };
+
+    if (audioUplinkCodec === 'opus' && opusEncoder) {
+        // 先取出编码器中剩余的 Opus 数据包，保证静音标记的序列号排在其后
+        opusTimestampUs += durationMs * 1000;
+        opusEncoder.flush().then(emitMarker).catch(e => fallbackToPcmUplink(e.message));
+        return;
+    }
+
+    emitMarker();
+}
+
+/**
+ * 将服务器配置中的客户端静音门限参数发送给 AudioWorklet
+ * @param {Object} config - 服务器配置
+ */
+function applyClientVadConfig(config) {
+    if (!audioWorkletNode || !config) return;
+    audioWorkletNode.port.postMessage({
+        vad: {
+            enabled: !!config.client_vad_enabled,
+            thresholdDb: config.client_vad_threshold_db,
+            hangoverMs: config.client_vad_hangover_ms,
+            prerollMs: config.client_vad_preroll_ms
+        }
+    });
+}
+
+/**
+ * 停止当前的压缩编码器
+ */
+function stopAudioUplinkEncoders() {
+    if (opusEncoder) {
+        try {
+            opusEncoder.close();
+        } catch (e) {
+            // 编码器可能已经因错误关闭
+        }
+        opusEncoder = null;
+    }
+    if (webmRecorder) {
+        if (webmRecorder.state !== 'inactive') {
+            webmRecorder.stop();
+        }
+        webmRecorder = null;
+    }
+}
+
+/**
+ * 压缩编码器出错时回退为 PCM 上传
+ * @param {string} reason - 原因
+ */
+function fallbackToPcmUplink(reason) {
+    console.warn('压缩音频上传不可用，回退为 PCM:', reason);
+    stopAudioUplinkEncoders();
+    audioUplinkCodec = 'pcm';
+}
+
+/**
+ * 创建 WebCodecs Opus 编码器
+ * @param {number} sampleRate - 输入采样率
+ */
+function createOpusEncoder(sampleRate) {
+    const config = {
+        codec: 'opus',
+        sampleRate: sampleRate,
+        numberOfChannels: 1,
+        bitrate: OPUS_BITRATE,
+        opus: { frameDuration: OPUS_FRAME_DURATION_US }
+    };
+
+    opusEncoder = new AudioEncoder({
+        output: (chunk) => {
+            if (!socket.connected) return;
+            const data = new ArrayBuffer(chunk.byteLength);
+            chunk.copyTo(data);
+            emitAudioPacket(data, sampleRate, {
+                codec: 'opus',
+                duration: (chunk.duration || OPUS_FRAME_DURATION_US) / 1000
+            });
+        },
+        error: (e) => fallbackToPcmUplink(e.message)
+    });
+    opusEncoder.configure(config);
+    opusEncoderSampleRate = sampleRate;
+    opusTimestampUs = 0;
+
+    // 部分浏览器不支持当前采样率的 Opus 编码
+    AudioEncoder.isConfigSupported(config).then(support => {
+        if (!support.supported) {
+            fallbackToPcmUplink(`不支持 ${sampleRate}Hz 的 Opus 编码`);
+        }
+    }).catch(e => fallbackToPcmUplink(e.message));
+}
+
+/**
+ * 使用 MediaRecorder 录制 WebM/Opus 并按分片发送
+ */
+function startWebmRecorder() {
+    if (!mediaStream) return;
+
+    webmRecorder = new MediaRecorder(mediaStream, {
+        mimeType: 'audio/webm;codecs=opus',
+        audioBitsPerSecond: OPUS_BITRATE
+    });
+    webmRecorder.ondataavailable = (event) => {
+        if (!event.data || !event.data.size) return;
+        const blob = event.data;
+        webmSendChain = webmSendChain.then(async () => {
+            const data = await blob.arrayBuffer();
+            if (socket.connected) {
+                emitAudioPacket(data, 48000, {
+                    codec: 'webm-opus',
+                    duration: WEBM_TIMESLICE_MS
+                });
+            }
+        });
+    };
+    webmRecorder.onerror = (event) => fallbackToPcmUplink(event.error ? event.error.message : 'MediaRecorder 错误');
+    webmRecorder.start(WEBM_TIMESLICE_MS);
+}
+
+/**
+ * 根据协商结果启动上传编码器
+ * 每次连接都会重新协商，WebM 流需要从新的头部开始，因此编码器也重新创建
+ */
+function setupAudioUplink() {
+    stopAudioUplinkEncoders();
+    try {
+        if (audioUplinkCodec === 'webm-opus') {
+            startWebmRecorder();
+        }
+        // Opus 编码器在收到第一帧 PCM 时按实际采样率创建
+    } catch (e) {
+        fallbackToPcmUplink(e.message);
+    }
+}
+
+/**
+ * 发送一帧 16 位 PCM 音频到服务器（协商为压缩上传时先编码）
+ * @param {ArrayBuffer} audioBuffer - Int16 PCM 数据
+ * @param {number} sampleRate - 采样率
+ */
+function sendAudioChunk(audioBuffer, sampleRate) {
+    if (!socket.connected) return;
+
+    if (audioUplinkCodec === 'webm-opus' && webmRecorder) {
+        // MediaRecorder 直接从麦克风流录制，不再发送 PCM
+        return;
+    }
+
+    if (audioUplinkCodec === 'opus') {
+        try {
+            if (!opusEncoder || opusEncoderSampleRate !== sampleRate) {
+                stopAudioUplinkEncoders();
+                createOpusEncoder(sampleRate);
+            }
+            const numberOfFrames = audioBuffer.byteLength / 2;
+            const audioData = new AudioData({
+                format: 's16',
+                sampleRate: sampleRate,
+                numberOfFrames: numberOfFrames,
+                numberOfChannels: 1,
+                timestamp: opusTimestampUs,
+                data: audioBuffer
+            });
+            opusTimestampUs += numberOfFrames * 1e6 / sampleRate;
+            opusEncoder.encode(audioData);
+            audioData.close();
+            return;
+        } catch (e) {
+            fallbackToPcmUplink(e.message);
+        }
+    }
+
+    if (USE_BINARY_AUDIO_TRANSPORT) {
+        emitAudioPacket(audioBuffer, sampleRate);
+        return;
+    }
+
+    const seq = audioSequence++;
+    const ts = performance.now();
+
+    // 旧版路径：转换为 Base64 编码后发送
+    const audioBlob = new Blob([audioBuffer], { type: 'application/octet-stream' });
+    const reader = new FileReader();
+
+    reader.onloadend = () => {
+        const base64data = reader.result.split(',')[1];
+
+        socket.emit('audio_data', {
+            audio: base64data,
+            sampleRate: sampleRate,
+            seq: seq,
+            ts: ts
+        });
+    };
+
+    reader.readAsDataURL(audioBlob);
+}
+
 // 防抖变量
 let lastTranslatedText = '';
 let translationDebounceTimer = null;
@@ -304,7 +585,7 @@ function updateRecordingStatusIndicator(isActive, message) {
     console.log(`录音状态更新为: ${isActive ? '聆听' : '休眠'}`);
 }
 
-function displayRealtimeText(realtimeText, displayDiv) {
+function displayRealtimeText(realtimeText, displayDiv, volatileText) {
     // 确保 displayDiv 存在
     if (!displayDiv) {
         console.warn('显示区域不存在，无法显示文本');
@@ -326,6 +607,14 @@ function displayRealtimeText(realtimeText, displayDiv) {
         displayedText += realtimeSpan.outerHTML;
     }
 
+    // 仍可能变化的尾部文本以较淡的样式显示
+    if (volatileText) {
+        let volatileSpan = document.createElement('span');
+        volatileSpan.textContent = volatileText;
+        volatileSpan.className = (fullSentences.length % 2 === 0 ? 'yellow' : 'cyan') + ' volatile';
+        displayedText += volatileSpan.outerHTML;
+    }
+
     displayDiv.innerHTML = displayedText;
 }
 
@@ -666,6 +955,11 @@ function getConfigFromUI() {
 
 // 初始化Socket.IO连接
 socket.on('connect', function () {
+    // 新连接对应服务器端新的接收会话，序列号重新开始
+    audioSequence = 0;
+    // 在收到新的协商结果之前使用 PCM 上传
+    stopAudioUplinkEncoders();
+    audioUplinkCodec = 'pcm';
     server_available = true;
     
     // 更新显示状态
@@ -753,12 +1047,60 @@ socket.on('realtime', function (data) {
     if (data.type === 'realtime') {
         // 使用辅助函数处理文本
         const processedText = processText(data.text);
-        displayRealtimeText(processedText, displayDiv);
+        if (realtimeWords) {
+            // 服务器在同一次实时转写中先发送按词稳定的结果，分开显示已确认文本和尾部
+            const convert = (text) => useSimplifiedChinese ? window.ChineseConverter.convertToSimplified(text) : text;
+            displayRealtimeText(convert(realtimeWords.committed), displayDiv, convert(realtimeWords.tail));
+        } else {
+            displayRealtimeText(processedText, displayDiv);
+        }
     }
 });
 
+socket.on('realtime_words', function (data) {
+    if (data.type === 'realtime_words') {
+        realtimeWords = { committed: data.committed, tail: data.tail };
+    }
+});
+
+socket.on('realtime_delta', function (data) {
+    if (data.type !== 'realtime_delta') {
+        return;
+    }
+    const result = realtimeDelta.apply(data);
+    if (result === 'resync') {
+        // 缺少之前的补丁（如重新连接），请求当前语句的完整状态
+        socket.emit('realtime_resync');
+        return;
+    }
+    if (result === 'applied') {
+        renderRealtimeDelta();
+    }
+});
+
+// 显示增量补丁还原的实时文本，之前还在转写完整句子的语句的文本显示在前面
+function renderRealtimeDelta() {
+    const pendingText = realtimeDelta.pendingText;
+    if (!realtimeDelta.text && !pendingText) {
+        return;
+    }
+    const prefix = pendingText && realtimeDelta.text ? pendingText + ' ' : pendingText;
+    // 使用辅助函数处理文本（同时发送翻译请求）
+    const processedText = processText(prefix + realtimeDelta.text);
+    if (realtimeDelta.stable > 0) {
+        // 已确认的文本和仍可能变化的尾部分开显示
+        const convert = (text) => useSimplifiedChinese ? window.ChineseConverter.convertToSimplified(text) : text;
+        displayRealtimeText(convert(prefix + realtimeDelta.committedText), displayDiv, convert(realtimeDelta.tailText));
+    } else {
+        displayRealtimeText(processedText, displayDiv);
+    }
+}
+
 socket.on('fullSentence', function (data) {
     if (data.type === 'fullSentence') {
+        realtimeWords = null;
+        // 多个语句可能同时在转写，只结束该句子所属的语句
+        realtimeDelta.finish(data.utterance);
         // 保存原始句子（未转换）
         originalFullSentences.push(data.text);
         // 使用辅助函数处理文本
@@ -767,6 +1109,21 @@ socket.on('fullSentence', function (data) {
 
         // 更新显示
         updateDisplay();
+        // 之后的语句已有实时文本时继续显示
+        renderRealtimeDelta();
+    }
+});
+
+// 快速定稿的句子经主模型复核后文本不同，替换之前显示的句子
+socket.on('fullSentenceCorrection', function (data) {
+    if (data.type === 'fullSentenceCorrection') {
+        const index = originalFullSentences.lastIndexOf(data.original);
+        if (index < 0) {
+            return;
+        }
+        originalFullSentences[index] = data.text;
+        fullSentences[index] = useSimplifiedChinese ? window.ChineseConverter.convertToSimplified(data.text) : data.text;
+        updateDisplay();
     }
 });
 
@@ -783,9 +1140,17 @@ socket.on('recording_status', function (data) {
 });
 
 // 接收服务器配置
+// Socket.IO 事件：音频上传编码协商结果
+socket.on('audio_codec', function (data) {
+    audioUplinkCodec = (data && data.codec) || 'pcm';
+    console.log('音频上传编码:', audioUplinkCodec);
+    setupAudioUplink();
+});
+
 socket.on('config', function (config) {
     currentConfig = config;
     updateSettingsUI(config);
+    applyClientVadConfig(config);
     console.log('收到服务器配置:', config);
 
     // 根据配置设置初始唤醒词状态
@@ -817,6 +1182,7 @@ socket.on('config_updated', function (response) {
     if (response.success) {
         currentConfig = response.config;
         updateSettingsUI(response.config);
+        applyClientVadConfig(response.config);
         showStatusMessage('设置已成功应用，等待录音机就绪...', true);
         // 记录正在等待录音机就绪
         waitingForConfigUpdate = true;
@@ -1027,6 +1393,11 @@ function initApp() {
 // 请求麦克风访问权限并设置音频处理
 navigator.mediaDevices.getUserMedia({audio: true})
         .then(async stream => {
+            // 保存麦克风流，供 WebM/Opus 上传使用
+            mediaStream = stream;
+            if (audioUplinkCodec === 'webm-opus' && !webmRecorder) {
+                setupAudioUplink();
+            }
             // 创建音频上下文
             audioContext = new AudioContext();
             let source = audioContext.createMediaStreamSource(stream);
@@ -1074,30 +1445,30 @@ navigator.mediaDevices.getUserMedia({audio: true})
                     
                     // 创建 AudioWorkletNode 
                     console.log('创建 AudioWorkletNode...');
-                    const workletNode = new AudioWorkletNode(audioContext, 'audio-processor');
+                    // 处理器在音频线程内降采样到 16kHz，并按 32ms 打包后再发送
+                    const workletNode = new AudioWorkletNode(audioContext, 'audio-processor', {
+                        processorOptions: {
+                            targetSampleRate: 16000,
+                            packetDurationMs: 32
+                        }
+                    });
                     console.log('AudioWorkletNode 创建成功');
                     
                     // 监听从处理器发来的消息
                     workletNode.port.onmessage = (event) => {
-                        const { audioData, sampleRate } = event.data;
-                        
-                        // 将音频数据转换为 Base64 编码并发送到服务器
-                        if (socket.connected) {
-                            const audioBlob = new Blob([audioData.buffer], { type: 'application/octet-stream' });
-                            const reader = new FileReader();
-                            
-                            reader.onloadend = () => {
-                                const base64data = reader.result.split(',')[1];
-                                
-                                socket.emit('audio_data', {
-                                    audio: base64data,
-                                    sampleRate: sampleRate
-                                });
-                            };
-                            
-                            reader.readAsDataURL(audioBlob);
+                        const { audioData, sampleRate, silenceMs } = event.data;
+
+                        // 静音门限跳过的音频只发送时长
+                        if (silenceMs) {
+                            sendSilenceMarker(silenceMs);
+                            return;
                         }
+
+                        // 处理器转移过来的 16kHz ArrayBuffer 直接作为二进制数据发送
+                        sendAudioChunk(audioData, sampleRate);
                     };
+                    audioWorkletNode = workletNode;
+                    applyClientVadConfig(currentConfig);
                     
                     // 连接节点
                     source.connect(workletNode);
@@ -1133,22 +1504,8 @@ navigator.mediaDevices.getUserMedia({audio: true})
                 outputData[i] = Math.max(-32768, Math.min(32767, inputData[i] * 32768));
             }
 
-            // 将音频数据转换为 Base64 编码并发送到服务器
-            if (socket.connected) {
-                const audioBlob = new Blob([outputData.buffer], {type: 'application/octet-stream'});
-                const reader = new FileReader();
-
-                reader.onloadend = () => {
-                    const base64data = reader.result.split(',')[1];
-
-                    socket.emit('audio_data', {
-                        audio: base64data,
-                        sampleRate: audioContext.sampleRate
-                    });
-                };
-
-                reader.readAsDataURL(audioBlob);
-            }
+            // 发送音频数据到服务器
+            sendAudioChunk(outputData.buffer, audioContext.sampleRate);
         };
             }
             
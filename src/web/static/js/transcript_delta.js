@@ -0,0 +1,138 @@
+/**
+ * 实时文本增量补丁
+ * 服务器的 realtime_delta 事件只包含与上一版本不同的后缀：
+ * {utterance, rev, keep, text[, stable][, full]}，新文本为上一版本的前 keep 个字符加上 text，
+ * stable 为其中不再变化的前缀长度。带 full 标记的补丁是当前语句的完整状态。
+ * Socket.IO、原始音频 WebSocket 和 SSE /stream 的消费者都可以使用。
+ */
+
+class TranscriptDeltaState {
+    constructor() {
+        this.reset();
+    }
+
+    /**
+     * 清空状态，等待下一个完整状态或新语句的第一个补丁
+     */
+    reset() {
+        this.utterance = null;
+        this.finished = null; // 已输出完整句子的最后一个语句编号
+        this.rev = 0;
+        this.text = '';
+        this.stable = 0;
+        // 已被新语句替换、但完整句子还没有到达的语句的实时文本：语句编号 -> 文本
+        this.pending = new Map();
+    }
+
+    /**
+     * 语句已输出完整句子（收到 fullSentence 事件）：清空该语句及之前语句的文本，并忽略它们之后迟到的补丁
+     * @param {number} [utterance] - fullSentence 事件的 utterance，未提供时结束当前语句
+     */
+    finish(utterance) {
+        if (utterance === undefined || utterance === null) {
+            const current = this.utterance;
+            this.reset();
+            this.finished = current;
+            return;
+        }
+        this.finished = this.finished === null ? utterance : Math.max(this.finished, utterance);
+        for (const key of Array.from(this.pending.keys())) {
+            if (key <= utterance) {
+                this.pending.delete(key);
+            }
+        }
+        if (this.utterance !== null && this.utterance <= utterance) {
+            this.utterance = null;
+            this.rev = 0;
+            this.text = '';
+            this.stable = 0;
+        }
+    }
+
+    /**
+     * 应用一个补丁
+     * @param {Object} patch - realtime_delta 事件的数据
+     * @returns {string} 'applied'（文本已更新）、'ignored'（重复或过期的补丁）
+     *          或 'resync'（缺少之前的补丁，需要请求完整状态）
+     */
+    apply(patch) {
+        // 已输出完整句子的语句不再显示实时文本
+        if (this.finished !== null && patch.utterance <= this.finished) {
+            return 'ignored';
+        }
+        if (patch.full) {
+            // 完整状态：修订号不比本地旧时直接替换
+            if (patch.utterance === this.utterance && patch.rev < this.rev) {
+                return 'ignored';
+            }
+            this._keepPending(patch.utterance);
+            this._set(patch, '');
+            return 'applied';
+        }
+
+        if (patch.utterance !== this.utterance) {
+            // 新语句从第一个修订开始；旧语句的迟到补丁直接忽略
+            if (this.utterance !== null && patch.utterance < this.utterance) {
+                return 'ignored';
+            }
+            if (patch.rev !== 1 || patch.keep !== 0) {
+                return 'resync';
+            }
+            this._keepPending(patch.utterance);
+            this._set(patch, '');
+            return 'applied';
+        }
+
+        if (patch.rev <= this.rev) {
+            return 'ignored';
+        }
+        if (patch.rev !== this.rev + 1 || patch.keep > this.text.length) {
+            return 'resync';
+        }
+        this._set(patch, this.text.slice(0, patch.keep));
+        return 'applied';
+    }
+
+    /**
+     * 当前文本中不再变化的部分
+     */
+    get committedText() {
+        return this.text.slice(0, this.stable);
+    }
+
+    /**
+     * 当前文本中仍可能变化的尾部
+     */
+    get tailText() {
+        return this.text.slice(this.stable);
+    }
+
+    /**
+     * 之前语句的实时文本（完整句子仍在转写），按语句顺序排列
+     */
+    get pendingText() {
+        return Array.from(this.pending.keys())
+            .sort((a, b) => a - b)
+            .map((key) => this.pending.get(key))
+            .join(' ');
+    }
+
+    /**
+     * 切换到另一个语句前保留当前语句的文本，直到它的完整句子到达
+     */
+    _keepPending(utterance) {
+        if (this.utterance !== null && this.utterance !== utterance && this.text) {
+            this.pending.set(this.utterance, this.text);
+        }
+    }
+
+    _set(patch, prefix) {
+        this.utterance = patch.utterance;
+        this.rev = patch.rev;
+        this.text = prefix + patch.text;
+        this.stable = Math.min(patch.stable || 0, this.text.length);
+    }
+}
+
+// 暴露接口
+window.TranscriptDeltaState = TranscriptDeltaState;
@@ -0,0 +1,94 @@
+"""
+抖动缓冲测试脚本
+检查数据包重新排序、重复和迟到数据包的丢弃以及丢包的静音填补
+"""
+
+import os
+import sys
+
+# 将项目根目录添加到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.stt.jitter_buffer import JitterBuffer
+
+SAMPLE_RATE = 16000
+# 每个数据包 10ms 的 16 位 PCM
+PACKET_BYTES = 2 * SAMPLE_RATE // 100
+
+
+def packet(value):
+    """生成一个内容可区分的 PCM 数据包"""
+    return bytes([value]) * PACKET_BYTES
+
+
+def payloads(released):
+    """取出释放的数据包中的音频数据"""
+    return [audio for audio, _, _ in released]
+
+
+def test_reorder():
+    """乱序到达的数据包按序列号释放"""
+    buffer = JitterBuffer(window_ms=60)
+    assert payloads(buffer.push(0, packet(0), SAMPLE_RATE, now=0.0)) == [packet(0)]
+    # 1 号数据包缺失，2 号在重排窗口内等待
+    assert buffer.push(2, packet(2), SAMPLE_RATE, now=0.01) == []
+    assert payloads(buffer.push(1, packet(1), SAMPLE_RATE, now=0.02)) == [packet(1), packet(2)]
+    stats = buffer.get_stats()
+    assert stats['reordered'] == 1
+    assert stats['lost'] == 0
+    assert stats['released'] == 3
+
+
+def test_duplicates():
+    """重复的数据包（已释放或仍在等待）被丢弃"""
+    buffer = JitterBuffer(window_ms=60)
+    buffer.push(0, packet(0), SAMPLE_RATE, now=0.0)
+    assert buffer.push(0, packet(0), SAMPLE_RATE, now=0.01) == []
+    buffer.push(2, packet(2), SAMPLE_RATE, now=0.02)
+    assert buffer.push(2, packet(2), SAMPLE_RATE, now=0.03) == []
+    assert buffer.get_stats()['duplicates'] == 2
+
+
+def test_short_gap_concealed():
+    """超过重排窗口的短暂丢包用等长静音填补，之后到达的数据包算作迟到"""
+    buffer = JitterBuffer(window_ms=60, max_conceal_ms=100)
+    buffer.push(0, packet(0), SAMPLE_RATE, now=0.0)
+    assert buffer.push(2, packet(2), SAMPLE_RATE, now=0.01) == []
+    # 窗口内不释放
+    assert buffer.flush(now=0.05) == []
+
+    released = buffer.flush(now=0.1)
+    assert payloads(released) == [bytes(PACKET_BYTES), packet(2)]
+    assert released[0][1] == SAMPLE_RATE and released[0][2] is None
+
+    assert buffer.push(1, packet(1), SAMPLE_RATE, now=0.2) == []
+    stats = buffer.get_stats()
+    assert stats['lost'] == 1
+    assert stats['concealed'] == 1
+    assert stats['late'] == 1
+    assert stats['duplicates'] == 0
+
+
+def test_long_gap_skipped():
+    """超过填补上限的丢包直接跳过，不插入静音"""
+    buffer = JitterBuffer(window_ms=60, max_conceal_ms=100)
+    buffer.push(0, packet(0), SAMPLE_RATE, now=0.0)
+    # 丢失 20 个 10ms 的数据包（200ms）
+    buffer.push(21, packet(21), SAMPLE_RATE, now=0.01)
+    assert payloads(buffer.flush(now=0.1)) == [packet(21)]
+    stats = buffer.get_stats()
+    assert stats['lost'] == 20
+    assert stats['concealed'] == 0
+
+
+def main():
+    """依次运行所有测试"""
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"通过: {name}")
+    print("抖动缓冲测试全部通过")
+
+
+if __name__ == "__main__":
+    main()
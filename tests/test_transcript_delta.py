@@ -0,0 +1,88 @@
+"""
+实时文本增量编码测试脚本
+检查补丁应用后与原文一致、keep 按 UTF-16 编码单元计算以及语句切换
+"""
+
+import os
+import sys
+
+# 将项目根目录添加到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.stt.transcript_delta import TranscriptDeltaEncoder
+
+
+def apply_patch(text, patch):
+    """按客户端的方式应用补丁：保留前 keep 个 UTF-16 编码单元，再拼接新的后缀"""
+    prefix = text.encode('utf-16-le')[:2 * patch['keep']].decode('utf-16-le')
+    return prefix + patch['text']
+
+
+def test_round_trip():
+    """每次更新的补丁应用到上一版本后得到新文本"""
+    updates = [
+        "hello",
+        "hello wor",
+        "hello world",
+        "hello word.",
+        "你好",
+        "你好世界😀",
+        "你好世界😀！再见",
+        "",
+        "再见",
+    ]
+    encoder = TranscriptDeltaEncoder()
+    client_text = ''
+    last_rev = 0
+    for text in updates:
+        patch = encoder.encode(text)
+        assert patch is not None
+        assert patch['rev'] == last_rev + 1
+        last_rev = patch['rev']
+        client_text = apply_patch(client_text, patch)
+        assert client_text == text, (client_text, text)
+
+
+def test_utf16_keep():
+    """keep 与 stable 按 UTF-16 编码单元计算（代理对占两个单元）"""
+    encoder = TranscriptDeltaEncoder()
+    encoder.encode("😀a")
+    patch = encoder.encode("😀b", stable="😀")
+    assert patch['keep'] == 2
+    assert patch['text'] == "b"
+    assert patch['stable'] == 2
+
+
+def test_unchanged_returns_none():
+    """文本和稳定前缀都没有变化时不生成补丁"""
+    encoder = TranscriptDeltaEncoder()
+    assert encoder.encode("abc", stable="a") is not None
+    assert encoder.encode("abc", stable="a") is None
+    assert encoder.encode("abc", stable="ab") is not None
+
+
+def test_utterance_switch():
+    """新的语句编号从空文本开始，已经结束的语句的文本被忽略"""
+    encoder = TranscriptDeltaEncoder()
+    encoder.encode("first", utterance=3)
+    patch = encoder.encode("second", utterance=4)
+    assert patch['utterance'] == 4
+    assert patch['rev'] == 1
+    assert patch['keep'] == 0 and patch['text'] == "second"
+    assert encoder.encode("late", utterance=3) is None
+
+    snapshot = encoder.snapshot()
+    assert snapshot['utterance'] == 4 and snapshot['text'] == "second" and snapshot['full']
+
+
+def main():
+    """依次运行所有测试"""
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"通过: {name}")
+    print("实时文本增量编码测试全部通过")
+
+
+if __name__ == "__main__":
+    main()
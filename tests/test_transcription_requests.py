@@ -0,0 +1,118 @@
+"""
+转写请求队列测试脚本
+检查请求按优先级取出、实时请求被更新的请求取代、过期和取消的请求被丢弃
+"""
+
+import os
+import queue
+import sys
+import time
+
+# 将项目根目录添加到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.stt.transcription_requests import (
+    RequestQueue, TranscriptionRequest, PRIORITIES, KIND_FINAL, KIND_EARLY, KIND_REALTIME,
+    DROP_SUPERSEDED, DROP_EXPIRED, DROP_CANCELLED)
+
+
+def make_request(request_id, kind, utterance=1, deadline=None):
+    """生成一个不带音频的请求"""
+    return TranscriptionRequest(request_id, kind, PRIORITIES[kind], deadline, utterance, None, 'en')
+
+
+def make_queue():
+    """返回请求队列和记录被丢弃请求的列表 [(request_id, 原因)]"""
+    dropped = []
+    requests = RequestQueue(lambda request, reason: dropped.append((request.request_id, reason)))
+    return requests, dropped
+
+
+def drain(requests):
+    """按顺序取出所有请求的编号"""
+    request_ids = []
+    while True:
+        try:
+            request_ids.append(requests.get_nowait().request_id)
+        except queue.Empty:
+            return request_ids
+
+
+def test_priority_order():
+    """完整句子先于提前转写，提前转写先于实时转写，同一优先级先进先出"""
+    requests, dropped = make_queue()
+    requests.put(make_request(1, KIND_REALTIME, utterance=1))
+    requests.put(make_request(2, KIND_EARLY, utterance=2))
+    requests.put(make_request(3, KIND_REALTIME, utterance=3))
+    requests.put(make_request(4, KIND_FINAL, utterance=4))
+    requests.put(make_request(5, KIND_FINAL, utterance=5))
+    assert drain(requests) == [4, 5, 2, 1, 3]
+    assert dropped == []
+
+
+def test_realtime_superseded():
+    """同一语句的新实时请求取代排队中的旧请求，其他语句不受影响"""
+    requests, dropped = make_queue()
+    requests.put(make_request(1, KIND_REALTIME, utterance=1))
+    requests.put(make_request(2, KIND_REALTIME, utterance=2))
+    requests.put(make_request(3, KIND_REALTIME, utterance=1))
+    assert dropped == [(1, DROP_SUPERSEDED)]
+    assert requests.qsize() == 2
+    assert drain(requests) == [2, 3]
+
+
+def test_final_drops_realtime():
+    """语句的完整句子请求丢弃该语句排队中的实时请求，提前转写不丢弃"""
+    requests, dropped = make_queue()
+    requests.put(make_request(1, KIND_REALTIME, utterance=1))
+    requests.put(make_request(2, KIND_EARLY, utterance=1))
+    assert dropped == []
+    requests.put(make_request(3, KIND_FINAL, utterance=1))
+    assert dropped == [(1, DROP_SUPERSEDED)]
+    assert drain(requests) == [3, 2]
+
+
+def test_expired_dropped():
+    """取出时已经过期的请求被丢弃"""
+    requests, dropped = make_queue()
+    requests.put(make_request(1, KIND_REALTIME, deadline=time.time() - 1))
+    requests.put(make_request(2, KIND_EARLY, deadline=time.time() + 60))
+    assert drain(requests) == [2]
+    assert dropped == [(1, DROP_EXPIRED)]
+
+
+def test_cancel():
+    """取消排队中的请求，已取出或不存在的请求无法取消"""
+    requests, dropped = make_queue()
+    requests.put(make_request(1, KIND_FINAL))
+    requests.put(make_request(2, KIND_REALTIME))
+    assert requests.cancel(2)
+    assert not requests.cancel(2)
+    assert dropped == [(2, DROP_CANCELLED)]
+    assert drain(requests) == [1]
+    assert not requests.cancel(1)
+
+
+def test_get_timeout():
+    """队列为空时 get 等待超时后抛出 queue.Empty"""
+    requests, _ = make_queue()
+    started = time.time()
+    try:
+        requests.get(timeout=0.05)
+        assert False, "应当抛出 queue.Empty"
+    except queue.Empty:
+        pass
+    assert time.time() - started >= 0.05
+
+
+def main():
+    """依次运行所有测试"""
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"通过: {name}")
+    print("转写请求队列测试全部通过")
+
+
+if __name__ == "__main__":
+    main()